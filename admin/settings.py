@@ -180,6 +180,11 @@ STATIC_URL = "/static/"
 
 MEDIA_URL = '/media/'
 
+# Background export artifacts (see reports.services.job_service); kept
+# outside MEDIA so they are only served through the download view
+EXPORT_ROOT = BASE_DIR / 'exports'
+EXPORT_JOB_TTL = int(os.getenv('EXPORT_JOB_TTL', 1800))  # seconds
+
 STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 
 # Default primary key field type
@@ -237,10 +242,28 @@ else:
 # Ensure TLS/SSL mutual exclusivity per env; Django will respect the booleans
 # No secrets are logged anywhere.
 
-# Caching (used for ngrok notification idempotency)
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': 'pos-default-cache',
+# Caching (ngrok notification idempotency, catalog snapshots, report
+# results). Shared by every worker process: Redis when REDIS_URL is set,
+# else a database table (created by the reports migrations).
+if os.getenv('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django_redis.cache.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
+            'KEY_PREFIX': 'pos',
+        }
     }
-}
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'pos_cache',
+            'OPTIONS': {'MAX_ENTRIES': 20000},
+        }
+    }
+
+# Report result cache (see reports.services.cache_service): ranges that
+# end before today cannot change except through an edit, which
+# invalidates them, so they are kept far longer than ranges up to today
+REPORT_CACHE_TTL = int(os.getenv('REPORT_CACHE_TTL', 60 * 60 * 24))  # seconds
+REPORT_CACHE_TTL_TODAY = int(os.getenv('REPORT_CACHE_TTL_TODAY', 60))  # seconds
@@ -0,0 +1,81 @@
+from datetime import datetime
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+# Formats the expense form has accepted over time (the date picker posts
+# DD-MM-YYYY), most likely first
+TEXT_FORMATS = ('%d-%m-%Y', '%Y-%m-%d', '%d/%m/%Y', '%Y/%m/%d', '%d.%m.%Y', '%d %b %Y', '%d %B %Y')
+
+
+def parse(text):
+    text = (text or '').strip()
+    for fmt in TEXT_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def parse_dates(apps, schema_editor):
+    """
+    Copy each expense's text date into the new column. Expenses whose text
+    cannot be parsed are dated the day they were recorded and listed, so
+    they can be checked by hand.
+    """
+    Expense = apps.get_model('finance', 'Expense')
+    unparsed = []
+    for expense in Expense.objects.only('id', 'date_text', 'date_created').iterator(chunk_size=1000):
+        day = parse(expense.date_text)
+        if day is None:
+            day = timezone.localdate(expense.date_created) if expense.date_created else timezone.localdate()
+            unparsed.append((expense.pk, expense.date_text, day))
+        Expense.objects.filter(pk=expense.pk).update(date=day)
+    if unparsed:
+        print(f"\n  {len(unparsed)} expense date(s) could not be parsed and were set to the day recorded:")
+        for pk, text, day in unparsed:
+            print(f"    Expense {pk}: {text!r} -> {day}")
+
+
+def format_dates(apps, schema_editor):
+    Expense = apps.get_model('finance', 'Expense')
+    for expense in Expense.objects.only('id', 'date').iterator(chunk_size=1000):
+        Expense.objects.filter(pk=expense.pk).update(date_text=expense.date.strftime('%d-%m-%Y'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0005_alter_expense_amount'),
+    ]
+
+    operations = [
+        migrations.RenameField(
+            model_name='expense',
+            old_name='date',
+            new_name='date_text',
+        ),
+        migrations.AddField(
+            model_name='expense',
+            name='date',
+            field=models.DateField(null=True),
+        ),
+        migrations.RunPython(parse_dates, format_dates),
+        # A default lets the column be re-added when migrating backwards
+        migrations.AlterField(
+            model_name='expense',
+            name='date_text',
+            field=models.TextField(default=''),
+        ),
+        migrations.RemoveField(
+            model_name='expense',
+            name='date_text',
+        ),
+        migrations.AlterField(
+            model_name='expense',
+            name='date',
+            field=models.DateField(db_index=True),
+        ),
+    ]
@@ -16,7 +16,7 @@ class Expense(models.Model):
     name = models.TextField()
     description = models.TextField()
     category = models.ForeignKey(ExpenseCategory,on_delete=models.SET_NULL,related_name='expenses',null=True)
-    date = models.TextField()
+    date = models.DateField(db_index=True)
     amount = models.DecimalField(
         max_digits=12,
         decimal_places=2,
@@ -1,3 +1,5 @@
+from datetime import datetime
+
 from finance.models import *
 from django.shortcuts import redirect,get_object_or_404
 from django.contrib import messages
@@ -52,6 +54,20 @@ class ExpenseCategoryManager:
     
 
 class ExpenseManager:
+    # The date picker posts DD-MM-YYYY
+    DATE_FORMATS = ('%d-%m-%Y', '%Y-%m-%d', '%d/%m/%Y')
+
+    @classmethod
+    def parse_date(cls, value):
+        """
+        The date entered on the expense form, or None if it is not one.
+        """
+        for fmt in cls.DATE_FORMATS:
+            try:
+                return datetime.strptime(value, fmt).date()
+            except ValueError:
+                continue
+        return None
 
     @staticmethod
     def create_expense(request):
@@ -62,11 +78,14 @@ class ExpenseManager:
         name = request.POST.get('name', '').strip()
         description = request.POST.get('description', '').strip()
         category_id = request.POST.get('category', '').strip()
-        date = request.POST.get('date', '').strip()              
+        date = ExpenseManager.parse_date(request.POST.get('date', '').strip())
         status = request.POST.get('status', '').strip()
         amount = request.POST.get('amount', '').strip()
 
         category = get_object_or_404(ExpenseCategory, id=category_id)
+        if date is None:
+            messages.error(request, "Enter the expense date as DD-MM-YYYY")
+            return redirect('finance:expenses')
 
         Expense.objects.create(
             name=name,
@@ -88,11 +107,14 @@ class ExpenseManager:
         new_name = request.POST.get('name', '').strip()
         new_description = request.POST.get('description', '').strip()
         new_category_id = request.POST.get('category', '').strip()
-        new_date = request.POST.get('date', '').strip()
+        new_date = ExpenseManager.parse_date(request.POST.get('date', '').strip())
         new_status = request.POST.get('status', '').strip()
         new_amount = request.POST.get('amount', '').strip()
 
         new_category = get_object_or_404(ExpenseCategory, id=new_category_id)
+        if new_date is None:
+            messages.error(request, "Enter the expense date as DD-MM-YYYY")
+            return redirect('finance:expenses')
 
         expense.name = new_name
         expense.description = new_description
@@ -1,22 +1,19 @@
-import io
-from django.http import FileResponse, HttpResponse
-from openpyxl import Workbook
+from reports.services.export_service import Column, ExportManager, text
 
-def export_finance_excel(qs, basename='finance'):
-    wb = Workbook()
-    ws = wb.active
-    ws.append(['Date', 'Description', 'Amount', 'Type'])
-    for item in qs:
-        ws.append([
-            item.date.strftime('%Y-%m-%d') if hasattr(item, 'date') else '',
-            getattr(item, 'description', ''),
-            float(getattr(item, 'amount', 0)),
-            getattr(item, 'type', ''),
-        ])
-    buffer = io.BytesIO()
-    wb.save(buffer)
-    buffer.seek(0)
-    return FileResponse(buffer, as_attachment=True, filename=f'{basename}.xlsx')
+EXPENSE_EXPORT_COLUMNS = [
+    Column('Date', 'date', text),
+    Column('Name', 'name'),
+    Column('Category', 'category__name', text),
+    Column('Description', 'description'),
+    Column('Amount', 'amount'),
+    Column('Status', 'status'),
+]
 
-def export_finance_pdf(qs, basename='finance'):
-    return HttpResponse('PDF export temporarily disabled', status=503)
+def export_expenses_excel(qs, basename='expenses'):
+    return ExportManager.excel(qs, EXPENSE_EXPORT_COLUMNS, basename)
+
+def export_expenses_csv(qs, basename='expenses'):
+    return ExportManager.csv(qs, EXPENSE_EXPORT_COLUMNS, basename)
+
+def export_expenses_pdf(qs, basename='expenses'):
+    return ExportManager.pdf(qs, EXPENSE_EXPORT_COLUMNS, basename)
@@ -11,7 +11,7 @@ from authentication.decorators import manager_or_above
 # Create your views here.
 def expenses(request):
     # Base queryset
-    qs = Expense.objects.select_related('category', 'created_by').order_by('-date_created')
+    qs = Expense.objects.select_related('category', 'created_by').order_by('-date', '-id')
     categories = ExpenseCategory.objects.all()
 
     # Search filter (optional)
@@ -25,6 +25,8 @@ def expenses(request):
     exp_type = request.GET.get('export')
     if exp_type == 'excel':
         return export_expenses_excel(qs)
+    if exp_type == 'csv':
+        return export_expenses_csv(qs)
     if exp_type == 'pdf':
         return export_expenses_pdf(qs)
 
@@ -0,0 +1,128 @@
+import random
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from inventory.models import Product, Stock
+from inventory.services.valuation_service import ValuationManager
+from people.models import Supplier
+from purchases.models import Purchase, PurchaseItem
+from sales.models import Order, OrderItem
+
+
+class Command(BaseCommand):
+    help = (
+        'Time the FIFO valuation engine on synthetic purchase and sales history. '
+        'Everything is created inside a transaction that is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=2000)
+        parser.add_argument('--purchase-lines', type=int, default=100_000)
+        parser.add_argument('--sale-lines', type=int, default=900_000)
+        parser.add_argument('--days', type=int, default=730)
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        random.seed(options['seed'])
+        with transaction.atomic():
+            started = time.perf_counter()
+            products = self.create_history(options)
+            self.report('Generated history', started)
+
+            started = time.perf_counter()
+            counts = ValuationManager.rebuild()
+            self.report(
+                f"Rebuild ({counts['layers']} layers, {counts['consumptions']} consumptions)", started
+            )
+
+            started = time.perf_counter()
+            value = ValuationManager.total_stock_value()
+            per_product = ValuationManager.stock_value()
+            self.report(f'Stock value {value:,.2f} over {len(per_product)} products', started)
+
+            started = time.perf_counter()
+            cogs = ValuationManager.cogs()
+            margins = list(ValuationManager.margins())
+            self.report(f'COGS {cogs:,.2f}, margins for {len(margins)} products', started)
+
+            started = time.perf_counter()
+            sale = [OrderItem(product=product, quantity=3) for product in random.sample(products, 5)]
+            ValuationManager.consume(sale)
+            self.report('Incremental FIFO draw for a 5-line sale', started)
+
+            transaction.set_rollback(True)
+
+    def report(self, label, started):
+        self.stdout.write(f'{label}: {time.perf_counter() - started:.2f}s')
+
+    def create_history(self, options):
+        today = timezone.localdate()
+        days = options['days']
+        batch = 5000
+
+        products = Product.objects.bulk_create([
+            Product(name=f'Bench {i}', slug=f'bench-{i}', sku=f'BENCH{i}', purchase_price=Decimal('50.00'))
+            for i in range(options['products'])
+        ], batch_size=batch)
+        Stock.objects.bulk_create([
+            Stock(product=product, quantity=0, price=Decimal('80.00'), tax=0, discount=0)
+            for product in products
+        ], batch_size=batch)
+
+        supplier = Supplier.objects.create(code='BENCH', name='Bench', email='bench@example.com', phone='0', country='KE')
+        purchase_count = max(options['purchase_lines'] // 10, 1)
+        purchases = Purchase.objects.bulk_create([
+            Purchase(
+                supplier=supplier,
+                reference=f'BENCH-PO-{i}',
+                status=Purchase.Status.RECEIVED,
+                receive_date=today - timedelta(days=days - i * days // purchase_count),
+            )
+            for i in range(purchase_count)
+        ], batch_size=batch)
+        items = []
+        for i in range(options['purchase_lines']):
+            quantity = random.randint(50, 200)
+            unit_cost = Decimal(random.randint(4000, 6000)) / 100
+            items.append(PurchaseItem(
+                purchase=purchases[i % purchase_count],
+                product=products[i % len(products)],
+                quantity=quantity,
+                unit_cost=unit_cost,
+                total_cost=quantity * unit_cost,
+            ))
+            if len(items) == batch:
+                PurchaseItem.objects.bulk_create(items)
+                items = []
+        PurchaseItem.objects.bulk_create(items)
+
+        lines_per_order = 3
+        order_count = max(options['sale_lines'] // lines_per_order, 1)
+        for start in range(0, order_count, batch):
+            orders = Order.objects.bulk_create([
+                Order(
+                    reference=f'BENCH-{i}',
+                    date=today - timedelta(days=days - i * days // order_count),
+                    status=Order.Status.COMPLETED,
+                )
+                for i in range(start, min(start + batch, order_count))
+            ])
+            lines = []
+            for order in orders:
+                for product in random.sample(products, lines_per_order):
+                    quantity = random.randint(1, 5)
+                    lines.append(OrderItem(
+                        order=order,
+                        product=product,
+                        purchase_price=Decimal('80.00'),
+                        unit_cost=Decimal('80.00'),
+                        quantity=quantity,
+                        total_cost=quantity * Decimal('80.00'),
+                    ))
+            OrderItem.objects.bulk_create(lines)
+        return products
@@ -0,0 +1,18 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from inventory.services.catalog_service import CatalogManager
+
+
+class Command(BaseCommand):
+    help = 'Delete POS catalog change feed entries older than the given number of days.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=7, help='Keep changes from the last N days (default 7)')
+
+    def handle(self, *args, **options):
+        before = timezone.now() - timedelta(days=options['days'])
+        deleted = CatalogManager.prune_changes(before)
+        self.stdout.write(self.style.SUCCESS(f'Pruned {deleted} catalog changes.'))
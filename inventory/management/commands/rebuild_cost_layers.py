@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from inventory.services.valuation_service import ValuationManager
+
+
+class Command(BaseCommand):
+    help = 'Rebuild FIFO cost layers and consumptions by replaying purchases and completed sales.'
+
+    def handle(self, *args, **options):
+        counts = ValuationManager.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {counts['layers']} cost layers ({counts['opening']} opening), "
+            f"{counts['consumptions']} consumptions; repriced {counts['repriced']} order lines."
+        ))
@@ -0,0 +1,27 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from inventory.services.ledger_service import StockLedgerManager
+
+
+class Command(BaseCommand):
+    help = 'Write closing stock snapshots for a day (default yesterday) or a range of past days.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', type=str, help='First day to snapshot (YYYY-MM-DD)')
+        parser.add_argument('--end', type=str, help='Last day to snapshot (YYYY-MM-DD, default yesterday)')
+
+    def handle(self, *args, **options):
+        yesterday = timezone.localdate() - timedelta(days=1)
+        try:
+            end = date.fromisoformat(options['end']) if options.get('end') else yesterday
+            start = date.fromisoformat(options['start']) if options.get('start') else end
+        except ValueError:
+            raise CommandError('Dates must be in YYYY-MM-DD format.')
+        if end > yesterday:
+            raise CommandError('Only days before today can be snapshotted.')
+
+        written = StockLedgerManager.snapshot_range(start, end)
+        self.stdout.write(self.style.SUCCESS(f'Wrote {written} stock snapshots.'))
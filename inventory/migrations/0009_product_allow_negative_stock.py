@@ -0,0 +1,18 @@
+# Generated by Django 5.1.3 on 2026-10-17 03:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0008_product_purchase_price'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='allow_negative_stock',
+            field=models.BooleanField(default=False, help_text='Allow sales to take stock below zero'),
+        ),
+    ]
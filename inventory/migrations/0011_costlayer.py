@@ -0,0 +1,42 @@
+# Generated by Django 5.1.3 on 2026-10-17 03:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0010_catalogchange'),
+        ('purchases', '0003_purchase_payment_status'),
+        ('sales', '0010_orderitem_cost_price'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CostLayer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('received_on', models.DateField()),
+                ('unit_cost', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('quantity', models.IntegerField()),
+                ('remaining', models.IntegerField()),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cost_layers', to='inventory.product')),
+                ('purchase_item', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='cost_layer', to='purchases.purchaseitem')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CostConsumption',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.IntegerField()),
+                ('unit_cost', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('order_item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cost_consumptions', to='sales.orderitem')),
+                ('layer', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='consumptions', to='inventory.costlayer')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='costlayer',
+            index=models.Index(fields=['product', 'received_on', 'id'], name='costlayer_fifo_idx'),
+        ),
+    ]
@@ -0,0 +1,95 @@
+# Generated by Django 5.1.3 on 2026-10-17 03:59
+
+from datetime import timedelta
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import F, Sum
+from django.db.models.functions import Coalesce
+
+
+def open_ledger(apps, schema_editor):
+    """
+    Start the ledger from history: a receipt movement per product and day
+    for the purchase lines received, a sale movement per product and day
+    for the order lines sold, and an opening balance, the day before the
+    first of them, for whatever current stock they do not explain. As-of
+    queries for days before this migration then see the stock on hand
+    rather than none.
+    """
+    Stock = apps.get_model('inventory', 'Stock')
+    StockMovement = apps.get_model('inventory', 'StockMovement')
+    PurchaseItem = apps.get_model('purchases', 'PurchaseItem')
+    OrderItem = apps.get_model('sales', 'OrderItem')
+
+    receipts = (
+        PurchaseItem.objects.order_by()
+        .values('product_id', day=Coalesce('purchase__receive_date', 'purchase__order_date'))
+        .annotate(total=Sum('quantity'))
+    )
+    sales = (
+        OrderItem.objects.order_by()
+        .values('product_id', day=F('order__date'))
+        .annotate(total=Sum('quantity'))
+    )
+    movements = [
+        StockMovement(product_id=row['product_id'], kind='receipt', quantity=row['total'], day=row['day'])
+        for row in receipts if row['total']
+    ] + [
+        StockMovement(product_id=row['product_id'], kind='sale', quantity=-row['total'], day=row['day'])
+        for row in sales if row['total']
+    ]
+
+    opening = {
+        row['product_id']: row['total']
+        for row in Stock.objects.order_by().values('product_id').annotate(total=Sum('quantity'))
+    }
+    for movement in movements:
+        opening[movement.product_id] = opening.get(movement.product_id, 0) - movement.quantity
+    first_day = min((movement.day for movement in movements), default=None)
+    opening_day = first_day - timedelta(days=1) if first_day else django.utils.timezone.localdate()
+    movements += [
+        StockMovement(product_id=product_id, kind='opening', quantity=quantity, day=opening_day)
+        for product_id, quantity in opening.items()
+        if quantity
+    ]
+    StockMovement.objects.bulk_create(movements, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0011_costlayer'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockMovement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('opening', 'Opening Balance'), ('sale', 'Sale'), ('receipt', 'Purchase Receipt'), ('adjustment', 'Manual Adjustment'), ('return', 'Return')], max_length=10)),
+                ('quantity', models.IntegerField()),
+                ('day', models.DateField()),
+                ('reference', models.CharField(blank=True, max_length=64)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_movements', to='inventory.product')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['product', 'day'], name='stockmovement_product_day_idx'), models.Index(fields=['day'], name='stockmovement_day_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='StockSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('quantity', models.IntegerField()),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_snapshots', to='inventory.product')),
+            ],
+            options={
+                'unique_together': {('product', 'day')},
+            },
+        ),
+        migrations.RunPython(open_ledger, migrations.RunPython.noop),
+    ]
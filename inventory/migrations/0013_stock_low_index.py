@@ -0,0 +1,17 @@
+# Generated by Django 5.1.3 on 2026-10-17 05:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0012_stockmovement'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='stock',
+            index=models.Index(condition=models.Q(('quantity__lt', models.F('quantity_alert'))), fields=['product'], name='stock_low_idx'),
+        ),
+    ]
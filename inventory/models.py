@@ -87,6 +87,7 @@ class Product(models.Model):
     )
     description = models.TextField(blank=True)
     purchase_price = models.DecimalField(max_digits=10, decimal_places=2, default=0, help_text="The purchase/cost price of the product")
+    allow_negative_stock = models.BooleanField(default=False, help_text="Allow sales to take stock below zero")
 
     def save(self, *args, **kwargs):
         # Generate slug from name if not provided
@@ -154,6 +155,16 @@ class Stock(models.Model):
     discount = models.IntegerField(help_text="Discount rate as a percentage or fixed amount based on discount_type")
     quantity_alert = models.IntegerField(default=0)
 
+    class Meta:
+        indexes = [
+            # Only the rows below their alert level, for the low stock list
+            models.Index(
+                fields=['product'],
+                condition=models.Q(quantity__lt=models.F('quantity_alert')),
+                name='stock_low_idx',
+            ),
+        ]
+
     def __str__(self):
         return f"{self.product.name} - Stock"
 
@@ -162,4 +173,137 @@ class ProductGallery(models.Model):
     image = models.ImageField(upload_to='product-images/')
 
     def __str__(self):
-        return self.product.name
\ No newline at end of file
+        return self.product.name
+
+class CatalogChange(models.Model):
+    """
+    Append-only feed of product changes for POS delta sync.
+    The id is the change cursor; terminals ask for everything after the
+    last id they applied. product_id is a plain column so tombstones
+    outlive the product they describe.
+    """
+    class Kind(models.TextChoices):
+        UPSERT = 'upsert', 'Upsert'
+        DELETE = 'delete', 'Delete'
+
+    product_id = models.BigIntegerField()
+    kind = models.CharField(max_length=10, choices=Kind.choices, default=Kind.UPSERT)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"#{self.pk} {self.kind} product {self.product_id}"
+
+
+class CostLayer(models.Model):
+    """
+    A FIFO cost layer: units received at one unit cost. Sales consume the
+    oldest layers first; `remaining` is what is still on hand. Layers with
+    no purchase item cover stock that was never received through a
+    purchase (opening balances).
+    """
+    product = models.ForeignKey(
+        Product,
+        related_name='cost_layers',
+        on_delete=models.CASCADE
+    )
+    purchase_item = models.OneToOneField(
+        'purchases.PurchaseItem',
+        related_name='cost_layer',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True
+    )
+    received_on = models.DateField()
+    unit_cost = models.DecimalField(max_digits=10, decimal_places=2)
+    quantity = models.IntegerField()
+    remaining = models.IntegerField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['product', 'received_on', 'id'], name='costlayer_fifo_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id}: {self.remaining}/{self.quantity} @ {self.unit_cost}"
+
+
+class CostConsumption(models.Model):
+    """
+    Units of a sold order line drawn from one cost layer. A null layer
+    means the sale ran past the layers on hand and was costed at the
+    product's purchase price.
+    """
+    order_item = models.ForeignKey(
+        'sales.OrderItem',
+        related_name='cost_consumptions',
+        on_delete=models.CASCADE
+    )
+    layer = models.ForeignKey(
+        CostLayer,
+        related_name='consumptions',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True
+    )
+    quantity = models.IntegerField()
+    unit_cost = models.DecimalField(max_digits=10, decimal_places=2)
+
+    def __str__(self):
+        return f"line {self.order_item_id}: {self.quantity} @ {self.unit_cost}"
+
+
+class StockMovement(models.Model):
+    """
+    Append-only ledger of stock quantity changes. `quantity` is signed:
+    receipts and returns add, sales take away, adjustments either. `day`
+    is the business day the change belongs to, which for offline sales
+    can be earlier than the day it was recorded.
+    """
+    class Kind(models.TextChoices):
+        OPENING    = 'opening',    'Opening Balance'
+        SALE       = 'sale',       'Sale'
+        RECEIPT    = 'receipt',    'Purchase Receipt'
+        ADJUSTMENT = 'adjustment', 'Manual Adjustment'
+        RETURN     = 'return',     'Return'
+
+    product = models.ForeignKey(
+        Product,
+        related_name='stock_movements',
+        on_delete=models.CASCADE
+    )
+    kind = models.CharField(max_length=10, choices=Kind.choices)
+    quantity = models.IntegerField()
+    day = models.DateField()
+    reference = models.CharField(max_length=64, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['product', 'day'], name='stockmovement_product_day_idx'),
+            models.Index(fields=['day'], name='stockmovement_day_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.kind} {self.quantity:+d} product {self.product_id}"
+
+
+class StockSnapshot(models.Model):
+    """
+    Closing quantity of a product at the end of `day`. Written only for
+    products that moved since their previous snapshot, so the latest
+    snapshot on or before a day plus the ledger after it gives the
+    quantity on that day.
+    """
+    product = models.ForeignKey(
+        Product,
+        related_name='stock_snapshots',
+        on_delete=models.CASCADE
+    )
+    day = models.DateField()
+    quantity = models.IntegerField()
+
+    class Meta:
+        unique_together = ('product', 'day')
+
+    def __str__(self):
+        return f"{self.day} product {self.product_id}: {self.quantity}"
@@ -0,0 +1,303 @@
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery
+
+from inventory.models import CatalogChange, Category, Product, ProductGallery, Stock
+
+
+class CatalogManager:
+    """
+    Compact, keyset-paginated product catalog for the POS screen.
+
+    Each page costs three queries bounded by the page size (products, their
+    stock rows, their first images), so the cost of opening the till no
+    longer depends on how many SKUs the store carries.
+
+    Built pages are cached as snapshots keyed by the catalog version. Any
+    write to products, stock rows, images or categories bumps the version
+    (see inventory.signals), so an unchanged catalog is served without
+    touching the database. Stock movements (sales, receipts, returns,
+    adjustments) only append to the change feed: a snapshot keeps the stock
+    figures it was built with, and terminals catch up by replaying the feed
+    from the page's `change_id`, so a sale does not invalidate every page.
+    """
+    DEFAULT_PAGE_SIZE = 48
+    MAX_PAGE_SIZE = 200
+    MAX_CHANGES = 500
+    VERSION_KEY = 'catalog:version'
+    SNAPSHOT_TTL = 60 * 60 * 24
+
+    @classmethod
+    def version(cls):
+        """
+        Current catalog version. Seeded from the clock so a version lost to
+        cache eviction or restart is never handed out again.
+        """
+        version = cache.get(cls.VERSION_KEY)
+        if version is None:
+            cache.add(cls.VERSION_KEY, time.time_ns(), timeout=None)
+            version = cache.get(cls.VERSION_KEY)
+        return version
+
+    @classmethod
+    def bump_version(cls):
+        """
+        Invalidate every catalog snapshot once the current transaction
+        commits, so a snapshot rebuilt in between cannot capture old rows
+        under the new version.
+        """
+        transaction.on_commit(cls._incr_version)
+
+    @classmethod
+    def _incr_version(cls):
+        try:
+            cache.incr(cls.VERSION_KEY)
+        except ValueError:
+            cache.set(cls.VERSION_KEY, time.time_ns(), timeout=None)
+
+    @classmethod
+    def record_changes(cls, product_ids, kind=CatalogChange.Kind.UPSERT):
+        """
+        Append one change per product to the delta feed and invalidate the
+        snapshots. Runs in the caller's transaction, so a rolled back write
+        leaves no change behind.
+        """
+        cls.record_stock_changes(product_ids, kind)
+        cls.bump_version()
+
+    @staticmethod
+    def record_stock_changes(product_ids, kind=CatalogChange.Kind.UPSERT):
+        """
+        Append one change per product to the delta feed, keeping the
+        snapshots: for stock quantity moves, which terminals read from the
+        feed.
+        """
+        CatalogChange.objects.bulk_create(
+            [CatalogChange(product_id=product_id, kind=kind) for product_id in set(product_ids)]
+        )
+
+    @staticmethod
+    def last_change_id():
+        return CatalogChange.objects.order_by('-id').values_list('id', flat=True).first() or 0
+
+    @classmethod
+    def changes_since(cls, since, limit=None):
+        """
+        Products changed after change id `since`, collapsed to their latest
+        state: {'products': [...], 'deleted': [ids], 'last_id', 'has_more'}.
+        Apply the batch, then ask again from `last_id`.
+        'reset' is set when `since` predates the retained log; the terminal
+        must reload the catalog.
+        """
+        limit = max(1, min(int(limit or cls.MAX_CHANGES), cls.MAX_CHANGES))
+        changes = list(
+            CatalogChange.objects.filter(id__gt=since)
+                         .order_by('id')
+                         .values_list('id', 'product_id', 'kind')[:limit + 1]
+        )
+        has_more = len(changes) > limit
+        changes = changes[:limit]
+
+        if since and not (changes and changes[0][0] == since + 1):
+            # Ids are never reused: unless the next change directly follows
+            # `since`, the cursor row itself must still be in the log, or the
+            # changes in between were pruned (or the cursor is from another
+            # database).
+            if not CatalogChange.objects.filter(id=since).exists():
+                return {
+                    'reset': True, 'products': [], 'deleted': [],
+                    'last_id': cls.last_change_id(), 'has_more': False,
+                }
+
+        latest = {}
+        for change_id, product_id, kind in changes:
+            latest[product_id] = kind
+        upserts = [pid for pid, kind in latest.items() if kind == CatalogChange.Kind.UPSERT]
+
+        rows = list(
+            Product.objects.filter(id__in=upserts)
+                   .order_by('id')
+                   .values('id', 'name', 'sku', 'category_id', 'category__name')
+        )
+        found = {row['id'] for row in rows}
+        deleted = sorted(pid for pid in latest if pid not in found)
+
+        return {
+            'reset': False,
+            'products': cls.serialize(rows),
+            'deleted': deleted,
+            'last_id': changes[-1][0] if changes else since,
+            'has_more': has_more,
+        }
+
+    @staticmethod
+    def prune_changes(before):
+        """
+        Drop change rows created before `before`, keeping the newest one so
+        the cursor position of an idle catalog survives.
+        """
+        keep = CatalogChange.objects.order_by('-id').values_list('id', flat=True).first()
+        return CatalogChange.objects.filter(created_at__lt=before).exclude(id=keep).delete()[0]
+
+    @classmethod
+    def snapshot(cls, name, build, *params):
+        """
+        Return the cached result of `build()` for this catalog version.
+        """
+        key = f"catalog:{cls.version()}:{name}:" + ":".join(str(p) for p in params)
+        data = cache.get(key)
+        if data is None:
+            data = build()
+            cache.set(key, data, timeout=cls.SNAPSHOT_TTL)
+        return data
+
+    @classmethod
+    def etag(cls, name, *params):
+        """
+        Strong ETag for a snapshot; computed from the version alone, so a
+        matching If-None-Match is answered without building anything.
+        """
+        raw = f"{cls.version()}:{name}:" + ":".join(str(p) for p in params)
+        return hashlib.sha1(raw.encode()).hexdigest()
+
+    @classmethod
+    def page_size(cls, limit):
+        try:
+            limit = int(limit or cls.DEFAULT_PAGE_SIZE)
+        except (TypeError, ValueError):
+            limit = cls.DEFAULT_PAGE_SIZE
+        return max(1, min(limit, cls.MAX_PAGE_SIZE))
+
+    @classmethod
+    def cached_page(cls, category_id=None, cursor=None, limit=None):
+        limit = cls.page_size(limit)
+        return cls.snapshot(
+            'page', lambda: cls.page(category_id, cursor, limit), category_id, cursor, limit
+        )
+
+    @staticmethod
+    def image_url(name):
+        if not name:
+            return ''
+        return ProductGallery._meta.get_field('image').storage.url(name)
+
+    @classmethod
+    def page(cls, category_id=None, cursor=None, limit=None):
+        """
+        Return {'products': [...], 'next_cursor': id-or-None, 'change_id': N}.
+        `cursor` is the id of the last product on the previous page.
+        `change_id` is the head of the change feed read before the page, so
+        polling from it replays anything the page might have missed.
+        """
+        limit = cls.page_size(limit)
+        change_id = cls.last_change_id()
+
+        qs = Product.objects.order_by('id')
+        if category_id:
+            qs = qs.filter(category_id=category_id)
+        if cursor:
+            qs = qs.filter(id__gt=cursor)
+
+        rows = list(qs.values('id', 'name', 'sku', 'category_id', 'category__name')[:limit + 1])
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        products = cls.serialize(rows)
+        return {
+            'products': products,
+            'next_cursor': rows[-1]['id'] if has_more else None,
+            'change_id': change_id,
+        }
+
+    @classmethod
+    def serialize(cls, rows):
+        """
+        Turn product value rows (id, name, sku, category_id, category__name) into compact
+        catalog entries, loading stock and thumbnails for all of them at once.
+        """
+        ids = [row['id'] for row in rows]
+
+        stocks = {}
+        for stock in (
+            Stock.objects.filter(product_id__in=ids)
+                 .order_by('id')
+                 .values('product_id', 'quantity', 'price', 'tax', 'tax_type', 'discount', 'discount_type')
+        ):
+            # Products keep a single stock entry; match Product.stock()
+            stocks.setdefault(stock['product_id'], stock)
+
+        images = {}
+        for product_id, image in (
+            ProductGallery.objects.filter(product_id__in=ids)
+                          .order_by('id')
+                          .values_list('product_id', 'image')
+        ):
+            images.setdefault(product_id, image)
+
+        products = []
+        for row in rows:
+            stock = stocks.get(row['id'], {})
+            products.append({
+                'id': row['id'],
+                'name': row['name'],
+                'sku': row['sku'] or '',
+                'category': row['category__name'] or '',
+                'category_id': row['category_id'],
+                'price': str(stock['price']) if stock else '0.00',
+                'stock': stock.get('quantity', 0),
+                'tax': stock.get('tax', 0),
+                'tax_type': stock.get('tax_type', ''),
+                'discount': stock.get('discount', 0),
+                'discount_type': stock.get('discount_type', ''),
+                'thumbnail': cls.image_url(images.get(row['id'])),
+            })
+        return products
+
+    @classmethod
+    def product_options(cls):
+        """
+        Id, name, sku and category of every product, for product pickers.
+        """
+        return [
+            {
+                'id': row['id'],
+                'name': row['name'],
+                'sku': row['sku'] or '',
+                'category': row['category__name'] or '',
+            }
+            for row in Product.objects.order_by('id').values('id', 'name', 'sku', 'category__name')
+        ]
+
+    @classmethod
+    def categories(cls):
+        """
+        Categories with product counts and a thumbnail, in one query.
+        """
+        first_image = (
+            ProductGallery.objects
+                          .filter(product__category=OuterRef('pk'))
+                          .order_by('product_id', 'id')
+                          .values('image')[:1]
+        )
+        categories = list(
+            Category.objects
+                    .annotate(product_count=Count('products'), thumbnail_name=Subquery(first_image))
+                    .order_by('id')
+        )
+        for category in categories:
+            category.thumbnail = cls.image_url(category.thumbnail_name)
+        return categories
+
+    @classmethod
+    def overview(cls):
+        """
+        Total product count and a thumbnail for the 'All Categories' tile.
+        """
+        first_image = ProductGallery.objects.order_by('product_id', 'id').values_list('image', flat=True).first()
+        return {
+            'product_count': Product.objects.count(),
+            'thumbnail': cls.image_url(first_image),
+        }
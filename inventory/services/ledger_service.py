@@ -0,0 +1,141 @@
+from datetime import date, timedelta
+
+from django.db.models import IntegerField, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from inventory.models import Product, StockMovement, StockSnapshot
+
+
+class StockLedgerManager:
+    """
+    Records every stock change in the StockMovement ledger and answers
+    "quantity on hand as of day D" from the nearest closing snapshot plus
+    the movements after it, so history queries never replay the whole
+    ledger. Snapshots are written by `manage.py snapshot_stock`.
+    """
+    EPOCH = date(1900, 1, 1)
+
+    @staticmethod
+    def record(kind, lines, day=None, reference=''):
+        """
+        Append one movement per (product_id, signed quantity) in `lines`.
+        A movement dated before today makes that product's later
+        snapshots stale, so they are dropped and rewritten by the next
+        snapshot run.
+        """
+        today = timezone.localdate()
+        day = day or today
+        movements = [
+            StockMovement(product_id=product_id, kind=kind, quantity=quantity, day=day, reference=reference[:64])
+            for product_id, quantity in lines
+            if quantity
+        ]
+        if not movements:
+            return
+        StockMovement.objects.bulk_create(movements)
+        if day < today:
+            StockSnapshot.objects.filter(
+                product_id__in=[movement.product_id for movement in movements],
+                day__gte=day,
+            ).delete()
+
+    @classmethod
+    def with_balance(cls, products, day, name='on_hand'):
+        """
+        Annotate a Product queryset with `name`, the quantity at the end of
+        `day`, and `<name>_since`, the snapshot day it was replayed from.
+        Each product costs one indexed snapshot lookup and a ledger sum
+        bounded by that snapshot.
+        """
+        since = f'{name}_since'
+        replayed = f'{name}_replayed'
+        snapshots = StockSnapshot.objects.filter(product=OuterRef('pk'), day__lte=day).order_by('-day')
+        movements = (
+            StockMovement.objects.filter(product=OuterRef('pk'), day__gt=OuterRef(since), day__lte=day)
+                                 .order_by()
+                                 .values('product')
+                                 .annotate(total=Sum('quantity'))
+                                 .values('total')
+        )
+        return (
+            products.annotate(**{
+                since: Coalesce(Subquery(snapshots.values('day')[:1]), Value(cls.EPOCH)),
+            })
+            .annotate(**{
+                replayed: Subquery(movements, output_field=IntegerField()),
+            })
+            .annotate(**{
+                name: Coalesce(Subquery(snapshots.values('quantity')[:1]), Value(0))
+                      + Coalesce(replayed, Value(0)),
+            })
+        )
+
+    @classmethod
+    def as_of(cls, day, product_ids=None):
+        """
+        {product_id: quantity on hand at the end of `day`}.
+        """
+        products = Product.objects.all()
+        if product_ids is not None:
+            products = products.filter(pk__in=product_ids)
+        return dict(cls.with_balance(products, day).values_list('pk', 'on_hand'))
+
+    @staticmethod
+    def movements(start, end, product_ids=None):
+        """
+        {product_id: {'received', 'sold', 'returned', 'adjusted'}} summed
+        over days in [start, end]; sold is positive.
+        """
+        qs = StockMovement.objects.filter(day__gte=start, day__lte=end)
+        if product_ids is not None:
+            qs = qs.filter(product_id__in=product_ids)
+        Kind = StockMovement.Kind
+
+        def total(*kinds):
+            return Coalesce(Sum('quantity', filter=Q(kind__in=kinds)), Value(0))
+
+        rows = (
+            qs.order_by()
+              .values('product_id')
+              .annotate(
+                  received=total(Kind.RECEIPT),
+                  sold=-total(Kind.SALE),
+                  returned=total(Kind.RETURN),
+                  adjusted=total(Kind.ADJUSTMENT, Kind.OPENING),
+              )
+        )
+        return {row.pop('product_id'): row for row in rows}
+
+    @classmethod
+    def snapshot(cls, day):
+        """
+        Write closing snapshots at `day` for every product with movements
+        since its latest snapshot. `day` must be over (before today).
+        Returns the number of snapshots written.
+        """
+        if day >= timezone.localdate():
+            raise ValueError("Only days that are over can be snapshotted.")
+        pending = (
+            cls.with_balance(Product.objects.all(), day)
+               .filter(on_hand_replayed__isnull=False)
+               .values_list('pk', 'on_hand')
+        )
+        snapshots = [
+            StockSnapshot(product_id=product_id, day=day, quantity=quantity)
+            for product_id, quantity in pending
+        ]
+        StockSnapshot.objects.bulk_create(snapshots, batch_size=500)
+        return len(snapshots)
+
+    @classmethod
+    def snapshot_range(cls, start, end):
+        """
+        Snapshot each day in [start, end]. Returns the number written.
+        """
+        written = 0
+        day = start
+        while day <= end:
+            written += cls.snapshot(day)
+            day += timedelta(days=1)
+        return written
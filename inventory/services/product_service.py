@@ -2,7 +2,9 @@ from inventory.models import Category,SubCategory,Unit,Variant
 from django.shortcuts import render,redirect
 from django.utils.text import slugify
 from django.contrib import messages
-from inventory.models import Product,Stock,ProductGallery
+from inventory.models import Product,Stock,ProductGallery,StockMovement
+from inventory.services.ledger_service import StockLedgerManager
+from inventory.services.stock_service import StockManager
 
 class ProductManager:
     @staticmethod
@@ -17,6 +19,7 @@ class ProductManager:
             unit_id = request.POST.get('unit', None)
             description = request.POST.get('description', '')
             purchase_price = request.POST.get('purchase_price', '0')
+            allow_negative_stock = request.POST.get('allow_negative_stock') == 'on'
 
             # Create Product - slug and sku will be auto-generated in save method
             product = Product.objects.create(
@@ -26,7 +29,8 @@ class ProductManager:
                 sub_category_id=sub_category_id,
                 units_id=unit_id,
                 description=description,
-                purchase_price=purchase_price
+                purchase_price=purchase_price,
+                allow_negative_stock=allow_negative_stock
             )
 
             # Stock fields
@@ -49,6 +53,7 @@ class ProductManager:
                 discount=discount,
                 quantity_alert=quantity_alert
             )
+            StockLedgerManager.record(StockMovement.Kind.OPENING, [(product.pk, quantity)], reference=product.sku)
 
             # Gallery images (multiple)
             for img in request.FILES.getlist('images'):
@@ -75,19 +80,22 @@ class ProductManager:
             product.units_id = request.POST.get('unit', product.units_id)
             product.description = request.POST.get('description', product.description)
             product.purchase_price = request.POST.get('purchase_price', product.purchase_price)
+            product.allow_negative_stock = request.POST.get('allow_negative_stock') == 'on'
             product.save()
 
             # Update Stock: assume single stock entry
             stock = product.stock_entries.first()
             if stock:
-                stock.quantity = int(request.POST.get('quantity', stock.quantity))
+                quantity = int(request.POST.get('quantity', stock.quantity))
                 stock.price = request.POST.get('price', stock.price)
                 stock.tax_type = request.POST.get('tax_type', stock.tax_type)
                 stock.tax = int(request.POST.get('tax', stock.tax))
                 stock.discount_type = request.POST.get('discount_type', stock.discount_type)
                 stock.discount = int(request.POST.get('discount', stock.discount))
                 stock.quantity_alert = int(request.POST.get('quantity_alert', stock.quantity_alert))
-                stock.save()
+                stock.save(update_fields=['price', 'tax_type', 'tax', 'discount_type', 'discount', 'quantity_alert'])
+                # Quantity changes go through the ledger as an adjustment
+                StockManager.adjust(stock, quantity, reference=product.sku)
 
             # Handle new gallery images if any
             for img in request.FILES.getlist('images'):
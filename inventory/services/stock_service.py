@@ -0,0 +1,155 @@
+from django.db.models import F
+
+from inventory.models import Stock, StockMovement
+from inventory.services.catalog_service import CatalogManager
+from inventory.services.ledger_service import StockLedgerManager
+
+
+class OutOfStockError(Exception):
+    """
+    Raised when one or more lines cannot be taken from stock.
+    `lines` holds one dict per failing line: product_id, product, requested, available.
+    """
+    def __init__(self, lines):
+        self.lines = lines
+        super().__init__("; ".join(
+            f"{line['product']}: requested {line['requested']}, available {line['available']}"
+            for line in lines
+        ))
+
+
+class StockManager:
+    """
+    All stock quantity changes go through conditional, in-database updates so
+    concurrent terminals cannot lose each other's decrements.
+    Queryset updates send no model signals, so every method here records
+    catalog changes and stock ledger movements itself.
+    """
+
+    @staticmethod
+    def stock_ids_for(product_ids):
+        """
+        Map product_id -> id of the stock row used for that product, in one query.
+        Products keep a single stock entry; the lowest id matches Product.stock().
+        """
+        stock_ids = {}
+        for stock_id, product_id in (
+            Stock.objects.filter(product_id__in=product_ids)
+                 .order_by('id')
+                 .values_list('id', 'product_id')
+        ):
+            stock_ids.setdefault(product_id, stock_id)
+        return stock_ids
+
+    @staticmethod
+    def decrement(stock_id, quantity, allow_negative=False):
+        """
+        Subtract `quantity` from a stock row. Unless `allow_negative` is set,
+        the update only applies while enough stock is on hand.
+        Returns True when the row was updated.
+        """
+        qs = Stock.objects.filter(pk=stock_id)
+        if not allow_negative:
+            qs = qs.filter(quantity__gte=quantity)
+        return qs.update(quantity=F('quantity') - quantity) == 1
+
+    @staticmethod
+    def increment(stock_id, quantity):
+        return Stock.objects.filter(pk=stock_id).update(quantity=F('quantity') + quantity) == 1
+
+    @classmethod
+    def take(cls, lines, products, day=None, reference=''):
+        """
+        Decrement stock for every (product_id, quantity) pair in `lines`.
+        `products` maps product_id -> Product and supplies the allow-negative policy.
+        Every line is attempted so the caller gets the complete list of
+        shortages; raise OutOfStockError if any line failed. Call inside
+        transaction.atomic so a failure undoes the lines that did succeed.
+        `day` is the sale day recorded in the ledger (default today).
+        """
+        stock_ids = cls.stock_ids_for([product_id for product_id, _ in lines])
+        failures = []
+        for product_id, quantity in lines:
+            product = products[product_id]
+            stock_id = stock_ids.get(product_id)
+            if stock_id is None:
+                if not product.allow_negative_stock:
+                    failures.append(cls._shortage(product, quantity, 0))
+                    continue
+                # Sold before any receipt: open the row below zero, as restock
+                # opens missing rows, so the row agrees with the ledger
+                stock_ids[product_id] = Stock.objects.create(
+                    product_id=product_id, quantity=-quantity, price=0, tax=0, discount=0, quantity_alert=0
+                ).pk
+                continue
+            if not cls.decrement(stock_id, quantity, product.allow_negative_stock):
+                available = Stock.objects.filter(pk=stock_id).values_list('quantity', flat=True).first() or 0
+                failures.append(cls._shortage(product, quantity, available))
+        if failures:
+            raise OutOfStockError(failures)
+        StockLedgerManager.record(
+            StockMovement.Kind.SALE,
+            [(product_id, -quantity) for product_id, quantity in lines],
+            day,
+            reference,
+        )
+        CatalogManager.record_stock_changes([product_id for product_id, _ in lines])
+
+    @staticmethod
+    def receive(product, quantity, unit_cost, day=None, reference=''):
+        """
+        Add received goods to a product's stock, creating the stock row on first receipt.
+        `quantity` is the change in what was received, so re-saving a
+        purchase line records only its correction and nothing when unchanged.
+        """
+        if not quantity:
+            return False
+        stock, created = Stock.objects.get_or_create(
+            product=product,
+            defaults={'quantity': 0, 'price': unit_cost, 'tax': 0, 'discount': 0, 'quantity_alert': 0}
+        )
+        updated = StockManager.increment(stock.pk, quantity)
+        StockLedgerManager.record(StockMovement.Kind.RECEIPT, [(product.pk, quantity)], day, reference)
+        CatalogManager.record_stock_changes([product.pk])
+        return updated
+
+    @classmethod
+    def adjust(cls, stock, quantity, reference=''):
+        """
+        Manual correction: bring a stock row to `quantity` by incrementing
+        it with the difference from `stock.quantity`, rather than writing
+        the value, so a sale committed in between is not overwritten.
+        """
+        delta = quantity - stock.quantity
+        if not delta:
+            return False
+        cls.increment(stock.pk, delta)
+        StockLedgerManager.record(StockMovement.Kind.ADJUSTMENT, [(stock.product_id, delta)], reference=reference)
+        CatalogManager.record_stock_changes([stock.product_id])
+        return True
+
+    @classmethod
+    def restock(cls, lines, day=None, reference=''):
+        """
+        Put returned goods back: increment stock for every (product_id,
+        quantity) pair in `lines` and record them as returns.
+        """
+        stock_ids = cls.stock_ids_for([product_id for product_id, _ in lines])
+        for product_id, quantity in lines:
+            stock_id = stock_ids.get(product_id)
+            if stock_id is None:
+                stock_id = Stock.objects.create(
+                    product_id=product_id, quantity=0, price=0, tax=0, discount=0, quantity_alert=0
+                ).pk
+            cls.increment(stock_id, quantity)
+        StockLedgerManager.record(StockMovement.Kind.RETURN, lines, day, reference)
+        CatalogManager.record_stock_changes([product_id for product_id, _ in lines])
+
+    @staticmethod
+    def _shortage(product, requested, available):
+        return {
+            'product_id': product.pk,
+            'product': product.name,
+            'requested': requested,
+            'available': max(available, 0),
+        }
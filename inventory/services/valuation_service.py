@@ -0,0 +1,337 @@
+import heapq
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.db.models import DecimalField, ExpressionWrapper, F, Sum, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from inventory.models import CostConsumption, CostLayer, Stock
+from purchases.models import PurchaseItem
+from sales.models import Order, OrderItem, ProductDailySales
+from sales.services.summary_service import ProductSalesManager
+
+
+ZERO = Decimal('0.00')
+CENT = Decimal('0.01')
+
+
+class ValuationManager:
+    """
+    FIFO inventory valuation. Purchase lines open cost layers; sales draw
+    from the oldest open layers at checkout and record what they drew as
+    CostConsumption rows. Each sold line's cost_price is the weighted cost
+    of its draws, so COGS and margins come from the product sales rollup
+    and stock value from the open layers, without replaying history.
+    """
+    BATCH_SIZE = 5000
+
+    @staticmethod
+    def receipt_day(item):
+        purchase = item.purchase
+        return purchase.receive_date or purchase.order_date or timezone.localdate()
+
+    @classmethod
+    def receive(cls, item):
+        """
+        Open the cost layer for a saved purchase line, or bring an existing
+        layer in line with an edited quantity or cost.
+        """
+        layer = CostLayer.objects.filter(purchase_item=item).first()
+        if layer is None:
+            CostLayer.objects.create(
+                product_id=item.product_id,
+                purchase_item=item,
+                received_on=cls.receipt_day(item),
+                unit_cost=item.unit_cost,
+                quantity=item.quantity,
+                remaining=item.quantity,
+            )
+            return
+        delta = item.quantity - layer.quantity
+        CostLayer.objects.filter(pk=layer.pk).update(
+            product_id=item.product_id,
+            unit_cost=item.unit_cost,
+            quantity=item.quantity,
+            remaining=Greatest(F('remaining') + delta, 0),
+        )
+
+    @staticmethod
+    def open_layers(product_ids):
+        return (
+            CostLayer.objects.select_for_update()
+                             .filter(product_id__in=product_ids, remaining__gt=0)
+                             .order_by('product_id', 'received_on', 'id')
+        )
+
+    @classmethod
+    def draw(cls, product_id, quantity, layers):
+        """
+        Take up to `quantity` units from `layers` (the product's open
+        layers, oldest first), updating the rows with conditional
+        decrements. Returns [(layer, units)].
+        """
+        parts = []
+        while quantity and layers:
+            layer = layers[0]
+            units = min(quantity, layer.remaining)
+            updated = CostLayer.objects.filter(pk=layer.pk, remaining__gte=units).update(
+                remaining=F('remaining') - units
+            )
+            if not updated:
+                # Another sale drew from these layers since they were read
+                layers[:] = list(cls.open_layers([product_id]))
+                continue
+            layer.remaining -= units
+            quantity -= units
+            parts.append((layer, units))
+            if not layer.remaining:
+                layers.pop(0)
+        return parts
+
+    @staticmethod
+    def line_cost(quantity, parts):
+        """
+        Weighted unit cost of a line from its [(units, unit_cost)] draws.
+        """
+        if not quantity:
+            return ZERO
+        total = sum((units * cost for units, cost in parts), ZERO)
+        return (total / quantity).quantize(CENT)
+
+    @classmethod
+    def consume(cls, items):
+        """
+        Draw the units of unsaved order lines from their products' layers
+        and set each line's cost_price. Units beyond the open layers are
+        costed at the product's purchase price. Returns the unsaved
+        CostConsumption rows; bulk_create them once the lines are saved.
+        Call inside transaction.atomic.
+        """
+        layers = defaultdict(list)
+        for layer in cls.open_layers({item.product_id for item in items}):
+            layers[layer.product_id].append(layer)
+
+        consumptions = []
+        for item in items:
+            parts = [
+                (units, layer.unit_cost, layer)
+                for layer, units in cls.draw(item.product_id, item.quantity, layers[item.product_id])
+            ]
+            short = item.quantity - sum(units for units, _, _ in parts)
+            if short:
+                parts.append((short, item.product.purchase_price, None))
+            item.cost_price = cls.line_cost(item.quantity, [(units, cost) for units, cost, _ in parts])
+            consumptions.extend(
+                CostConsumption(order_item=item, layer=layer, quantity=units, unit_cost=cost)
+                for units, cost, layer in parts
+            )
+        return consumptions
+
+    @staticmethod
+    def stock_value():
+        """
+        {product_id: {'quantity', 'value'}} of units on hand in open layers,
+        from one grouped query.
+        """
+        rows = (
+            CostLayer.objects.filter(remaining__gt=0)
+                             .order_by()
+                             .values('product_id')
+                             .annotate(
+                                 quantity=Sum('remaining'),
+                                 value=Sum(F('remaining') * F('unit_cost'), output_field=DecimalField()),
+                             )
+        )
+        return {row.pop('product_id'): row for row in rows}
+
+    @staticmethod
+    def total_stock_value():
+        return CostLayer.objects.filter(remaining__gt=0).aggregate(
+            value=Coalesce(
+                Sum(F('remaining') * F('unit_cost'), output_field=DecimalField()),
+                Value(ZERO, output_field=DecimalField()),
+            )
+        )['value']
+
+    @staticmethod
+    def cogs(start=None, end=None):
+        """
+        Cost of goods sold over days in [start, end], from the product
+        sales rollup.
+        """
+        qs = ProductDailySales.objects.all()
+        if start:
+            qs = qs.filter(day__gte=start)
+        if end:
+            qs = qs.filter(day__lte=end)
+        return qs.aggregate(
+            cost=Coalesce(Sum('cost'), Value(ZERO, output_field=DecimalField()))
+        )['cost']
+
+    @staticmethod
+    def margins(start=None, end=None):
+        """
+        Per-product totals from ProductSalesManager.by_product plus
+        `margin`: sales net of tax less FIFO cost.
+        """
+        return ProductSalesManager.by_product(start, end).annotate(
+            margin=ExpressionWrapper(
+                F('sold_amount') - F('sold_tax') - F('sold_cost'),
+                output_field=DecimalField(),
+            )
+        )
+
+    @classmethod
+    def rebuild(cls):
+        """
+        Recreate every layer and consumption by replaying purchase lines and
+        completed sales in date order, reprice the sold lines and refresh
+        the product sales rollup. Stock on hand that the replay cannot
+        explain gets an opening layer at the product's purchase price.
+        Returns a dict of counts.
+        """
+        with transaction.atomic():
+            CostConsumption.objects.all().delete()
+            CostLayer.objects.all().delete()
+
+            layers = cls._rebuild_layers()
+            consumptions, repriced, remaining = cls._replay()
+            opening = cls._open_unexplained_stock(remaining)
+            ProductSalesManager.rebuild()
+
+        return {'layers': layers, 'opening': opening, 'consumptions': consumptions, 'repriced': repriced}
+
+    @classmethod
+    def _rebuild_layers(cls):
+        rows = (
+            PurchaseItem.objects.order_by('id')
+                                .values_list('id', 'product_id', 'purchase__receive_date',
+                                             'purchase__order_date', 'unit_cost', 'quantity')
+        )
+        batch, count = [], 0
+        for item_id, product_id, received, ordered, unit_cost, quantity in rows.iterator(chunk_size=cls.BATCH_SIZE):
+            batch.append(CostLayer(
+                product_id=product_id,
+                purchase_item_id=item_id,
+                received_on=received or ordered,
+                unit_cost=unit_cost,
+                quantity=quantity,
+                remaining=quantity,
+            ))
+            if len(batch) == cls.BATCH_SIZE:
+                CostLayer.objects.bulk_create(batch)
+                count += len(batch)
+                batch = []
+        CostLayer.objects.bulk_create(batch)
+        return count + len(batch)
+
+    @classmethod
+    def _replay(cls):
+        """
+        Stream layers and sales per product in date order, receipts before
+        sales on the same day. Returns (consumptions, repriced lines,
+        {product_id: units left in layers}).
+        """
+        receipts = (
+            (product_id, day, 0, layer_id, unit_cost, quantity, None)
+            for layer_id, product_id, day, unit_cost, quantity in
+            CostLayer.objects.order_by('product_id', 'received_on', 'id')
+                             .values_list('id', 'product_id', 'received_on', 'unit_cost', 'quantity')
+                             .iterator(chunk_size=cls.BATCH_SIZE)
+        )
+        sales = (
+            (product_id, day, 1, item_id, fallback, quantity, cost_price)
+            for item_id, product_id, day, quantity, fallback, cost_price in
+            OrderItem.objects.filter(order__status=Order.Status.COMPLETED)
+                             .order_by('product_id', 'order__date', 'id')
+                             .values_list('id', 'product_id', 'order__date', 'quantity',
+                                          'product__purchase_price', 'cost_price')
+                             .iterator(chunk_size=cls.BATCH_SIZE)
+        )
+
+        consumptions, repriced, drawn = [], [], {}
+        counts = {'consumptions': 0, 'repriced': 0}
+        remaining = defaultdict(int)
+        open_layers, current = [], None
+
+        def flush(final=False):
+            if final or len(consumptions) >= cls.BATCH_SIZE:
+                CostConsumption.objects.bulk_create(consumptions)
+                counts['consumptions'] += len(consumptions)
+                consumptions.clear()
+            if final or len(repriced) >= cls.BATCH_SIZE:
+                cls._update_column(OrderItem, 'cost_price', repriced)
+                counts['repriced'] += len(repriced)
+                repriced.clear()
+
+        for product_id, _, kind, row_id, cost, quantity, cost_price in heapq.merge(
+            receipts, sales, key=lambda event: event[:4]
+        ):
+            if product_id != current:
+                current, open_layers = product_id, []
+            if kind == 0:
+                open_layers.append([row_id, cost, quantity])
+                remaining[product_id] += quantity
+                continue
+
+            parts, needed = [], quantity
+            while needed and open_layers:
+                layer = open_layers[0]
+                units = min(needed, layer[2])
+                layer[2] -= units
+                needed -= units
+                parts.append((units, layer[1], layer[0]))
+                drawn[layer[0]] = layer[2]
+                if not layer[2]:
+                    open_layers.pop(0)
+            remaining[product_id] -= quantity - needed
+            if needed:
+                parts.append((needed, cost, None))
+
+            consumptions.extend(
+                CostConsumption(order_item_id=row_id, layer_id=layer_id, quantity=units, unit_cost=unit_cost)
+                for units, unit_cost, layer_id in parts
+            )
+            line_cost = cls.line_cost(quantity, [(units, unit_cost) for units, unit_cost, _ in parts])
+            if line_cost != cost_price:
+                repriced.append((line_cost, row_id))
+            flush()
+        flush(final=True)
+
+        cls._update_column(CostLayer, 'remaining', [(left, layer_id) for layer_id, left in drawn.items()])
+        return counts['consumptions'], counts['repriced'], remaining
+
+    @staticmethod
+    def _update_column(model, column, pairs):
+        """
+        Set one column on many rows from (value, pk) pairs with a single
+        prepared statement; bulk_update's CASE expressions are far slower
+        at rebuild sizes.
+        """
+        table = connection.ops.quote_name(model._meta.db_table)
+        column = connection.ops.quote_name(model._meta.get_field(column).column)
+        with connection.cursor() as cursor:
+            cursor.executemany(f'UPDATE {table} SET {column} = %s WHERE id = %s', list(pairs))
+
+    @classmethod
+    def _open_unexplained_stock(cls, remaining):
+        today = timezone.localdate()
+        opening = [
+            CostLayer(
+                product_id=product_id,
+                received_on=today,
+                unit_cost=purchase_price or ZERO,
+                quantity=quantity - remaining.get(product_id, 0),
+                remaining=quantity - remaining.get(product_id, 0),
+            )
+            for product_id, quantity, purchase_price in
+            Stock.objects.order_by()
+                         .values('product_id', 'product__purchase_price')
+                         .annotate(total=Sum('quantity'))
+                         .values_list('product_id', 'total', 'product__purchase_price')
+            if quantity > remaining.get(product_id, 0)
+        ]
+        CostLayer.objects.bulk_create(opening, batch_size=cls.BATCH_SIZE)
+        return len(opening)
@@ -0,0 +1,31 @@
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from inventory.models import CatalogChange, Category, Product, ProductGallery, Stock
+from inventory.services.catalog_service import CatalogManager
+
+
+@receiver(post_save, sender=Product)
+def product_saved(sender, instance, **kwargs):
+    CatalogManager.record_changes([instance.pk])
+
+
+@receiver(post_delete, sender=Product)
+def product_deleted(sender, instance, **kwargs):
+    CatalogManager.record_changes([instance.pk], CatalogChange.Kind.DELETE)
+
+
+@receiver(post_save, sender=Stock)
+@receiver(post_delete, sender=Stock)
+@receiver(post_save, sender=ProductGallery)
+@receiver(post_delete, sender=ProductGallery)
+def product_detail_changed(sender, instance, **kwargs):
+    CatalogManager.record_changes([instance.product_id])
+
+
+# Before a delete, while the products still point at the category (they
+# are set to null by then); the upserts read the products at poll time
+@receiver(post_save, sender=Category)
+@receiver(pre_delete, sender=Category)
+def category_changed(sender, instance, **kwargs):
+    CatalogManager.record_changes(instance.products.values_list('id', flat=True))
@@ -1,11 +1,7 @@
 # inventory/utils.py
-import io
-from django.http import FileResponse
-from openpyxl import Workbook
-# Temporarily disabled due to PIL issues
-# from reportlab.lib.pagesizes import A4
-# from reportlab.pdfgen import canvas
-from django.db.models import Q, F
+from django.db.models import Count, F, OuterRef, Q, Subquery
+
+from reports.services.export_service import Column, ExportManager, active, iso_date, text
 
 from .models import *
 
@@ -20,77 +16,45 @@ def get_products_queryset(search: str = None, low_stock: bool = False):
         )
     return qs.distinct()
 
+PRODUCT_EXPORT_COLUMNS = [
+    Column('Name', 'name'),
+    Column('SKU', 'sku'),
+    Column('Category', 'category__name', text),
+    Column('Stock Qty', 'stock_qty', lambda value: value or 0),
+    Column('Price', 'stock_price', lambda value: value or 0),
+]
+
+def with_stock_columns(qs):
+    """
+    Annotate the product's stock row (lowest id, as Product.stock()) so
+    exports read quantity and price without a query per product.
+    """
+    stock = Stock.objects.filter(product=OuterRef('pk')).order_by('id')
+    return qs.annotate(
+        stock_qty=Subquery(stock.values('quantity')[:1]),
+        stock_price=Subquery(stock.values('price')[:1]),
+    )
+
+def products_export_source(params):
+    """
+    Export source for background jobs; `params` are get_products_queryset
+    keyword arguments.
+    """
+    qs = get_products_queryset(**params).order_by('name')
+    return with_stock_columns(qs), PRODUCT_EXPORT_COLUMNS
+
 def export_to_excel(qs, basename='products'):
     """
-    Given a product queryset and a basename, returns a FileResponse
-    for an in-memory .xlsx named e.g. 'products.xlsx' or 'low-stocks.xlsx'
+    Given a product queryset and a basename, streams an .xlsx named
+    e.g. 'products.xlsx' or 'low-stocks.xlsx'
     """
-    wb = Workbook()
-    ws = wb.active
-    ws.append(['Name', 'SKU', 'Category', 'Stock Qty', 'Price'])
-    for p in qs:
-        stock = p.stock_entries.first()
-        ws.append([
-            p.name,
-            p.sku,
-            p.category.name if p.category else '',
-            stock.quantity if stock else 0,
-            float(stock.price) if stock else 0.0,
-        ])
-
-    buffer = io.BytesIO()
-    wb.save(buffer)
-    buffer.seek(0)
-    filename = f"{basename}.xlsx"
-    return FileResponse(buffer, as_attachment=True, filename=filename)
-
-# Temporarily disabled due to PIL issues
-# def export_to_pdf(qs, basename='products'):
-#     """
-#     Given a product queryset and a basename, returns a FileResponse
-#     for an in-memory PDF named e.g. 'products.pdf' or 'low-stocks.pdf'
-#     """
-#     buffer = io.BytesIO()
-##     p = canvas.Canvas(buffer, pagesize=A4)
-#     width, height = A4
-#     y = height - 50
-#
-#     # Header
-#     p.setFont("Helvetica-Bold", 12)
-#     p.drawString(40, y, f"{basename.replace('-', ' ').title()} Report")
-#     p.setFont("Helvetica", 10)
-#     y -= 30
-#
-#     # Column titles
-#     p.drawString(40, y, "Name")
-#     p.drawString(200, y, "SKU")
-#     p.drawString(300, y, "Qty")
-#     p.drawString(350, y, "Price")
-#     y -= 20
-#
-#     # Rows
-#     for prod in qs:
-#         stock = prod.stock_entries.first()
-#         qty = stock.quantity if stock else 0
-#         price = float(stock.price) if stock else 0
-#         p.drawString(40, y, prod.name[:30])
-#         p.drawString(200, y, prod.sku)
-#         p.drawString(300, y, str(qty))
-#         p.drawString(350, y, f"{price:.2f}")
-#         y -= 20
-#         if y < 50:
-#             p.showPage()
-#             y = height - 50
-#
-#     p.save()
-#     buffer.seek(0)
-#     filename = f"{basename}.pdf"
-#     return FileResponse(buffer, as_attachment=True, filename=filename)
+    return ExportManager.excel(with_stock_columns(qs), PRODUCT_EXPORT_COLUMNS, basename)
+
+def export_to_csv(qs, basename='products'):
+    return ExportManager.csv(with_stock_columns(qs), PRODUCT_EXPORT_COLUMNS, basename)
 
 def export_to_pdf(qs, basename='products'):
-    """Temporarily disabled - PDF export unavailable"""
-    from django.http import HttpResponse
-    return HttpResponse("PDF export temporarily disabled", status=503)
+    return ExportManager.pdf(with_stock_columns(qs), PRODUCT_EXPORT_COLUMNS, basename)
 
 
 def get_categories_queryset(search: str = None):
@@ -112,80 +76,43 @@ def get_subcategories_queryset(search: str = None):
         )
     return qs.distinct()
 
+CATEGORY_EXPORT_COLUMNS = [
+    Column('Name', 'name'),
+    Column('Slug', 'slug'),
+    Column('Status', 'status', active),
+    Column('Date Created', 'date_created', iso_date),
+    Column('Sub-Count', 'sub_count'),
+]
+
+SUBCATEGORY_EXPORT_COLUMNS = [
+    Column('Name', 'name'),
+    Column('Slug', 'slug'),
+    Column('Category', 'category__name', text),
+    Column('Status', 'status', active),
+]
+
+def with_sub_count(qs):
+    return qs.annotate(sub_count=Count('sub_categories', distinct=True))
+
 # —————————————
 # Excel exporters
 # —————————————
 
 def export_categories_excel(qs, basename='categories'):
-    wb = Workbook()
-    ws = wb.active
-    ws.append(['Name', 'Slug', 'Status', 'Date Created', 'Sub-Count'])
-    for cat in qs:
-        ws.append([
-            cat.name,
-            cat.slug,
-            'Active' if cat.status else 'Inactive',
-            cat.date_created.strftime('%Y-%m-%d'),
-            cat.sub_categories.count(),
-        ])
-    buf = io.BytesIO()
-    wb.save(buf)
-    buf.seek(0)
-    return FileResponse(buf, as_attachment=True, filename=f'{basename}.xlsx')
+    return ExportManager.excel(with_sub_count(qs), CATEGORY_EXPORT_COLUMNS, basename)
 
 def export_subcategories_excel(qs, basename='sub-categories'):
-    wb = Workbook()
-    ws = wb.active
-    ws.append(['Name', 'Slug', 'Category', 'Status'])
-    for sub in qs:
-        ws.append([
-            sub.name,
-            sub.slug,
-            sub.category.name,
-            'Active' if sub.status else 'Inactive',
-        ])
-    buf = io.BytesIO()
-    wb.save(buf)
-    buf.seek(0)
-    return FileResponse(buf, as_attachment=True, filename=f'{basename}.xlsx')
+    return ExportManager.excel(qs, SUBCATEGORY_EXPORT_COLUMNS, basename)
 
 # —————————————
 # PDF exporters
 # —————————————
 
 def export_categories_pdf(qs, basename="export"):
-    """Temporarily disabled - PDF export unavailable"""
-    from django.http import HttpResponse
-    return HttpResponse("PDF export temporarily disabled", status=503)
-
-    for cat in qs:
-        c.drawString(40, y, cat.name[:25])
-        c.drawString(200, y, cat.slug[:15])
-        c.drawString(320, y, 'Active' if cat.status else 'Inactive')
-        c.drawString(420, y, str(cat.sub_categories.count()))
-        y -= 20
-        if y < 50:
-            c.showPage(); y = h - 50
-
-    c.save(); buf.seek(0)
-    return FileResponse(buf, as_attachment=True, filename=f'{basename}.pdf')
+    return ExportManager.pdf(with_sub_count(qs), CATEGORY_EXPORT_COLUMNS, basename)
 
 def export_subcategories_pdf(qs, basename="export"):
-    """Temporarily disabled - PDF export unavailable"""
-    from django.http import HttpResponse
-    return HttpResponse("PDF export temporarily disabled", status=503)
-
-    for sub in qs:
-        c.drawString(40, y, sub.name[:25])
-        c.drawString(200, y, sub.slug[:15])
-        c.drawString(320, y, sub.category.name[:15])
-        c.drawString(440, y, 'Active' if sub.status else 'Inactive')
-        y -= 20
-        if y < 50:
-            c.showPage(); y = h - 50
-
-    c.save(); buf.seek(0)
-    return FileResponse(buf, as_attachment=True, filename=f'{basename}.pdf')
+    return ExportManager.pdf(qs, SUBCATEGORY_EXPORT_COLUMNS, basename)
 
 
 def get_units_queryset(search: str = None):
@@ -206,75 +133,36 @@ def get_variants_queryset(search: str = None):
         )
     return qs
 
+UNIT_EXPORT_COLUMNS = [
+    Column('Name', 'name'),
+    Column('Short Name', 'short_name'),
+    Column('Status', 'status', active),
+    Column('Date Created', 'date_created', iso_date),
+]
+
+VARIANT_EXPORT_COLUMNS = [
+    Column('Name', 'name'),
+    Column('Values', 'values'),
+    Column('Status', 'status', active),
+    Column('Date Created', 'date_created', iso_date),
+]
+
 # —————————————
 # Excel exporters
 # —————————————
 
 def export_units_excel(qs, basename='units'):
-    wb = Workbook()
-    ws = wb.active
-    ws.append(['Name', 'Short Name', 'Status', 'Date Created'])
-    for unit in qs:
-        ws.append([
-            unit.name,
-            unit.short_name,
-            'Active' if unit.status else 'Inactive',
-            unit.date_created.strftime('%Y-%m-%d'),
-        ])
-    buf = io.BytesIO()
-    wb.save(buf)
-    buf.seek(0)
-    return FileResponse(buf, as_attachment=True, filename=f'{basename}.xlsx')
+    return ExportManager.excel(qs, UNIT_EXPORT_COLUMNS, basename)
 
 def export_variants_excel(qs, basename='variants'):
-    wb = Workbook()
-    ws = wb.active
-    ws.append(['Name', 'Values', 'Status', 'Date Created'])
-    for var in qs:
-        ws.append([
-            var.name,
-            var.values,
-            'Active' if var.status else 'Inactive',
-            var.date_created.strftime('%Y-%m-%d'),
-        ])
-    buf = io.BytesIO()
-    wb.save(buf)
-    buf.seek(0)
-    return FileResponse(buf, as_attachment=True, filename=f'{basename}.xlsx')
+    return ExportManager.excel(qs, VARIANT_EXPORT_COLUMNS, basename)
 
 # —————————————
 # PDF exporters
 # —————————————
 
 def export_units_pdf(qs, basename="export"):
-    """Temporarily disabled - PDF export unavailable"""
-    from django.http import HttpResponse
-    return HttpResponse("PDF export temporarily disabled", status=503)
-
-    for unit in qs:
-        c.drawString(40, y, unit.name[:25])
-        c.drawString(220, y, unit.short_name[:10])
-        c.drawString(340, y, 'Active' if unit.status else 'Inactive')
-        c.drawString(440, y, unit.date_created.strftime('%Y-%m-%d'))
-        y -= 20
-        if y < 50:
-            c.showPage(); y = h - 50
-
-    c.save(); buf.seek(0)
-    return FileResponse(buf, as_attachment=True, filename=f'{basename}.pdf')
+    return ExportManager.pdf(qs, UNIT_EXPORT_COLUMNS, basename)
 
 def export_variants_pdf(qs, basename="export"):
-    """Temporarily disabled - PDF export unavailable"""
-    from django.http import HttpResponse
-    return HttpResponse("PDF export temporarily disabled", status=503)
-
-    for var in qs:
-        c.drawString(40, y, var.name[:25])
-        c.drawString(220, y, var.values[:25])
-        c.drawString(440, y, 'Active' if var.status else 'Inactive')
-        y -= 20
-        if y < 50:
-            c.showPage(); y = h - 50
-
-    c.save(); buf.seek(0)
-    return FileResponse(buf, as_attachment=True, filename=f'{basename}.pdf')
\ No newline at end of file
+    return ExportManager.pdf(qs, VARIANT_EXPORT_COLUMNS, basename)
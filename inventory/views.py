@@ -5,6 +5,7 @@ from django.db.models import F,Prefetch
 from .services.category_service import *
 from .services.product_service import ProductManager
 from .utils import *
+from reports.services.job_service import ExportJobManager
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.text import slugify
@@ -25,11 +26,9 @@ def product_list(request):
     #    low_stock=False so we get *all* products
     qs = get_products_queryset(search=search, low_stock=False)
 
-    # 3) if export requested, short-circuit to download
-    if export == 'excel':
-        return export_to_excel(qs)
-    elif export == 'pdf':
-        return export_to_pdf(qs)
+    # 3) if export requested, hand it to the export worker
+    if export in ('excel', 'csv', 'pdf'):
+        return ExportJobManager.respond(request, 'products', export, {'search': search}, 'products')
 
     # 4) no export: paginate & render
     paginator = Paginator(qs.order_by('name'), 200)
@@ -193,10 +192,10 @@ def low_stocks(request):
     # get only low-stock items
     qs = get_products_queryset(search=search, low_stock=True)
 
-    if export == 'excel':
-        return export_to_excel(qs,basename='low_stocks')
-    elif export == 'pdf':
-        return export_to_pdf(qs,basename='low-stocks')
+    if export in ('excel', 'csv', 'pdf'):
+        return ExportJobManager.respond(
+            request, 'products', export, {'search': search, 'low_stock': True}, 'low_stocks'
+        )
 
     paginator = Paginator(qs.order_by('name'), 20)
     page_number = request.GET.get('page', 1)
@@ -0,0 +1,413 @@
+import hashlib
+import json
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import DecimalField, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from finance.models import Expense
+from inventory.models import Product, ProductGallery, Stock
+from people.models import Customer, Supplier
+from purchases.models import Purchase
+from reports.services.aggregation import AggregationManager
+from sales.models import Invoice, Order, OrderItem
+from sales.services.cost_service import CostManager
+from sales.services.summary_service import ProductSalesManager, SalesSummaryManager
+
+
+ZERO = Decimal('0.00')
+
+
+def _total(queryset, field):
+    return queryset.aggregate(
+        total=Coalesce(Sum(field, output_field=DecimalField()), Value(ZERO, output_field=DecimalField()))
+    )['total']
+
+
+def _change(current, previous):
+    """Percentage change formatted to 2 decimal places."""
+    change = ((current - previous) / previous * 100) if previous else 0
+    return f"{change:.2f}"
+
+
+def _first_image(outer='pk'):
+    images = ProductGallery.objects.filter(product=OuterRef(outer)).order_by('id')
+    return Subquery(images.values('image')[:1])
+
+
+class DashboardWidget:
+    """
+    One card (or group of cards) of the homepage dashboard, rendered to an
+    HTML fragment by `template` from `context()`.
+
+    Widgets are cached independently by DashboardManager: `ttl` bounds how
+    long a fragment is served, and any write to a `depends_on` model
+    invalidates it (see landing.signals). Only `filtered` widgets follow
+    the homepage date range; the others render the same for every range.
+    """
+    name = None
+    template = None
+    ttl = 300
+    depends_on = ()
+    filtered = False
+
+    def __init__(self, start=None, end=None):
+        if self.filtered and start and end:
+            self.start, self.end = start, end
+        else:
+            self.start = self.end = None
+
+    def params(self):
+        if not self.filtered:
+            return {}
+        # Comparisons default to the 30 days before today
+        return {
+            'start': self.start.isoformat() if self.start else None,
+            'end': self.end.isoformat() if self.end else None,
+            'today': timezone.localdate().isoformat(),
+        }
+
+    def context(self):
+        raise NotImplementedError
+
+    def render(self):
+        return render_to_string(self.template, self.context())
+
+
+class SalesKpisWidget(DashboardWidget):
+    """
+    Sales, purchases, expenses, cash at hand, product profit and invoice
+    due for the selected range, each against the range before it (the
+    previous 30 days when no range is selected).
+    """
+    name = 'kpis'
+    template = 'landing/widgets/kpis.html'
+    ttl = 300
+    depends_on = (
+        'sales.Order', 'sales.OrderItem', 'sales.Invoice', 'sales.Payment', 'purchases.Purchase', 'finance.Expense',
+    )
+    filtered = True
+
+    def _in_range(self, queryset, field, start, end):
+        if start and end:
+            return queryset.filter(**{f'{field}__gte': start, f'{field}__lte': end})
+        return queryset
+
+    def context(self):
+        start, end = self.start, self.end
+        today = timezone.localdate()
+        last_30 = today - timedelta(days=30)
+        prev_30 = last_30 - timedelta(days=30)
+
+        received = Purchase.objects.filter(status=Purchase.Status.RECEIVED)
+        completed_lines = OrderItem.objects.filter(order__status=Order.Status.COMPLETED)
+
+        total_sales = SalesSummaryManager.totals(start, end, status=Order.Status.COMPLETED)['gross_sales']
+        sales_last_30 = SalesSummaryManager.totals(last_30, None, status=Order.Status.COMPLETED)['gross_sales']
+        sales_prev_30 = SalesSummaryManager.totals(prev_30, last_30, status=Order.Status.COMPLETED)['gross_sales']
+
+        purchases_current = _total(self._in_range(received, 'order_date', start, end), 'grand_total')
+        expenses_current = _total(self._in_range(Expense.objects.all(), 'date', start, end), 'amount')
+        invoice_due_current = _total(self._in_range(Invoice.objects.all(), 'due_date', start, end), 'amount_due')
+        product_profit = CostManager.gross_profit(self._in_range(completed_lines, 'order__date', start, end))
+
+        # The same number of days just before the range, or the previous 30 days
+        if start and end:
+            comparison_end = start - timedelta(days=1)
+            comparison_start = comparison_end - (end - start)
+            sales_prev = SalesSummaryManager.totals(
+                comparison_start, comparison_end, status=Order.Status.COMPLETED
+            )['gross_sales']
+            profit_lines = completed_lines.filter(
+                order__date__gte=comparison_start, order__date__lte=comparison_end,
+            )
+        else:
+            comparison_start, comparison_end = prev_30, last_30
+            sales_prev = sales_prev_30
+            profit_lines = completed_lines.filter(order__date__gte=prev_30, order__date__lt=last_30)
+
+        purchases_prev = _total(
+            self._in_range(received, 'order_date', comparison_start, comparison_end), 'grand_total'
+        )
+        expenses_prev = _total(
+            self._in_range(Expense.objects.all(), 'date', comparison_start, comparison_end), 'amount'
+        )
+        invoice_due_prev = _total(
+            self._in_range(Invoice.objects.all(), 'due_date', comparison_start, comparison_end), 'amount_due'
+        )
+        product_profit_prev = CostManager.gross_profit(profit_lines)
+
+        # Cash at hand = sales - purchases - expenses - invoice due
+        cash_at_hand = total_sales - purchases_current - expenses_current - invoice_due_current
+        cash_at_hand_prev = sales_prev - purchases_prev - expenses_prev - invoice_due_prev
+
+        return {
+            'total_sales': total_sales,
+            'sales_change': _change(sales_last_30, sales_prev_30),
+            'total_purchases': purchases_current,
+            'cash_at_hand': cash_at_hand,
+            'cash_at_hand_change': _change(cash_at_hand, cash_at_hand_prev),
+            'product_profit': product_profit,
+            'product_profit_change': _change(product_profit, product_profit_prev),
+            'invoice_due_last_30': invoice_due_current,
+            'invoice_due_change': _change(invoice_due_current, invoice_due_prev),
+            'total_expenses': expenses_current,
+            'expenses_change': _change(expenses_current, expenses_prev),
+        }
+
+
+class SalesChartWidget(DashboardWidget):
+    """
+    Sales and purchases per day, week or month over the selected range
+    (the last 30 days when no range is selected).
+    """
+    name = 'chart'
+    template = 'landing/widgets/chart.html'
+    ttl = 300
+    depends_on = ('sales.Order', 'sales.OrderItem', 'purchases.Purchase')
+    filtered = True
+
+    def chart_data(self):
+        end_date = self.end or timezone.localdate()
+        start_date = self.start or end_date - timedelta(days=29)
+        days_diff = (end_date - start_date).days + 1
+
+        # Daily points up to two months, then weekly, then monthly, so the chart
+        # stays readable and each series is one grouped query
+        if days_diff <= 62:
+            bucket = 'day'
+        elif days_diff <= 366:
+            bucket = 'week'
+        else:
+            bucket = 'month'
+
+        # Sales come from the daily rollup, purchases from Purchase
+        sales_series = AggregationManager.time_series(
+            SalesSummaryManager.rows(status=Order.Status.COMPLETED),
+            'day', 'gross_sales', bucket, start_date, end_date
+        )
+        purchase_series = AggregationManager.time_series(
+            Purchase.objects.filter(status=Purchase.Status.RECEIVED),
+            'order_date', 'grand_total', bucket, start_date, end_date
+        )
+
+        labels = []
+        timestamps = []
+        for period, _ in sales_series:
+            timestamps.append(period.strftime('%Y-%m-%d'))
+            if bucket == 'month':
+                labels.append(period.strftime('%b %Y'))
+            elif days_diff <= 7 or days_diff > 31:
+                # Show month/day for a week or less, and for longer periods
+                labels.append(period.strftime('%m/%d'))
+            else:
+                # Show day for month or less
+                labels.append(period.strftime('%d'))
+
+        return {
+            'labels': labels,
+            'sales_data': [float(total) for _, total in sales_series],
+            'purchase_data': [float(total) for _, total in purchase_series],
+            'timestamps': timestamps,
+        }
+
+    def context(self):
+        return {
+            'purchases': Purchase.objects.count(),
+            'orders': Order.objects.count(),
+            'chart_data': self.chart_data(),
+        }
+
+
+class CountsWidget(DashboardWidget):
+    name = 'counts'
+    template = 'landing/widgets/counts.html'
+    ttl = 3600
+    depends_on = ('people.Supplier', 'people.Customer', 'sales.Order')
+
+    def context(self):
+        return {
+            'suppliers': Supplier.objects.count(),
+            'customers': Customer.objects.count(),
+            'orders': Order.objects.count(),
+        }
+
+
+class TopProductsWidget(DashboardWidget):
+    name = 'top_products'
+    template = 'landing/widgets/top-products.html'
+    ttl = 900
+    depends_on = ('sales.Order', 'sales.OrderItem', 'inventory.Product', 'inventory.Stock', 'inventory.ProductGallery')
+    LIMIT = 7
+
+    def context(self):
+        totals = list(ProductSalesManager.by_product().order_by('-sold_qty', 'product_id')[:self.LIMIT])
+        prices = Stock.objects.filter(product=OuterRef('pk')).order_by('id')
+        products = Product.objects.filter(pk__in=[row['product_id'] for row in totals]).annotate(
+            image=_first_image(),
+            price=Subquery(prices.values('price')[:1]),
+        ).in_bulk()
+        best_sellers = []
+        for row in totals:
+            product = products[row['product_id']]
+            product.total_quantity_sold = row['sold_qty']
+            best_sellers.append(product)
+        return {'best_sellers': best_sellers}
+
+
+class LowStockWidget(DashboardWidget):
+    name = 'low_stock'
+    template = 'landing/widgets/low-stock.html'
+    ttl = 120
+    depends_on = ('inventory.Stock', 'inventory.Product', 'inventory.ProductGallery')
+    LIMIT = 10
+
+    def context(self):
+        low_stocks = (
+            Stock.objects
+            .select_related('product')
+            .annotate(image=_first_image('product'))
+            .filter(quantity__lt=F('quantity_alert'))
+            .order_by('product__name')
+        )
+        return {'low_stocks': low_stocks[:self.LIMIT]}
+
+
+class RecentSalesWidget(DashboardWidget):
+    name = 'recent_sales'
+    template = 'landing/widgets/recent-sales.html'
+    ttl = 60
+    # Checkout bulk-creates lines, so new sales show up as Order writes
+    depends_on = ('sales.Order', 'sales.OrderItem', 'inventory.Product', 'inventory.ProductGallery')
+    LIMIT = 7
+
+    def context(self):
+        recent_sales = (
+            OrderItem.objects
+            .select_related('product__category')
+            .annotate(image=_first_image('product'))
+            .order_by('-id')
+        )
+        return {'recent_sales': recent_sales[:self.LIMIT]}
+
+
+WIDGETS = {
+    widget.name: widget
+    for widget in (SalesKpisWidget, SalesChartWidget, CountsWidget, TopProductsWidget, LowStockWidget, RecentSalesWidget)
+}
+
+
+class DashboardManager:
+    """
+    Caches rendered dashboard widgets.
+
+    A fragment is cached under its widget's version, range and today's
+    date for the widget's `ttl`; writes to a `depends_on` model bump the
+    version (see landing.signals). Recomputing is single-flight: the first
+    request to miss takes a short lock and renders, while concurrent misses
+    are served the last fragment rendered for the same range, however old,
+    and only wait for the render when there is none.
+    """
+    VERSION_KEY = 'dashboard:version:{}'
+    STALE_TTL = 24 * 60 * 60
+    LOCK_TIMEOUT = 30
+    WAIT = 5
+    POLL = 0.05
+
+    @classmethod
+    def versions(cls, names):
+        """
+        {widget name: version}, seeding missing versions from the clock so
+        a version lost to eviction is never handed out again.
+        """
+        keys = {name: cls.VERSION_KEY.format(name) for name in names}
+        found = cache.get_many(keys.values())
+        versions = {}
+        for name, key in keys.items():
+            if key not in found:
+                cache.add(key, time.time_ns(), timeout=None)
+                found[key] = cache.get(key)
+            versions[name] = found[key]
+        return versions
+
+    @classmethod
+    def dependents(cls, label):
+        return [widget for widget in WIDGETS.values() if label in widget.depends_on]
+
+    @classmethod
+    def bump(cls, label):
+        """
+        Invalidate every widget that reads `label` once the current
+        transaction commits.
+        """
+        for widget in cls.dependents(label):
+            transaction.on_commit(lambda name=widget.name: cls._incr(name))
+
+    @classmethod
+    def _incr(cls, name):
+        key = cls.VERSION_KEY.format(name)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), timeout=None)
+
+    @staticmethod
+    def _base(widget):
+        payload = json.dumps(widget.params(), sort_keys=True)
+        return f'dashboard:{widget.name}:{hashlib.sha256(payload.encode()).hexdigest()}'
+
+    @classmethod
+    def key(cls, widget, version):
+        return f'{cls._base(widget)}:{version}'
+
+    @classmethod
+    def cached(cls, widgets):
+        """
+        {widget name: fragment} for the widgets whose current fragment is
+        already cached, without rendering anything.
+        """
+        versions = cls.versions([widget.name for widget in widgets])
+        keys = {widget.name: cls.key(widget, versions[widget.name]) for widget in widgets}
+        found = cache.get_many(keys.values())
+        return {name: found[key] for name, key in keys.items() if key in found}
+
+    @classmethod
+    def render(cls, widget):
+        key = cls.key(widget, cls.versions([widget.name])[widget.name])
+        html = cache.get(key)
+        if html is not None:
+            return html
+
+        base = cls._base(widget)
+        lock = f'{base}:lock'
+        if cache.add(lock, 1, timeout=cls.LOCK_TIMEOUT):
+            try:
+                return cls._build(widget, key, base)
+            finally:
+                cache.delete(lock)
+
+        # Someone else is rendering: serve their last result in the meantime
+        html = cache.get(f'{base}:last')
+        if html is not None:
+            return html
+        deadline = time.monotonic() + cls.WAIT
+        while time.monotonic() < deadline:
+            time.sleep(cls.POLL)
+            html = cache.get(key)
+            if html is not None:
+                return html
+        # The lock holder is stuck or gone
+        return cls._build(widget, key, base)
+
+    @classmethod
+    def _build(cls, widget, key, base):
+        html = widget.render()
+        cache.set(key, html, timeout=widget.ttl)
+        cache.set(f'{base}:last', html, timeout=cls.STALE_TTL)
+        return html
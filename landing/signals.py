@@ -0,0 +1,16 @@
+from django.apps import apps
+from django.db.models.signals import post_delete, post_save
+
+from landing.services.dashboard_service import WIDGETS, DashboardManager
+
+
+def widget_source_changed(sender, **kwargs):
+    DashboardManager.bump(sender._meta.label)
+
+
+# Every model a dashboard widget reads, so the list cannot drift from
+# the widgets' depends_on
+for label in sorted({label for widget in WIDGETS.values() for label in widget.depends_on}):
+    model = apps.get_model(label)
+    post_save.connect(widget_source_changed, sender=model, dispatch_uid=f'dashboard-widget-save:{label}')
+    post_delete.connect(widget_source_changed, sender=model, dispatch_uid=f'dashboard-widget-delete:{label}')
@@ -4,6 +4,7 @@ from . import views
 app_name = 'landing'
 urlpatterns = [
     path('',views.homepage,name='homepage'),
-    path('sales-dashboard/',views.sales_dashboard,name="sales-dashboard")
+    path('sales-dashboard/',views.sales_dashboard,name="sales-dashboard"),
+    path('widgets/<slug:name>/',views.dashboard_widget,name='widget'),
 
 ]
\ No newline at end of file
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.3 on 2026-10-17 05:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('people', '0003_supplier_date_created'),
+        ('purchases', '0003_purchase_payment_status'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='purchase',
+            index=models.Index(fields=['status', 'order_date'], name='purchases_p_status_7f6274_idx'),
+        ),
+    ]
@@ -27,31 +27,16 @@ class Purchase(models.Model):
 
     class Meta:
         ordering = ['-order_date', 'reference']
+        indexes = [models.Index(fields=['status', 'order_date'])]
 
     def __str__(self):
         return f"PO {self.reference} ({self.get_status_display()})"
 
     def save(self, *args, **kwargs):
         if not self.reference:
-            # Generate unique reference
-            import datetime
-            today = datetime.date.today()
-            prefix = f"PO{today.strftime('%Y%m%d')}"
-            
-            # Find the highest number for today
-            existing_refs = Purchase.objects.filter(
-                reference__startswith=prefix
-            ).values_list('reference', flat=True)
-            
-            max_num = 0
-            for ref in existing_refs:
-                try:
-                    num = int(ref.replace(prefix, ''))
-                    max_num = max(max_num, num)
-                except ValueError:
-                    continue
-            
-            self.reference = f"{prefix}{max_num + 1:03d}"
+            # Per-day counter; O(1) and safe under concurrent saves
+            from sales.services.sequence_service import SequenceManager
+            self.reference = SequenceManager.next_purchase_reference()
         
         super().save(*args, **kwargs)
 
@@ -77,19 +62,35 @@ class PurchaseItem(models.Model):
         # Calculate total cost: (quantity * unit_cost) - discount + tax_amount
         line_total = (self.quantity * self.unit_cost) - self.discount + self.tax_amount
         self.total_cost = max(line_total, Decimal('0.00'))  # Ensure non-negative
+
+        # What this line had already received, so a re-save only applies the change
+        stored = None
+        if self.pk:
+            stored = PurchaseItem.objects.filter(pk=self.pk).values('product_id', 'quantity', 'unit_cost').first()
         
         super().save(*args, **kwargs)
         
         # Update stock and parent totals
         if hasattr(self, 'product') and self.product:
-            # Get or create stock entry for this product
-            from inventory.models import Stock
-            stock, created = Stock.objects.get_or_create(
-                product=self.product,
-                defaults={'quantity': 0, 'price': self.unit_cost, 'tax': 0, 'discount': 0, 'quantity_alert': 0}
-            )
-            stock.quantity += self.quantity
-            stock.save()
+            # Atomic increment; creates the stock entry on first receipt
+            from inventory.services.stock_service import StockManager
+            from inventory.services.valuation_service import ValuationManager
+            day = ValuationManager.receipt_day(self)
+            reference = self.purchase.reference
+            if stored is None or stored['product_id'] != self.product_id:
+                if stored is not None:
+                    # Moved to another product: take the units off the old one
+                    StockManager.receive(
+                        Product.objects.get(pk=stored['product_id']), -stored['quantity'],
+                        stored['unit_cost'], day=day, reference=reference,
+                    )
+                StockManager.receive(self.product, self.quantity, self.unit_cost, day=day, reference=reference)
+                ValuationManager.receive(self)
+            elif (stored['quantity'], stored['unit_cost']) != (self.quantity, self.unit_cost):
+                delta = self.quantity - stored['quantity']
+                if delta:
+                    StockManager.receive(self.product, delta, self.unit_cost, day=day, reference=reference)
+                ValuationManager.receive(self)
             
         if hasattr(self, 'purchase') and self.purchase:
             self.purchase.update_totals()
\ No newline at end of file
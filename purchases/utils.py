@@ -1,37 +1,31 @@
-from django.http import FileResponse
-from django.db.models import Sum, Value
-from django.db.models.functions import Coalesce
-import io
-from openpyxl import Workbook
-# from reportlab.lib.pagesizes import A4  # Temporarily disabled
-# from reportlab.pdfgen import canvas  # Temporarily disabled
+from reports.services.export_service import Column, ExportManager, iso_date, text
+
+from .models import PurchaseItem
+
+PURCHASE_EXPORT_COLUMNS = [
+    Column('PO Reference', 'purchase__reference'),
+    Column('Date', 'purchase__order_date', iso_date),
+    Column('Supplier', 'purchase__supplier__name', text),
+    Column('Product', 'product__name'),
+    Column('Quantity', 'quantity'),
+    Column('Unit Price', 'unit_cost'),
+    Column('Discount', 'discount'),
+    Column('Tax', 'tax_amount'),
+    Column('Line Total', 'total_cost'),
+]
+
+def _purchase_lines(purchase_qs):
+    # One row per purchase line, newest purchase first
+    return (
+        PurchaseItem.objects.filter(purchase__in=purchase_qs.values('pk'))
+                            .order_by('-purchase_id', 'id')
+    )
 
 def _export_purchases_excel(purchase_qs, basename='purchases'):
-    wb = Workbook()
-    ws = wb.active
-    ws.append(['PO Reference', 'Date', 'Supplier', 'Product', 'Quantity', 'Unit Price', 'Discount', 'Tax', 'Line Total'])
-    
-    for purchase in purchase_qs:
-        for item in purchase.items.all():
-            ws.append([
-                purchase.reference,
-                purchase.order_date.strftime('%Y-%m-%d'),
-                purchase.supplier.name,
-                item.product.name,
-                item.quantity,
-                float(item.unit_price),
-                float(item.discount_amount),
-                float(item.tax_amount),
-                float(item.line_total),
-            ])
-    
-    buffer = io.BytesIO()
-    wb.save(buffer)
-    buffer.seek(0)
-    filename = f"{basename}.xlsx"
-    return FileResponse(buffer, as_attachment=True, filename=filename)
+    return ExportManager.excel(_purchase_lines(purchase_qs), PURCHASE_EXPORT_COLUMNS, basename)
+
+def _export_purchases_csv(purchase_qs, basename='purchases'):
+    return ExportManager.csv(_purchase_lines(purchase_qs), PURCHASE_EXPORT_COLUMNS, basename)
 
 def _export_purchases_pdf(purchase_qs, basename='purchases'):
-    """PDF export temporarily disabled"""
-    from django.http import HttpResponse
-    return HttpResponse("PDF export temporarily disabled", status=503)
+    return ExportManager.pdf(_purchase_lines(purchase_qs), PURCHASE_EXPORT_COLUMNS, basename)
@@ -6,30 +6,30 @@ from django.db.models      import Prefetch
 from .forms                import PurchaseForm, PurchaseItemFormSet
 from .models               import Purchase, PurchaseItem
 from django.utils.http import urlencode
-from .utils import _export_purchases_excel,_export_purchases_pdf
+from .utils import _export_purchases_csv,_export_purchases_excel,_export_purchases_pdf
 from django.db.models import Q, F
 from django.http import JsonResponse
 from inventory.models import Product
+from inventory.services.catalog_service import CatalogManager
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
 from django.utils import timezone
 from authentication.decorators import manager_or_above
 
 
 logger = logging.getLogger(__name__)
+
+
+def _products_etag(request):
+    return CatalogManager.etag('options')
 @manager_or_above
 
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=_products_etag)
 def get_products_ajax(request):
     """AJAX endpoint to fetch products for purchase form dropdown"""
     if request.method == 'GET':
-        products = Product.objects.select_related('category', 'sub_category').all()
-        product_data = [
-            {
-                'id': product.id,
-                'name': product.name,
-                'sku': product.sku or '',
-                'category': product.category.name if product.category else '',
-            }
-            for product in products
-        ]
+        product_data = CatalogManager.snapshot('options', CatalogManager.product_options)
         return JsonResponse({'products': product_data})
     
     return JsonResponse({'error': 'Invalid request method'}, status=400)
@@ -199,6 +199,8 @@ def purchases(request):
     export = request.GET.get('export')
     if export == 'excel':
         return _export_purchases_excel(qs)
+    if export == 'csv':
+        return _export_purchases_csv(qs)
     if export == 'pdf':
         return _export_purchases_pdf(qs)
 
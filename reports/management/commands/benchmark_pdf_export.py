@@ -0,0 +1,73 @@
+import tempfile
+import time
+import tracemalloc
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from people.models import Customer
+from reports.services.export_service import ExportManager
+from sales.models import Order
+from sales.utils import ORDER_EXPORT_COLUMNS, get_orders_queryset
+
+
+class Command(BaseCommand):
+    help = (
+        'Render a PDF sales export of synthetic orders and fail if its peak '
+        'Python memory exceeds the budget. The orders are created inside a '
+        'transaction that is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=50_000)
+        parser.add_argument('--budget', type=float, default=32.0, help='Peak memory budget in MB')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            started = time.perf_counter()
+            self.create_orders(options['rows'])
+            self.stdout.write(f"Generated {options['rows']} orders: {time.perf_counter() - started:.2f}s")
+
+            queryset = get_orders_queryset(source='pos')
+            with tempfile.TemporaryFile() as output:
+                started = time.perf_counter()
+                ExportManager.write_pdf(queryset, ORDER_EXPORT_COLUMNS, output, title='Benchmark Sales')
+                elapsed = time.perf_counter() - started
+                size = output.tell() / 2**20
+
+            # Second pass under tracemalloc, which slows rendering severalfold
+            with tempfile.TemporaryFile() as output:
+                tracemalloc.start()
+                ExportManager.write_pdf(queryset, ORDER_EXPORT_COLUMNS, output, title='Benchmark Sales')
+                peak = tracemalloc.get_traced_memory()[1] / 2**20
+                tracemalloc.stop()
+
+            transaction.set_rollback(True)
+
+        self.stdout.write(f'Rendered {size:.1f} MB PDF in {elapsed:.2f}s, peak memory {peak:.1f} MB')
+        if peak > options['budget']:
+            raise CommandError(f"Peak memory {peak:.1f} MB is over the {options['budget']:.1f} MB budget.")
+
+    def create_orders(self, count):
+        today = timezone.localdate()
+        customers = Customer.objects.bulk_create([
+            Customer(name=f'Bench customer {i}') for i in range(50)
+        ])
+        batch = 5000
+        for start in range(0, count, batch):
+            Order.objects.bulk_create([
+                Order(
+                    reference=f'BENCH-{i}',
+                    customer=customers[i % len(customers)],
+                    date=today - timedelta(days=i % 365),
+                    status=Order.Status.COMPLETED,
+                    payment_status=Order.PaymentStatus.PAID,
+                    source='pos',
+                    grand_total=Decimal('120.00'),
+                    paid_amount=Decimal('120.00'),
+                )
+                for i in range(start, min(start + batch, count))
+            ])
@@ -0,0 +1,36 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from reports.services.period_service import PeriodCloseManager
+
+
+def month_arg(value):
+    return datetime.strptime(value, '%Y-%m').date()
+
+
+class Command(BaseCommand):
+    help = 'Freeze the profit and loss of months that are over (all open ones by default).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--month', type=month_arg, help='Close only this month (YYYY-MM)')
+        parser.add_argument('--reopen', type=month_arg, help='Reopen this month (YYYY-MM) instead')
+
+    def handle(self, *args, **options):
+        if options['reopen']:
+            month = options['reopen']
+            if not PeriodCloseManager.reopen(month):
+                raise CommandError(f"{month:%b %Y} is not closed.")
+            self.stdout.write(self.style.SUCCESS(f'Reopened {month:%b %Y}.'))
+            return
+
+        try:
+            if options['month']:
+                snapshots = [PeriodCloseManager.close(options['month'])]
+            else:
+                snapshots = PeriodCloseManager.close_all()
+        except ValueError as e:
+            raise CommandError(str(e))
+        for snapshot in snapshots:
+            self.stdout.write(f'Closed {snapshot.month:%b %Y}: net profit {snapshot.net_profit}.')
+        self.stdout.write(self.style.SUCCESS(f'{len(snapshots)} months closed.'))
@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from reports.services.job_service import ExportJobManager
+
+
+class Command(BaseCommand):
+    help = 'Generate queued background exports and remove expired ones.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Exit once the queue is empty')
+        parser.add_argument('--sleep', type=float, default=2.0, help='Seconds to wait when the queue is empty')
+
+    def handle(self, *args, **options):
+        while True:
+            purged = ExportJobManager.purge_expired()
+            if purged:
+                self.stdout.write(f'Removed {purged} expired exports.')
+
+            job = ExportJobManager.claim()
+            if job is None:
+                if options['once']:
+                    return
+                time.sleep(options['sleep'])
+                continue
+
+            job = ExportJobManager.run(job)
+            if job.status == job.Status.DONE:
+                self.stdout.write(self.style.SUCCESS(f'Export {job.pk}: {job.total} rows.'))
+            else:
+                self.stderr.write(f'Export {job.pk} failed: {job.error}')
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.3 on 2026-10-17 04:43
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0002_cache_table'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PeriodSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='First day of the month', unique=True)),
+                ('sales', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('services', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('purchases', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('expenses', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('net_profit', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('closed_at', models.DateTimeField(auto_now_add=True)),
+                ('closed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='closed_periods', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['month'],
+            },
+        ),
+    ]
@@ -1,3 +1,80 @@
+import uuid
+
+from django.conf import settings
 from django.db import models
 
-# Create your models here.
+
+class ExportJob(models.Model):
+    """
+    An export generated off the request path by `manage.py run_export_jobs`.
+    `params` are the list filters the export source is rebuilt from and
+    `filter_hash` identifies kind, format and params, so an identical
+    request reuses a finished or in-flight job until it expires. `file`
+    is the artifact's name under EXPORT_ROOT.
+    """
+    class Status(models.TextChoices):
+        QUEUED = 'queued', 'Queued'
+        RUNNING = 'running', 'Running'
+        DONE = 'done', 'Done'
+        FAILED = 'failed', 'Failed'
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    kind = models.CharField(max_length=32)
+    format = models.CharField(max_length=10)
+    params = models.JSONField(default=dict)
+    basename = models.CharField(max_length=100)
+    filter_hash = models.CharField(max_length=64)
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.QUEUED)
+    progress = models.PositiveIntegerField(default=0)
+    total = models.PositiveIntegerField(null=True, blank=True)
+    file = models.CharField(max_length=255, blank=True)
+    error = models.TextField(blank=True)
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='export_jobs',
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    expires_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['filter_hash', 'status'], name='exportjob_hash_idx'),
+            models.Index(fields=['status', 'created_at'], name='exportjob_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.format} ({self.status})"
+
+
+class PeriodSnapshot(models.Model):
+    """
+    A closed month's profit and loss totals, frozen by `manage.py
+    close_periods` or the close button on the P&L report. The report reads
+    closed months from here and only computes open months from the raw
+    tables; a late edit to a closed month shows once it is reopened.
+    """
+    month = models.DateField(unique=True, help_text="First day of the month")
+    sales = models.DecimalField(max_digits=14, decimal_places=2)
+    services = models.DecimalField(max_digits=14, decimal_places=2)
+    purchases = models.DecimalField(max_digits=14, decimal_places=2)
+    expenses = models.DecimalField(max_digits=14, decimal_places=2)
+    net_profit = models.DecimalField(max_digits=14, decimal_places=2)
+    closed_at = models.DateTimeField(auto_now_add=True)
+    closed_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='closed_periods',
+    )
+
+    class Meta:
+        ordering = ['month']
+
+    def __str__(self):
+        return f"{self.month:%b %Y} (closed)"
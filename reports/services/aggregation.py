@@ -0,0 +1,91 @@
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+from django.db.models import Sum
+from django.db.models.functions import TruncDay, TruncMonth, TruncWeek
+
+
+class AggregationManager:
+    """
+    Time-bucketed totals for charts and period reports.
+
+    time_series() costs one GROUP BY query whatever the length of the range;
+    empty buckets are filled in Python.
+    """
+    TRUNC = {'day': TruncDay, 'week': TruncWeek, 'month': TruncMonth}
+
+    @staticmethod
+    def bucket_start(day, bucket):
+        if bucket == 'week':
+            return day - timedelta(days=day.weekday())
+        if bucket == 'month':
+            return day.replace(day=1)
+        return day
+
+    @staticmethod
+    def next_bucket(day, bucket):
+        if bucket == 'week':
+            return day + timedelta(days=7)
+        if bucket == 'month':
+            return date(day.year + day.month // 12, day.month % 12 + 1, 1)
+        return day + timedelta(days=1)
+
+    @classmethod
+    def buckets(cls, start, end, bucket='day'):
+        """
+        Start dates of every bucket overlapping [start, end].
+        """
+        current = cls.bucket_start(start, bucket)
+        periods = []
+        while current <= end:
+            periods.append(current)
+            current = cls.next_bucket(current, bucket)
+        return periods
+
+    @staticmethod
+    def is_datetime(queryset, field):
+        try:
+            return isinstance(queryset.model._meta.get_field(field), models.DateTimeField)
+        except FieldDoesNotExist:
+            # Annotation: use its output field
+            annotation = queryset.query.annotations.get(field)
+            return annotation is not None and isinstance(annotation.output_field, models.DateTimeField)
+
+    @classmethod
+    def time_series(cls, queryset, date_field, value_field, bucket='day', start=None, end=None):
+        """
+        Sum `value_field` over `queryset` per `bucket` ('day', 'week' or
+        'month') of `date_field`. Returns [(bucket start date, total), ...]
+        covering every bucket from `start` to `end`, with Decimal('0.00')
+        for empty ones. Without bounds the range spans the data.
+        """
+        if bucket not in cls.TRUNC:
+            raise ValueError(f"Unknown bucket '{bucket}'; use day, week or month.")
+
+        lookup = f"{date_field}__date" if cls.is_datetime(queryset, date_field) else date_field
+        if start:
+            queryset = queryset.filter(**{f"{lookup}__gte": start})
+        if end:
+            queryset = queryset.filter(**{f"{lookup}__lte": end})
+
+        totals = {}
+        for row in (
+            queryset.order_by()
+                    .annotate(period=cls.TRUNC[bucket](date_field, output_field=models.DateField()))
+                    .values('period')
+                    .annotate(total=Sum(value_field))
+        ):
+            period = row['period']
+            if isinstance(period, datetime):
+                period = period.date()
+            totals[period] = Decimal(row['total'] or 0)
+
+        if not (start and end):
+            if not totals:
+                return []
+            start = start or min(totals)
+            end = end or max(totals)
+
+        return [(period, totals.get(period, Decimal('0.00'))) for period in cls.buckets(start, end, bucket)]
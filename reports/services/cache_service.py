@@ -0,0 +1,92 @@
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+
+class ReportCacheManager:
+    """
+    Caches report results keyed by report name, part (a page, the summary
+    cards...) and normalised filters.
+
+    Each model a report reads has a version in the cache; the key of a
+    cached result includes the versions of the report's `depends_on`
+    models, and any write to one of them bumps its version (see
+    reports.signals), so stale results are never served and simply age
+    out. Ranges that end before today get REPORT_CACHE_TTL; ranges up to
+    today, or open-ended ones, only REPORT_CACHE_TTL_TODAY, which bounds
+    how long a write that bypasses signals (queryset.update()) can go
+    unseen.
+    """
+    VERSION_KEY = 'report-cache:version:{}'
+
+    @classmethod
+    def versions(cls, labels):
+        """
+        {model label: version}, seeding missing versions from the clock so
+        a version lost to eviction is never handed out again.
+        """
+        keys = {label: cls.VERSION_KEY.format(label) for label in labels}
+        found = cache.get_many(keys.values())
+        versions = {}
+        for label, key in keys.items():
+            if key not in found:
+                cache.add(key, time.time_ns(), timeout=None)
+                found[key] = cache.get(key)
+            versions[label] = found[key]
+        return versions
+
+    @classmethod
+    def bump(cls, label):
+        """
+        Invalidate every cached result that read `label` once the current
+        transaction commits, so a result rebuilt in between cannot capture
+        old rows under the new version.
+        """
+        transaction.on_commit(lambda: cls._incr(label))
+
+    @classmethod
+    def _incr(cls, label):
+        key = cls.VERSION_KEY.format(label)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), timeout=None)
+
+    @staticmethod
+    def ttl(dataset):
+        if dataset.end and dataset.end < timezone.localdate() and not dataset.LIVE:
+            return settings.REPORT_CACHE_TTL
+        return settings.REPORT_CACHE_TTL_TODAY
+
+    @classmethod
+    def key(cls, dataset, part):
+        # Versions are read once per dataset, i.e. once per request
+        if dataset.cache_versions is None:
+            dataset.cache_versions = cls.versions(dataset.depends_on)
+        payload = json.dumps(
+            [dataset.params(), part, dataset.cache_versions],
+            sort_keys=True,
+            default=str,
+        )
+        return f'report:{dataset.name}:{hashlib.sha256(payload.encode()).hexdigest()}'
+
+    @classmethod
+    def fetch(cls, dataset, part, build):
+        """
+        Return the cached result of `build()` for this report, part and
+        filters, building and storing it on a miss. Reports without
+        dependencies are never cached.
+        """
+        if not dataset.depends_on:
+            return build()
+        key = cls.key(dataset, part)
+        result = cache.get(key)
+        if result is None:
+            result = build()
+            cache.set(key, result, timeout=cls.ttl(dataset))
+        return result
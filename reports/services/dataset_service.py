@@ -0,0 +1,504 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.paginator import Paginator
+from django.db.models import CharField, F, IntegerField, Max, Min, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from finance.models import Expense
+from inventory.models import Product, ProductGallery, Stock, StockMovement
+from inventory.services.ledger_service import StockLedgerManager
+from purchases.models import Purchase
+from reports.models import PeriodSnapshot
+from reports.services.aggregation import AggregationManager
+from reports.services.cache_service import ReportCacheManager
+from reports.services.export_service import Column, ExportManager, text
+from sales.models import Invoice, Order, OrderItem
+from sales.services.summary_service import ProductSalesManager, SalesSummaryManager
+
+
+class ReportDataset:
+    """
+    The rows of one report, declared once for the page and every export.
+
+    A subclass lists its `columns` and builds queryset(): a values()
+    queryset, sorted in SQL, with a key per column field plus any
+    `extra_fields` only the HTML table shows. The page reads rows() through
+    Paginator, so one page of compact named tuples is fetched; export jobs
+    stream the same queryset through ExportManager in chunks.
+
+    Datasets are rebuilt from JSON job params with from_params(), so a
+    report export runs in the background like the list exports.
+
+    Pages and summaries of reports with `depends_on` (model labels) are
+    served from ReportCacheManager until one of those models is written.
+    `LIVE` reports also show current state, such as stock on hand, so they
+    are only cached briefly whatever the range.
+    """
+    name = ''
+    columns = []
+    extra_fields = []
+    depends_on = ()
+    LIVE = False
+    PER_PAGE = 25
+
+    def __init__(self, start=None, end=None, **filters):
+        self.start = start
+        self.end = end
+        self.filters = {key: value for key, value in filters.items() if value not in (None, '')}
+        self.cache_versions = None
+
+    @classmethod
+    def from_params(cls, params):
+        params = dict(params)
+        start, end = params.pop('start', None), params.pop('end', None)
+        return cls(
+            start=date.fromisoformat(start) if start else None,
+            end=date.fromisoformat(end) if end else None,
+            **params,
+        )
+
+    def params(self):
+        params = dict(self.filters, report=self.name)
+        if self.start:
+            params['start'] = self.start.isoformat()
+        if self.end:
+            params['end'] = self.end.isoformat()
+        return params
+
+    def basename(self):
+        if not (self.start and self.end):
+            return self.name
+        if self.start == self.end:
+            return f"{self.name}_{self.start.strftime('%d-%m-%Y')}"
+        return f"{self.name}_{self.start.strftime('%d-%m-%Y')}_to_{self.end.strftime('%d-%m-%Y')}"
+
+    def queryset(self):
+        raise NotImplementedError
+
+    def rows(self):
+        fields = [column.field for column in self.columns] + self.extra_fields
+        return self.queryset().values_list(*fields, named=True)
+
+    def page(self, number, per_page=None):
+        per_page = per_page or self.PER_PAGE
+        rows = self.rows()
+        paginator = Paginator(rows, per_page)
+        # The count and the rows come from the cache; Paginator only does the arithmetic
+        paginator.count = ReportCacheManager.fetch(self, 'count', rows.count)
+        page = paginator.get_page(number)
+        page.object_list = ReportCacheManager.fetch(
+            self, f'page:{page.number}:{per_page}', lambda: list(page.object_list)
+        )
+        return page
+
+    def export(self, request, fmt):
+        from reports.services.job_service import ExportJobManager
+
+        return ExportJobManager.respond(request, 'report', fmt, self.params(), self.basename())
+
+
+def _first_image(outer='pk'):
+    images = ProductGallery.objects.filter(product=OuterRef(outer)).order_by('id')
+    return Subquery(images.values('image')[:1])
+
+
+def _first_stock_quantity(outer='pk'):
+    stock = Stock.objects.filter(product=OuterRef(outer)).order_by('id')
+    return Subquery(stock.values('quantity')[:1])
+
+
+class SalesReport(ReportDataset):
+    """
+    Quantity and amount sold per product on completed orders, optionally
+    only orders containing the product named by `product`.
+    """
+    name = 'sales_report'
+    depends_on = ('sales.Order', 'sales.OrderItem', 'sales.Payment')
+    columns = [
+        Column('SKU', 'sku'),
+        Column('Product', 'name'),
+        Column('Category', 'category_name', text),
+        Column('Sold Qty', 'sold_qty'),
+        Column('Sold Amount', 'sold_amount'),
+    ]
+
+    def orders(self):
+        orders = Order.objects.filter(status=Order.Status.COMPLETED)
+        if self.start and self.end:
+            orders = orders.filter(date__range=(self.start, self.end))
+        if 'product' in self.filters:
+            orders = orders.filter(
+                pk__in=OrderItem.objects.filter(product__name=self.filters['product']).values('order_id')
+            )
+        return orders
+
+    def summary(self):
+        return ReportCacheManager.fetch(self, 'summary', self._summary)
+
+    def _summary(self):
+        summary = self.orders().aggregate(
+            total_amount=Sum('grand_total'),
+            total_paid=Sum('paid_amount'),
+            total_unpaid=Sum('due_amount'),
+            overdue=Sum(
+                'due_amount',
+                filter=Q(payment_status__in=[Order.PaymentStatus.UNPAID, Order.PaymentStatus.PARTIAL]),
+            ),
+        )
+        return {key: value or 0 for key, value in summary.items()}
+
+    def queryset(self):
+        return (
+            OrderItem.objects.filter(order__in=self.orders())
+                             .values(
+                                 sku=F('product__sku'),
+                                 name=F('product__name'),
+                                 category_name=F('product__category__name'),
+                             )
+                             .annotate(sold_qty=Sum('quantity'), sold_amount=Sum('total_cost'))
+                             .order_by('-sold_amount', 'sku')
+        )
+
+
+class BestSellersReport(ReportDataset):
+    """
+    The top sellers by quantity, from the per-product daily sales rollup.
+    """
+    name = 'best_sellers'
+    depends_on = ('sales.Order', 'sales.OrderItem')
+    LIVE = True
+    LIMIT = 30
+    PER_PAGE = 10
+    columns = [
+        Column('SKU', 'sku'),
+        Column('Product', 'name'),
+        Column('Category', 'category_name', text),
+        Column('Sold Qty', 'sold_qty'),
+        Column('Sold Amount', 'sold_amount'),
+        Column('In Stock', 'in_stock', lambda value: value or 0),
+    ]
+    extra_fields = ['image']
+
+    def queryset(self):
+        return (
+            ProductSalesManager.by_product(
+                self.start,
+                self.end,
+                sku=F('product__sku'),
+                name=F('product__name'),
+                category_name=F('product__category__name'),
+            )
+            .annotate(in_stock=_first_stock_quantity('product_id'), image=_first_image('product_id'))
+            .order_by('-sold_qty', 'product_id')[:self.LIMIT]
+        )
+
+
+class PurchaseReport(ReportDataset):
+    """
+    Quantity and amount purchased per product; products with no purchases
+    in the range are listed with zeros.
+    """
+    name = 'purchase_report'
+    depends_on = ('purchases.Purchase', 'purchases.PurchaseItem', 'inventory.Product')
+    columns = [
+        Column('SKU', 'sku'),
+        Column('Product', 'name'),
+        Column('Category', 'category_name', text),
+        Column('Purchased Qty', 'purchase_quantity'),
+        Column('Purchase Amount', 'purchase_amount'),
+    ]
+    extra_fields = ['image']
+
+    def queryset(self):
+        purchased = Q()
+        if self.start and self.end:
+            purchased = Q(purchaseitem__purchase__order_date__range=(self.start, self.end))
+        return (
+            Product.objects.annotate(
+                purchase_amount=Coalesce(Sum('purchaseitem__total_cost', filter=purchased), Value(Decimal('0.00'))),
+                purchase_quantity=Coalesce(Sum('purchaseitem__quantity', filter=purchased), Value(0)),
+            )
+            .annotate(category_name=F('category__name'), image=_first_image())
+            .order_by('-purchase_amount', 'name', 'id')
+        )
+
+
+class InventoryReport(ReportDataset):
+    """
+    Every product with its unit and quantity in stock.
+    """
+    name = 'inventory_report'
+    columns = [
+        Column('SKU', 'sku'),
+        Column('Product', 'name'),
+        Column('Category', 'category_name', text),
+        Column('Unit', 'unit_name', text),
+        Column('Qty', 'quantity', lambda value: value or 0),
+    ]
+    extra_fields = ['image']
+
+    def queryset(self):
+        products = Product.objects.all()
+        for key, lookup in (('category', 'category_id'), ('product', 'pk'), ('unit', 'units_id')):
+            if str(self.filters.get(key, '')).isdigit():
+                products = products.filter(**{lookup: self.filters[key]})
+        return products.annotate(
+            category_name=F('category__name'),
+            unit_name=F('units__short_name'),
+            quantity=_first_stock_quantity(),
+            image=_first_image(),
+        ).order_by('name', 'id')
+
+
+class ExpenseReport(ReportDataset):
+    """
+    Expenses dated in the range, newest first.
+    """
+    name = 'expense_report'
+    depends_on = ('finance.Expense',)
+    columns = [
+        Column('Name', 'name'),
+        Column('Category', 'category_name', text),
+        Column('Description', 'description'),
+        Column('Date', 'date', text),
+        Column('Amount', 'amount'),
+        Column('Status', 'status'),
+    ]
+
+    def queryset(self):
+        expenses = Expense.objects.all()
+        if self.start and self.end:
+            expenses = expenses.filter(date__range=(self.start, self.end))
+        return expenses.annotate(category_name=F('category__name')).order_by('-date', '-id')
+
+
+class OpeningInventoryReport(ReportDataset):
+    """
+    Opening, sold and closing quantity per product with stock or activity
+    over the range. Balances come from the stock ledger; products with
+    nothing to show are dropped in SQL, so the page and the totals are
+    computed without loading every product.
+    """
+    name = 'opening_inventory'
+    columns = [
+        Column('SKU', 'sku'),
+        Column('Product', 'name'),
+        Column('Category', 'category_name'),
+        Column('Unit', 'unit_name'),
+        Column('Opening Qty', 'opening_qty'),
+        Column('Sold Qty', 'sold_qty'),
+        Column('Closing Qty', 'closing_qty'),
+    ]
+
+    def queryset(self):
+        sold = (
+            StockMovement.objects.filter(
+                product=OuterRef('pk'),
+                kind=StockMovement.Kind.SALE,
+                day__gte=self.start,
+                day__lte=self.end,
+            )
+            .order_by()
+            .values('product')
+            .annotate(total=Sum('quantity'))
+            .values('total')
+        )
+        products = StockLedgerManager.with_balance(
+            Product.objects.all(), self.start - timedelta(days=1), 'opening_qty'
+        )
+        products = StockLedgerManager.with_balance(products, self.end, 'closing_qty')
+        return (
+            products.annotate(
+                sold_qty=-Coalesce(Subquery(sold, output_field=IntegerField()), Value(0)),
+                category_name=Coalesce(F('category__name'), Value('Uncategorized'), output_field=CharField()),
+                unit_name=Coalesce(F('units__short_name'), Value('pcs'), output_field=CharField()),
+            )
+            .filter(~Q(opening_qty=0) | ~Q(sold_qty=0) | ~Q(closing_qty=0))
+            .order_by('name', 'id')
+        )
+
+    def totals(self):
+        totals = self.queryset().order_by().aggregate(
+            total_products=Coalesce(Sum(Value(1)), Value(0)),
+            total_opening_qty=Coalesce(Sum('opening_qty'), Value(0)),
+            total_sold_qty=Coalesce(Sum('sold_qty'), Value(0)),
+            total_closing_qty=Coalesce(Sum('closing_qty'), Value(0)),
+        )
+        return totals
+
+
+class ProfitLossReport(ReportDataset):
+    """
+    Sales, services, purchases and expenses per month, with the derived
+    profit lines. Without a range it spans every month that has data.
+    Closed months (PeriodSnapshot) are read as frozen; only open months are
+    aggregated from the raw tables. The rows are the report's lines, with
+    one value per month in the range, and they are exported directly rather
+    than as a job.
+    """
+    name = 'profit_loss_report'
+    depends_on = (
+        'sales.Order', 'sales.OrderItem', 'sales.Invoice', 'purchases.Purchase', 'finance.Expense',
+        'reports.PeriodSnapshot',
+    )
+    LINES = [
+        ('sales', 'Sales'),
+        ('services', 'Service'),
+        ('purchase_returns', 'Purchase Return'),
+        ('gross_profit', 'Gross Profit'),
+        ('purchases', 'Purchase'),
+        ('expenses', 'Operating Expenses'),
+        ('sales_returns', 'Sales Return'),
+        ('total_expense', 'Total Expense'),
+        ('net_profit', 'Net Profit'),
+    ]
+    SOURCES = ('sales', 'services', 'purchases', 'expenses')
+
+    def __init__(self, start=None, end=None, **filters):
+        super().__init__(start, end, **filters)
+        self._series = None
+
+    @classmethod
+    def live_totals(cls, start, end):
+        """
+        {source: {month: total}} over days in [start, end] from the raw
+        tables, one GROUP BY month query per source.
+        """
+        def monthly(queryset, field, date_field):
+            return dict(AggregationManager.time_series(queryset, date_field, field, 'month', start, end))
+
+        return {
+            # Sales come from the daily rollup rather than Order
+            'sales': monthly(SalesSummaryManager.rows(), 'gross_sales', 'day'),
+            'services': monthly(Invoice.objects, 'amount', 'created_at'),
+            'purchases': monthly(Purchase.objects, 'grand_total', 'order_date'),
+            'expenses': monthly(Expense.objects, 'amount', 'date'),
+        }
+
+    def _has_data(self):
+        bounds = [self.start, self.end]
+        return (
+            SalesSummaryManager.rows(self.start, self.end, order_count__gt=0).exists()
+            or Invoice.objects.filter(created_at__date__range=bounds).exists()
+            or Purchase.objects.filter(order_date__range=bounds).exists()
+            or Expense.objects.filter(date__range=bounds).exists()
+        )
+
+    def data_span(self):
+        """
+        (first, last) day with data across every source, or None.
+        """
+        spans = [
+            SalesSummaryManager.rows(order_count__gt=0).aggregate(first=Min('day'), last=Max('day')),
+            Invoice.objects.aggregate(first=Min('created_at__date'), last=Max('created_at__date')),
+            Purchase.objects.aggregate(first=Min('order_date'), last=Max('order_date')),
+            Expense.objects.aggregate(first=Min('date'), last=Max('date')),
+        ]
+        days = [day for span in spans for day in span.values() if day]
+        return (min(days), max(days)) if days else None
+
+    def series(self):
+        """
+        {'months', 'has_data_in_range', 'custom_date_range', <line>: [value per month]}.
+        """
+        if self._series is None:
+            self._series = ReportCacheManager.fetch(self, 'series', self._build_series)
+        return self._series
+
+    def _build_series(self):
+        custom = bool(self.start and self.end)
+        if custom:
+            start, end = self.start, self.end
+            has_data = self._has_data()
+        else:
+            span = self.data_span()
+            has_data = span is not None
+            if span is None:
+                year = date.today().year
+                span = (date(year, 1, 1), date(year, 12, 31))
+            start, end = span
+
+        months = AggregationManager.buckets(start, end, 'month')
+
+        # Closed months come from their snapshots, unless the range only
+        # covers part of them
+        frozen = {snapshot.month: snapshot for snapshot in PeriodSnapshot.objects.filter(month__in=months)}
+        if custom:
+            if start.day != 1:
+                frozen.pop(months[0], None)
+            if AggregationManager.next_bucket(end, 'month') != end + timedelta(days=1):
+                frozen.pop(months[-1], None)
+        open_months = [month for month in months if month not in frozen]
+
+        live = {source: {} for source in self.SOURCES}
+        if open_months and (has_data or not custom):
+            # Only the span of open months is aggregated from the raw tables
+            live = self.live_totals(
+                max(open_months[0], start),
+                min(AggregationManager.next_bucket(open_months[-1], 'month') - timedelta(days=1), end),
+            )
+
+        def series(source):
+            return [
+                getattr(frozen[month], source) if month in frozen else live[source].get(month, Decimal('0.00'))
+                for month in months
+            ]
+
+        sales, services, purchases, expenses = (series(source) for source in self.SOURCES)
+        zeros = [Decimal('0.00')] * len(months)
+        purchase_returns = sales_returns = zeros
+
+        gross_profit = [s + srv + pr - p for s, srv, pr, p in zip(sales, services, purchase_returns, purchases)]
+        return {
+            'months': months,
+            'frozen_months': [month for month in months if month in frozen],
+            'has_data_in_range': has_data,
+            'custom_date_range': custom,
+            'sales': sales,
+            'services': services,
+            'purchase_returns': purchase_returns,
+            'gross_profit': gross_profit,
+            'purchases': purchases,
+            'expenses': expenses,
+            'sales_returns': sales_returns,
+            'total_expense': [p + exp + sr for p, exp, sr in zip(purchases, expenses, sales_returns)],
+            'net_profit': [gp - exp for gp, exp in zip(gross_profit, expenses)],
+        }
+
+    @property
+    def columns(self):
+        return [Column('', 'line')] + [
+            Column(month.strftime('%b %Y'), month.isoformat()) for month in self.series()['months']
+        ]
+
+    def rows(self):
+        series = self.series()
+        return [(label, *series[key]) for key, label in self.LINES]
+
+    def export(self, request, fmt):
+        write = {'excel': ExportManager.excel, 'csv': ExportManager.csv, 'pdf': ExportManager.pdf}[fmt]
+        return write(self.rows(), self.columns, self.basename())
+
+
+REPORTS = {
+    report.name: report
+    for report in (
+        SalesReport,
+        BestSellersReport,
+        PurchaseReport,
+        InventoryReport,
+        ExpenseReport,
+        OpeningInventoryReport,
+    )
+}
+
+
+def report_export_source(params):
+    """
+    Export source for background jobs: `params` are a dataset's params(),
+    naming the report.
+    """
+    params = dict(params)
+    dataset = REPORTS[params.pop('report')].from_params(params)
+    return dataset.queryset(), dataset.columns
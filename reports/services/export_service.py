@@ -0,0 +1,261 @@
+import csv
+import io
+import tempfile
+import zlib
+from datetime import datetime
+from decimal import Decimal
+from itertools import chain, islice
+
+from django.db.models import QuerySet
+from django.http import FileResponse, StreamingHttpResponse
+from openpyxl import Workbook
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4, landscape
+from reportlab.pdfbase.pdfdoc import PDFArray, PDFName, PDFStream
+from reportlab.pdfgen.canvas import Canvas
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle
+
+
+class Column:
+    """
+    One export column: a header, the field path read with values_list
+    (a model field, lookup like 'customer__name', or an annotation) and an
+    optional function that turns the raw value into the cell value.
+    """
+    __slots__ = ('header', 'field', 'formatter')
+
+    def __init__(self, header, field, formatter=None):
+        self.header = header
+        self.field = field
+        self.formatter = formatter
+
+
+def text(value):
+    return '' if value is None else str(value)
+
+
+def iso_date(value):
+    return value.strftime('%Y-%m-%d') if value else ''
+
+
+def active(value):
+    return 'Active' if value else 'Inactive'
+
+
+def report_title(basename):
+    return basename.replace('-', ' ').replace('_', ' ').title()
+
+
+class _Echo:
+    """
+    File-like object whose write() hands back the line, so csv.writer can
+    feed a streaming response without buffering.
+    """
+    def write(self, value):
+        return value
+
+
+class _FlowableFeed(list):
+    """
+    Flowable list for SimpleDocTemplate.build, which consumes it from the
+    front and checks len() before each step. It is refilled from `source`
+    one flowable at a time, so only the page being laid out is in memory.
+    """
+    def __init__(self, source):
+        super().__init__()
+        self.source = source
+
+    def __len__(self):
+        if not super().__len__():
+            flowable = next(self.source, None)
+            if flowable is not None:
+                self.append(flowable)
+        return super().__len__()
+
+
+class _CompactCanvas(Canvas):
+    """
+    reportlab keeps every finished page's content stream as text until
+    save(). Deflating each page as soon as it is finished keeps what a
+    long document holds in memory to a few KB per page.
+    """
+    def showPage(self):
+        super().showPage()
+        page = self._doc.Pages.pages[-1]
+        if page.stream:
+            contents = PDFStream(content=zlib.compress(page.stream.encode('utf8')))
+            contents.dictionary['Filter'] = PDFArray([PDFName('FlateDecode')])
+            page.Contents = contents
+            page.stream = None
+
+
+class ExportManager:
+    """
+    Streams list-view exports in constant memory. Rows are read with
+    values_list(...).iterator() in chunks, so only the exported columns
+    are fetched and no model instances are built. XLSX goes through an
+    openpyxl write-only workbook saved to a temporary file; CSV is written
+    row by row into a StreamingHttpResponse; PDF flows one page-sized
+    table at a time through reportlab platypus.
+    """
+    CHUNK_SIZE = 2000
+
+    PDF_MARGIN = 36
+    PDF_FONT_SIZE = 7
+    PDF_ROW_HEIGHT = 12
+
+    @classmethod
+    def rows(cls, source, columns, progress=None):
+        """
+        Yield each row as a list of cell values. `source` is a queryset,
+        read with values_list, or an iterable of tuples in column order.
+        `progress`, if given, is called with the running row count after
+        every chunk.
+        """
+        formatters = [column.formatter for column in columns]
+        if isinstance(source, QuerySet):
+            source = source.values_list(*[column.field for column in columns]).iterator(chunk_size=cls.CHUNK_SIZE)
+        count = 0
+        for row in source:
+            yield [fmt(value) if fmt else value for fmt, value in zip(formatters, row)]
+            count += 1
+            if progress and count % cls.CHUNK_SIZE == 0:
+                progress(count)
+        if progress:
+            progress(count)
+
+    @classmethod
+    def write_excel(cls, queryset, columns, output, progress=None, title=None):
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet(title[:31] if title else None)
+        sheet.append([column.header for column in columns])
+        for row in cls.rows(queryset, columns, progress):
+            sheet.append(row)
+        workbook.save(output)
+
+    @classmethod
+    def write_csv(cls, queryset, columns, output, progress=None, title=None):
+        """
+        Write to a binary file object.
+        """
+        stream = io.TextIOWrapper(output, encoding='utf-8', newline='')
+        writer = csv.writer(stream)
+        writer.writerow([column.header for column in columns])
+        writer.writerows(cls.rows(queryset, columns, progress))
+        stream.detach()
+
+    @classmethod
+    def write_pdf(cls, queryset, columns, output, progress=None, title=None):
+        cls.render_pdf(
+            [column.header for column in columns],
+            cls.rows(queryset, columns, progress),
+            output,
+            title,
+        )
+
+    @classmethod
+    def render_pdf(cls, headers, rows, output, title=None):
+        """
+        Lay `rows` (any iterable of cell lists) out as fixed-height tables
+        of exactly one page each, fed to platypus lazily, so memory stays
+        flat however many rows there are. Cells are truncated to their
+        column width; the title and page numbers are drawn in the margins.
+        """
+        pagesize = landscape(A4) if len(headers) > 6 else A4
+        margin = cls.PDF_MARGIN
+        doc = SimpleDocTemplate(
+            output,
+            pagesize=pagesize,
+            leftMargin=margin,
+            rightMargin=margin,
+            topMargin=margin,
+            bottomMargin=margin,
+            title=title or '',
+            pageCompression=1,
+        )
+        # The frame pads 6pt on every side
+        width = doc.width - 12
+        rows_per_page = int((doc.height - 12) // cls.PDF_ROW_HEIGHT) - 1
+        column_width = width / max(len(headers), 1)
+        max_chars = max(int(column_width / (cls.PDF_FONT_SIZE * 0.55)), 4)
+        header = [cls._pdf_cell(value, max_chars) for value in headers]
+        generated = datetime.now().strftime('%Y-%m-%d %H:%M')
+
+        def decorate(canvas, doc):
+            canvas.saveState()
+            canvas.setFont('Helvetica-Bold', 10)
+            canvas.drawString(margin, pagesize[1] - margin + 12, title or '')
+            canvas.setFont('Helvetica', 7)
+            canvas.drawRightString(pagesize[0] - margin, pagesize[1] - margin + 12, generated)
+            canvas.drawCentredString(pagesize[0] / 2, margin / 2, f'Page {doc.page}')
+            canvas.restoreState()
+
+        def pages():
+            remaining = iter(rows)
+            style = None
+            while True:
+                page = list(islice(remaining, rows_per_page))
+                if style is None:
+                    style = cls._pdf_style(page[0] if page else [])
+                elif not page:
+                    return
+                yield Table(
+                    [header] + [[cls._pdf_cell(value, max_chars) for value in row] for row in page],
+                    colWidths=[column_width] * len(headers),
+                    rowHeights=cls.PDF_ROW_HEIGHT,
+                    repeatRows=1,
+                    style=style,
+                )
+                if len(page) < rows_per_page:
+                    return
+
+        doc.build(_FlowableFeed(pages()), onFirstPage=decorate, onLaterPages=decorate, canvasmaker=_CompactCanvas)
+
+    @staticmethod
+    def _pdf_cell(value, max_chars):
+        value = '' if value is None else str(value)
+        if len(value) > max_chars:
+            return value[:max_chars - 1] + '\u2026'
+        return value
+
+    @classmethod
+    def _pdf_style(cls, sample):
+        commands = [
+            ('FONT', (0, 0), (-1, -1), 'Helvetica', cls.PDF_FONT_SIZE),
+            ('FONT', (0, 0), (-1, 0), 'Helvetica-Bold', cls.PDF_FONT_SIZE),
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#f2f2f2')),
+            ('LINEBELOW', (0, 0), (-1, 0), 0.5, colors.grey),
+            ('LINEBELOW', (0, 1), (-1, -1), 0.25, colors.HexColor('#dddddd')),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('TOPPADDING', (0, 0), (-1, -1), 1),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 1),
+        ]
+        for index, value in enumerate(sample):
+            if isinstance(value, (int, float, Decimal)) and not isinstance(value, bool):
+                commands.append(('ALIGN', (index, 0), (index, -1), 'RIGHT'))
+        return TableStyle(commands)
+
+    @classmethod
+    def excel(cls, queryset, columns, basename):
+        output = tempfile.TemporaryFile()
+        cls.write_excel(queryset, columns, output)
+        output.seek(0)
+        return FileResponse(output, as_attachment=True, filename=f'{basename}.xlsx')
+
+    @classmethod
+    def csv(cls, queryset, columns, basename):
+        writer = csv.writer(_Echo())
+        lines = chain([[column.header for column in columns]], cls.rows(queryset, columns))
+        response = StreamingHttpResponse(
+            (writer.writerow(row) for row in lines),
+            content_type='text/csv',
+        )
+        response['Content-Disposition'] = f'attachment; filename="{basename}.csv"'
+        return response
+
+    @classmethod
+    def pdf(cls, queryset, columns, basename, title=None):
+        output = tempfile.TemporaryFile()
+        cls.write_pdf(queryset, columns, output, title=title or report_title(basename))
+        output.seek(0)
+        return FileResponse(output, as_attachment=True, filename=f'{basename}.pdf')
@@ -0,0 +1,187 @@
+import hashlib
+import json
+import logging
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.http import JsonResponse
+from django.shortcuts import redirect
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from reports.models import ExportJob
+from reports.services.export_service import ExportManager, report_title
+
+
+logger = logging.getLogger(__name__)
+
+
+class ExportJobManager:
+    """
+    Runs exports as background jobs. A view enqueues the export's kind,
+    format and filters and answers with the job id; `manage.py
+    run_export_jobs` claims queued jobs, writes the artifact under
+    EXPORT_ROOT and reports progress as it goes. Identical requests share
+    a job until its artifact expires.
+
+    A kind names an export source: a function taking the job params and
+    returning (queryset, columns) for ExportManager.
+    """
+    SOURCES = {
+        'orders': 'sales.utils.orders_export_source',
+        'products': 'inventory.utils.products_export_source',
+        'report': 'reports.services.dataset_service.report_export_source',
+    }
+    FORMATS = {
+        'excel': ('xlsx', ExportManager.write_excel),
+        'csv': ('csv', ExportManager.write_csv),
+        'pdf': ('pdf', ExportManager.write_pdf),
+    }
+
+    @staticmethod
+    def ttl():
+        return timedelta(seconds=settings.EXPORT_JOB_TTL)
+
+    @staticmethod
+    def path(job):
+        return os.path.join(settings.EXPORT_ROOT, job.file)
+
+    @staticmethod
+    def filter_hash(kind, fmt, params):
+        payload = json.dumps([kind, fmt, params], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    @classmethod
+    def enqueue(cls, kind, fmt, params, basename, user=None):
+        """
+        Return the job for this export: a live artifact or in-flight job
+        of the same user with the same filters if there is one, else a new
+        queued job. Jobs are not shared between users, since each may only
+        download their own.
+        """
+        if kind not in cls.SOURCES or fmt not in cls.FORMATS:
+            raise ValueError(f"Unknown export {kind!r} as {fmt!r}.")
+        params = {key: value for key, value in params.items() if value not in (None, '')}
+        filter_hash = cls.filter_hash(kind, fmt, params)
+        owner = user if user and user.is_authenticated else None
+        now = timezone.now()
+
+        Status = ExportJob.Status
+        existing = (
+            ExportJob.objects.filter(filter_hash=filter_hash, requested_by=owner)
+                             .filter(
+                                 Q(status__in=[Status.QUEUED, Status.RUNNING], created_at__gt=now - cls.ttl())
+                                 | Q(status=Status.DONE, expires_at__gt=now)
+                             )
+                             .order_by('-created_at')
+                             .first()
+        )
+        if existing and (existing.status != Status.DONE or os.path.exists(cls.path(existing))):
+            return existing
+
+        return ExportJob.objects.create(
+            kind=kind,
+            format=fmt,
+            params=params,
+            basename=basename,
+            filter_hash=filter_hash,
+            requested_by=owner,
+        )
+
+    @staticmethod
+    def claim():
+        """
+        Mark the oldest queued job as running and return it, or None.
+        The conditional update lets several workers share the queue.
+        """
+        queued = ExportJob.objects.filter(status=ExportJob.Status.QUEUED)
+        for pk in queued.order_by('created_at').values_list('pk', flat=True)[:5]:
+            claimed = ExportJob.objects.filter(pk=pk, status=ExportJob.Status.QUEUED).update(
+                status=ExportJob.Status.RUNNING,
+                started_at=timezone.now(),
+            )
+            if claimed:
+                return ExportJob.objects.get(pk=pk)
+        return None
+
+    @classmethod
+    def run(cls, job):
+        """
+        Generate the artifact for a claimed job. The file is written under
+        a temporary name and renamed once complete, so a download never
+        sees a partial file.
+        """
+        extension, write = cls.FORMATS[job.format]
+        job.file = f'{job.pk}.{extension}'
+        final = cls.path(job)
+        partial = f'{final}.part'
+        os.makedirs(settings.EXPORT_ROOT, exist_ok=True)
+
+        def progress(count):
+            ExportJob.objects.filter(pk=job.pk).update(progress=count)
+
+        try:
+            queryset, columns = import_string(cls.SOURCES[job.kind])(job.params)
+            job.total = queryset.count()
+            ExportJob.objects.filter(pk=job.pk).update(total=job.total)
+            with open(partial, 'wb') as output:
+                write(queryset, columns, output, progress, title=report_title(job.basename))
+            os.replace(partial, final)
+        except Exception as e:
+            logger.exception("Export job %s failed", job.pk)
+            if os.path.exists(partial):
+                os.remove(partial)
+            job.status = ExportJob.Status.FAILED
+            job.error = str(e)
+            job.file = ''
+        else:
+            job.status = ExportJob.Status.DONE
+            job.progress = job.total
+
+        job.finished_at = timezone.now()
+        job.expires_at = job.finished_at + cls.ttl()
+        job.save(update_fields=['status', 'error', 'file', 'total', 'progress', 'finished_at', 'expires_at'])
+        return job
+
+    @classmethod
+    def purge_expired(cls):
+        """
+        Delete expired jobs and their artifacts. Returns the number removed.
+        """
+        expired = ExportJob.objects.filter(expires_at__lte=timezone.now())
+        for job in expired.exclude(file=''):
+            try:
+                os.remove(cls.path(job))
+            except FileNotFoundError:
+                pass
+        return expired.delete()[0]
+
+    @staticmethod
+    def describe(job):
+        return {
+            'id': str(job.pk),
+            'status': job.status,
+            'progress': job.progress,
+            'total': job.total,
+            'error': job.error,
+            'status_url': reverse('reports:export-job', args=[job.pk]),
+            'download_url': (
+                reverse('reports:export-download', args=[job.pk])
+                if job.status == ExportJob.Status.DONE else None
+            ),
+        }
+
+    @classmethod
+    def respond(cls, request, kind, fmt, params, basename):
+        """
+        Enqueue an export from a list view. AJAX callers get the job as
+        JSON; browsers are sent to the job page, which polls until the
+        file is ready.
+        """
+        job = cls.enqueue(kind, fmt, params, basename, user=request.user)
+        if request.headers.get('x-requested-with') == 'XMLHttpRequest':
+            return JsonResponse(cls.describe(job), status=202)
+        return redirect('reports:export-job', job.pk)
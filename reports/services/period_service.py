@@ -0,0 +1,72 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from reports.models import PeriodSnapshot
+from reports.services.aggregation import AggregationManager
+from reports.services.dataset_service import ProfitLossReport
+
+
+class PeriodCloseManager:
+    """
+    Month-end close for profit and loss. Closing a month freezes its
+    sales, services, purchases, expenses and net profit into a
+    PeriodSnapshot, so the P&L report stops recomputing it; reopening
+    deletes the snapshot and the month is computed live again.
+    """
+
+    @staticmethod
+    def month_end(month):
+        return AggregationManager.next_bucket(month, 'month') - timedelta(days=1)
+
+    @staticmethod
+    def last_closable():
+        """
+        First day of the latest month that is over.
+        """
+        return (timezone.localdate().replace(day=1) - timedelta(days=1)).replace(day=1)
+
+    @classmethod
+    def close(cls, month, user=None):
+        """
+        Freeze `month` (any day in it). Raises ValueError for a month that
+        is not over yet or is already closed.
+        """
+        month = month.replace(day=1)
+        if month > cls.last_closable():
+            raise ValueError("Only months that are over can be closed.")
+
+        totals = ProfitLossReport.live_totals(month, cls.month_end(month))
+        values = {source: totals[source].get(month, Decimal('0.00')) for source in ProfitLossReport.SOURCES}
+        values['net_profit'] = values['sales'] + values['services'] - values['purchases'] - values['expenses']
+        try:
+            with transaction.atomic():
+                return PeriodSnapshot.objects.create(month=month, closed_by=user, **values)
+        except IntegrityError:
+            raise ValueError(f"{month:%b %Y} is already closed.")
+
+    @classmethod
+    def close_all(cls, user=None):
+        """
+        Close every month that is over and still open, from the first month
+        with data. Returns the new snapshots.
+        """
+        span = ProfitLossReport().data_span()
+        if span is None:
+            return []
+        closed = set(PeriodSnapshot.objects.values_list('month', flat=True))
+        return [
+            cls.close(month, user)
+            for month in AggregationManager.buckets(span[0], cls.month_end(cls.last_closable()), 'month')
+            if month not in closed
+        ]
+
+    @staticmethod
+    def reopen(month):
+        """
+        Delete the snapshot of `month`. Returns whether it was closed.
+        """
+        deleted, _ = PeriodSnapshot.objects.filter(month=month.replace(day=1)).delete()
+        return bool(deleted)
@@ -0,0 +1,31 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from finance.models import Expense
+from inventory.models import Product
+from purchases.models import Purchase, PurchaseItem
+from reports.models import PeriodSnapshot
+from reports.services.cache_service import ReportCacheManager
+from sales.models import Invoice, Order, OrderItem, Payment
+
+
+@receiver(post_save, sender=Order)
+@receiver(post_delete, sender=Order)
+@receiver(post_save, sender=OrderItem)
+@receiver(post_delete, sender=OrderItem)
+@receiver(post_save, sender=Invoice)
+@receiver(post_delete, sender=Invoice)
+@receiver(post_save, sender=Payment)
+@receiver(post_delete, sender=Payment)
+@receiver(post_save, sender=Purchase)
+@receiver(post_delete, sender=Purchase)
+@receiver(post_save, sender=PurchaseItem)
+@receiver(post_delete, sender=PurchaseItem)
+@receiver(post_save, sender=Expense)
+@receiver(post_delete, sender=Expense)
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=PeriodSnapshot)
+@receiver(post_delete, sender=PeriodSnapshot)
+def report_source_changed(sender, **kwargs):
+    ReportCacheManager.bump(sender._meta.label)
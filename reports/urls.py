@@ -12,5 +12,8 @@ urlpatterns = [
     path('sold-stock/',views.sold_stock,name='sold-stock'),
     path('expense-report/',views.expense_report,name='expense-report'),
     path('profit-loss-report/',views.profit_loss_report,name='profit-loss-report'),
-    path('opening-inventory/',views.opening_inventory_report,name='opening-inventory-report')
+    path('profit-loss-report/close/',views.close_period,name='close-period'),
+    path('opening-inventory/',views.opening_inventory_report,name='opening-inventory-report'),
+    path('exports/<uuid:job_id>/',views.export_job,name='export-job'),
+    path('exports/<uuid:job_id>/download/',views.export_download,name='export-download'),
 ]
\ No newline at end of file
@@ -1,21 +1,32 @@
 import io
-from django.http import FileResponse, HttpResponse
+from django.http import FileResponse
 from openpyxl import Workbook
 
-def export_report_excel(qs, basename='report'):
-    wb = Workbook()
-    ws = wb.active
-    ws.append(['Item', 'Value', 'Date'])
+from reports.services.export_service import ExportManager
+
+REPORT_HEADERS = ['Item', 'Value', 'Date']
+
+def _report_rows(qs):
     for item in qs:
-        ws.append([
+        yield [
             str(item),
             getattr(item, 'value', ''),
             getattr(item, 'date', '').strftime('%Y-%m-%d') if hasattr(item, 'date') else '',
-        ])
+        ]
+
+def export_report_excel(qs, basename='report'):
+    wb = Workbook()
+    ws = wb.active
+    ws.append(REPORT_HEADERS)
+    for row in _report_rows(qs):
+        ws.append(row)
     buffer = io.BytesIO()
     wb.save(buffer)
     buffer.seek(0)
     return FileResponse(buffer, as_attachment=True, filename=f'{basename}.xlsx')
 
 def export_report_pdf(qs, basename='report'):
-    return HttpResponse('PDF export temporarily disabled', status=503)
+    buffer = io.BytesIO()
+    ExportManager.render_pdf(REPORT_HEADERS, _report_rows(qs), buffer, title=basename)
+    buffer.seek(0)
+    return FileResponse(buffer, as_attachment=True, filename=f'{basename}.pdf')
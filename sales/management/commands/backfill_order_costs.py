@@ -0,0 +1,32 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from sales.services.cost_service import CostManager
+from sales.services.summary_service import ProductSalesManager
+
+
+class Command(BaseCommand):
+    help = (
+        'Snapshot cost_price on order lines recorded without one, from purchase history, and refresh product '
+        'sales. To recost every line at FIFO, run rebuild_cost_layers.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', type=str, help='First sale day to backfill (YYYY-MM-DD)')
+        parser.add_argument('--end', type=str, help='Last sale day to backfill (YYYY-MM-DD)')
+
+    def handle(self, *args, **options):
+        try:
+            start = date.fromisoformat(options['start']) if options.get('start') else None
+            end = date.fromisoformat(options['end']) if options.get('end') else None
+        except ValueError:
+            raise CommandError('Dates must be in YYYY-MM-DD format.')
+
+        count, first, last = CostManager.backfill(start, end)
+        if not count:
+            self.stdout.write('No order lines to backfill.')
+            return
+        self.stdout.write(self.style.SUCCESS(f'Set cost on {count} order lines.'))
+        rows = ProductSalesManager.rebuild(first, last)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {rows} product daily sales rows.'))
@@ -0,0 +1,25 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from sales.services.summary_service import ProductSalesManager, SalesSummaryManager
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the DailySalesSummary and ProductDailySales rollups from orders, for all history or a date range.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', type=str, help='First day to rebuild (YYYY-MM-DD)')
+        parser.add_argument('--end', type=str, help='Last day to rebuild (YYYY-MM-DD)')
+
+    def handle(self, *args, **options):
+        try:
+            start = date.fromisoformat(options['start']) if options.get('start') else None
+            end = date.fromisoformat(options['end']) if options.get('end') else None
+        except ValueError:
+            raise CommandError('Dates must be in YYYY-MM-DD format.')
+
+        rows = SalesSummaryManager.rebuild(start, end)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {rows} daily sales summary rows.'))
+        rows = ProductSalesManager.rebuild(start, end)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {rows} product daily sales rows.'))
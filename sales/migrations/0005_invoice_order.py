@@ -0,0 +1,36 @@
+# Generated by Django 5.1.3 on 2026-10-17 03:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Concat
+
+
+def link_invoices_to_orders(apps, schema_editor):
+    """
+    POS invoices are numbered INV-<order.reference>; attach existing ones to their order.
+    """
+    Invoice = apps.get_model('sales', 'Invoice')
+    Order = apps.get_model('sales', 'Order')
+    matching_order = (
+        Order.objects
+             .annotate(invoice_no=Concat(Value('INV-'), 'reference', output_field=models.CharField()))
+             .filter(invoice_no=OuterRef('invoice_no'))
+             .values('id')[:1]
+    )
+    Invoice.objects.filter(order__isnull=True).update(order_id=Subquery(matching_order))
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0004_alter_order_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='invoice',
+            name='order',
+            field=models.OneToOneField(blank=True, help_text='Order whose lines this invoice bills; such invoices have no InvoiceItems', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='invoice', to='sales.order'),
+        ),
+        migrations.RunPython(link_invoices_to_orders, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.1.3 on 2026-10-17 03:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0005_invoice_order'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=32)),
+                ('day', models.DateField()),
+                ('last_value', models.PositiveBigIntegerField(default=0)),
+            ],
+            options={
+                'unique_together': {('key', 'day')},
+            },
+        ),
+    ]
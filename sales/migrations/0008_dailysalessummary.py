@@ -0,0 +1,72 @@
+# Generated by Django 5.1.3 on 2026-10-17 03:28
+
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def backfill_summary(apps, schema_editor):
+    """
+    Roll up existing orders; `manage.py rebuild_sales_summary` does the same later on.
+    """
+    Order = apps.get_model('sales', 'Order')
+    OrderItem = apps.get_model('sales', 'OrderItem')
+    DailySalesSummary = apps.get_model('sales', 'DailySalesSummary')
+    dims = ['date', 'source', 'payment_method', 'status', 'payment_status']
+
+    lines = {
+        tuple(row[f'order__{dim}'] for dim in dims): row
+        for row in OrderItem.objects.order_by()
+                                    .values(*[f'order__{dim}' for dim in dims])
+                                    .annotate(tax=Sum('tax_amount'), discount=Sum('discount'))
+    }
+    rows = []
+    for row in (
+        Order.objects.order_by()
+                     .values(*dims)
+                     .annotate(count=Count('id'), gross=Sum('grand_total'), paid=Sum('paid_amount'), due=Sum('due_amount'))
+    ):
+        key = tuple(row[dim] for dim in dims)
+        line = lines.get(key, {})
+        rows.append(DailySalesSummary(
+            day=row['date'], source=row['source'], payment_method=row['payment_method'],
+            status=row['status'], payment_status=row['payment_status'],
+            order_count=row['count'],
+            gross_sales=row['gross'] or Decimal('0.00'),
+            paid_amount=row['paid'] or Decimal('0.00'),
+            due_amount=row['due'] or Decimal('0.00'),
+            tax=line.get('tax') or Decimal('0.00'),
+            discount=line.get('discount') or Decimal('0.00'),
+        ))
+    DailySalesSummary.objects.bulk_create(rows, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0007_checkoutkey'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySalesSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('source', models.CharField(max_length=32)),
+                ('payment_method', models.CharField(max_length=10)),
+                ('status', models.CharField(max_length=10)),
+                ('payment_status', models.CharField(max_length=10)),
+                ('order_count', models.IntegerField(default=0)),
+                ('gross_sales', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('paid_amount', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('due_amount', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('tax', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('discount', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+            ],
+            options={
+                'unique_together': {('day', 'source', 'payment_method', 'status', 'payment_status')},
+            },
+        ),
+        migrations.RunPython(backfill_summary, migrations.RunPython.noop),
+    ]
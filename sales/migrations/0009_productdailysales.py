@@ -0,0 +1,70 @@
+# Generated by Django 5.1.3 on 2026-10-17 03:33
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import DecimalField, F, Sum
+
+
+def backfill_product_sales(apps, schema_editor):
+    """
+    Roll up existing completed order lines; `manage.py rebuild_sales_summary` does the same later on.
+    """
+    OrderItem = apps.get_model('sales', 'OrderItem')
+    ProductDailySales = apps.get_model('sales', 'ProductDailySales')
+    rows = (
+        OrderItem.objects.filter(order__status='completed')
+                         .order_by()
+                         .values('order__date', 'product_id')
+                         .annotate(
+                             qty=Sum('quantity'),
+                             revenue=Sum('total_cost'),
+                             tax=Sum('tax_amount'),
+                             disc=Sum('discount'),
+                             cost=Sum(F('quantity') * F('product__purchase_price'), output_field=DecimalField()),
+                         )
+    )
+    ProductDailySales.objects.bulk_create(
+        [
+            ProductDailySales(
+                day=row['order__date'],
+                product_id=row['product_id'],
+                quantity=row['qty'] or 0,
+                revenue=row['revenue'] or Decimal('0.00'),
+                tax=row['tax'] or Decimal('0.00'),
+                discount=row['disc'] or Decimal('0.00'),
+                cost=row['cost'] or Decimal('0.00'),
+            )
+            for row in rows
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0010_catalogchange'),
+        ('sales', '0008_dailysalessummary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductDailySales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('quantity', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('tax', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('discount', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('cost', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_sales', to='inventory.product')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['product', 'day'], name='sales_produ_product_88de93_idx')],
+                'unique_together': {('day', 'product')},
+            },
+        ),
+        migrations.RunPython(backfill_product_sales, migrations.RunPython.noop),
+    ]
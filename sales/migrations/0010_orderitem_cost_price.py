@@ -0,0 +1,18 @@
+# Generated by Django 5.1.3 on 2026-10-17 03:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0009_productdailysales'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='orderitem',
+            name='cost_price',
+            field=models.DecimalField(blank=True, decimal_places=2, help_text='Product cost per unit when the sale was recorded', max_digits=10, null=True),
+        ),
+    ]
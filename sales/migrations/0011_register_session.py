@@ -0,0 +1,51 @@
+# Generated by Django 5.1.3 on 2026-10-17 04:51
+
+import django.db.models.deletion
+import django.utils.timezone
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0010_orderitem_cost_price'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RegisterSession',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('open', 'Open'), ('closed', 'Closed')], default='open', max_length=10)),
+                ('opened_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('closed_at', models.DateTimeField(blank=True, null=True)),
+                ('opening_float', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('order_count', models.IntegerField(default=0)),
+                ('sales_total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('cost_total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('discount_total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('paid_total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('cash_total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('mpesa_total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('expense_total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('expected_cash', models.DecimalField(blank=True, decimal_places=2, max_digits=14, null=True)),
+                ('counted_cash', models.DecimalField(blank=True, decimal_places=2, max_digits=14, null=True)),
+                ('cashier', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='register_sessions', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-opened_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='register_session',
+            field=models.ForeignKey(blank=True, help_text='Shift of the cashier who rang the sale up', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='orders', to='sales.registersession'),
+        ),
+        migrations.AddConstraint(
+            model_name='registersession',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'open')), fields=('cashier',), name='one_open_register_per_cashier'),
+        ),
+    ]
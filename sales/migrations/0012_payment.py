@@ -0,0 +1,66 @@
+# Generated by Django 5.1.3 on 2026-10-17 04:55
+
+from datetime import datetime, time
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def open_ledger(apps, schema_editor):
+    """
+    One payment per order already paid, dated the order's day, for its
+    paid_amount up to the order total (change handed back is not takings).
+    """
+    Order = apps.get_model('sales', 'Order')
+    Payment = apps.get_model('sales', 'Payment')
+    tz = django.utils.timezone.get_current_timezone()
+    batch = []
+    paid = Order.objects.filter(paid_amount__gt=0).values_list(
+        'id', 'payment_method', 'paid_amount', 'grand_total', 'date', 'biller_id',
+    )
+    for order_id, method, paid_amount, grand_total, day, biller_id in paid.iterator(chunk_size=1000):
+        amount = min(paid_amount, grand_total)
+        if amount <= 0:
+            continue
+        batch.append(Payment(
+            order_id=order_id,
+            method=method,
+            amount=amount,
+            received_by_id=biller_id,
+            created_at=datetime.combine(day, time.min, tzinfo=tz),
+        ))
+        if len(batch) >= 1000:
+            Payment.objects.bulk_create(batch)
+            batch = []
+    Payment.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0011_register_session'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Payment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('method', models.CharField(choices=[('cash', 'Cash'), ('mpesa', 'M-Pesa')], max_length=16)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('reference', models.CharField(blank=True, default='', help_text='e.g. M-Pesa receipt number', max_length=64)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='payments', to='sales.order')),
+                ('received_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='payments_received', to=settings.AUTH_USER_MODEL)),
+                ('register_session', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='payments', to='sales.registersession')),
+            ],
+            options={
+                'ordering': ['created_at', 'id'],
+                'indexes': [models.Index(fields=['created_at', 'method'], name='sales_payme_created_a0ed6b_idx')],
+            },
+        ),
+        migrations.RunPython(open_ledger, migrations.RunPython.noop),
+    ]
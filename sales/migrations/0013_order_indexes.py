@@ -0,0 +1,33 @@
+# Generated by Django 5.1.3 on 2026-10-17 05:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0012_payment'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='mpesatransaction',
+            name='sales_mpesa_status_ee6041_idx',
+        ),
+        migrations.AddIndex(
+            model_name='mpesatransaction',
+            index=models.Index(fields=['status', 'created_at'], name='sales_mpesa_status_4aae19_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['status', 'date'], name='sales_order_status_b1c59c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['source', 'date'], name='sales_order_source_2de524_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['date'], name='sales_order_date_d34406_idx'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.1.3 on 2026-10-17 05:35
+
+from decimal import Decimal
+
+import django.core.serializers.json
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def store_payment_totals(apps, schema_editor):
+    """
+    Freeze the per-method takings of the sessions already closed.
+    """
+    RegisterSession = apps.get_model('sales', 'RegisterSession')
+    Payment = apps.get_model('sales', 'Payment')
+    totals = {}
+    rows = (
+        Payment.objects.filter(register_session__status='closed')
+        .order_by()
+        .values('register_session_id', 'method')
+        .annotate(total=Sum('amount'))
+    )
+    for row in rows:
+        totals.setdefault(row['register_session_id'], {})[row['method']] = row['total'].quantize(Decimal('0.00'))
+    for session in RegisterSession.objects.filter(status='closed').only('pk'):
+        session.payment_totals = totals.get(session.pk, {})
+        session.save(update_fields=['payment_totals'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0013_order_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='registersession',
+            name='payment_totals',
+            field=models.JSONField(blank=True, encoder=django.core.serializers.json.DjangoJSONEncoder, null=True),
+        ),
+        migrations.RunPython(store_payment_totals, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,7 @@
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
+from django.db.models import F, Sum, Value
+from django.db.models.functions import Coalesce
 from django.conf import settings
 from decimal import Decimal
 from people.models import *
@@ -31,7 +34,7 @@ class Order(models.Model):
         related_name='orders'
     )
     reference      = models.CharField(max_length=64, unique=True)
-    date           = models.DateField(auto_now_add=True)
+    date           = models.DateField(default=timezone.localdate)
     status         = models.CharField(
         max_length=10,
         choices=Status.choices,
@@ -62,9 +65,24 @@ class Order(models.Model):
         max_length=32,
         help_text="e.g. 'pos', 'online', 'phone', etc."
     )
+    register_session = models.ForeignKey(
+        'RegisterSession',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='orders',
+        help_text="Shift of the cashier who rang the sale up"
+    )
 
     class Meta:
         ordering = ['-date', 'reference']
+        # Reports and the dashboard filter completed orders by day, the
+        # order lists by source, and most screens by a date range
+        indexes = [
+            models.Index(fields=['status', 'date']),
+            models.Index(fields=['source', 'date']),
+            models.Index(fields=['date']),
+        ]
 
     def __str__(self):
         return f"Order {self.reference} ({self.status})"
@@ -78,6 +96,14 @@ class Order(models.Model):
         total = sum(item.total_cost for item in items)
         self.grand_total = total
         # paid_amount is presumably updated by payment logic elsewhere
+        self.set_payment_fields()
+        self.save()
+
+    def set_payment_fields(self):
+        """
+        Derive due_amount and payment_status from grand_total and paid_amount.
+        Does not save.
+        """
         self.due_amount = max(self.grand_total - self.paid_amount, Decimal('0.00'))
 
         if self.paid_amount >= self.grand_total:
@@ -87,8 +113,6 @@ class Order(models.Model):
         else:
             self.payment_status = self.PaymentStatus.UNPAID
 
-        self.save()
-
 
 class OrderItem(models.Model):
     product        = models.ForeignKey(
@@ -121,6 +145,13 @@ class OrderItem(models.Model):
         help_text="Monetary tax amount for this line"
     )
     unit_cost      = models.DecimalField(max_digits=10, decimal_places=2)
+    cost_price     = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        null=True,
+        blank=True,
+        help_text="Product cost per unit when the sale was recorded"
+    )
     quantity       = models.PositiveIntegerField(default=1)
     total_cost     = models.DecimalField(
         max_digits=12,
@@ -146,6 +177,9 @@ class OrderItem(models.Model):
         self.total_cost = (line_subtotal + self.tax_amount).quantize(Decimal('0.01'))
 
     def save(self, *args, **kwargs):
+        if self.cost_price is None and self._state.adding:
+            # Snapshot the cost now so later price edits don't rewrite profit
+            self.cost_price = self.product.purchase_price
         self.calculate_totals()
         super().save(*args, **kwargs)
         # After saving, update the parent Order totals
@@ -161,6 +195,14 @@ class Invoice(models.Model):
         CANCELED  = 'canceled',  'Canceled'
 
     invoice_no    = models.CharField(max_length=64, unique=True)
+    order         = models.OneToOneField(
+        Order,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='invoice',
+        help_text="Order whose lines this invoice bills; such invoices have no InvoiceItems"
+    )
     customer      = models.ForeignKey(
         Customer,
         on_delete=models.SET_NULL,
@@ -187,10 +229,35 @@ class Invoice(models.Model):
 
     def update_amounts(self):
         """
-        Recalculate amount, amount_due, and status based on related InvoiceItems and payments.
+        Recalculate amount, amount_due, and status based on the invoice lines and payments.
         """
-        total = sum(item.total for item in self.items.all())
-        self.amount      = total
+        self.set_amounts()
+        # Only update the status and amounts fields for efficiency
+        self.save(update_fields=['amount', 'amount_paid', 'amount_due', 'status'])
+
+    def line_total(self):
+        """
+        Sum of (cost * quantity) - discount over the invoice lines. Invoices
+        generated from an order read the order's lines instead of copies.
+        """
+        if self.order_id:
+            lines = OrderItem.objects.filter(order_id=self.order_id)
+            cost = F('unit_cost')
+        else:
+            lines = self.items.all()
+            cost = F('cost')
+        return lines.aggregate(
+            total=Coalesce(
+                Sum(cost * F('quantity') - F('discount'), output_field=models.DecimalField()),
+                Value(Decimal('0.00'), output_field=models.DecimalField()),
+            )
+        )['total']
+
+    def set_amounts(self):
+        """
+        Derive amount, amount_due and status. Does not save.
+        """
+        self.amount      = Decimal(self.line_total()).quantize(Decimal('0.01'))
         self.amount_due  = max(self.amount - self.amount_paid, Decimal('0.00'))
 
         today = timezone.now().date()
@@ -202,9 +269,6 @@ class Invoice(models.Model):
         else:
             self.status = self.Status.OPEN
 
-        # Only update the status and amounts fields for efficiency
-        self.save(update_fields=['amount', 'amount_paid', 'amount_due', 'status'])
-
 
 class InvoiceItem(models.Model):
     invoice   = models.ForeignKey(
@@ -291,8 +355,192 @@ class MpesaTransaction(models.Model):
         indexes = [
             models.Index(fields=['checkout_request_id']),
             models.Index(fields=['merchant_request_id']),
-            models.Index(fields=['status']),
+            # Pending transactions older than the timeout
+            models.Index(fields=['status', 'created_at']),
         ]
 
     def __str__(self):
         return f"M-Pesa Transaction {self.checkout_request_id} - {self.status}"
+
+
+class DocumentSequence(models.Model):
+    """
+    Per-prefix, per-day counter used to number orders, invoices and purchases.
+    One row per (key, day); allocation is a single atomic increment.
+    """
+    key        = models.CharField(max_length=32)
+    day        = models.DateField()
+    last_value = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('key', 'day')
+
+    def __str__(self):
+        return f"{self.key} {self.day}: {self.last_value}"
+
+
+class CheckoutKey(models.Model):
+    """
+    Client-generated idempotency key of a POS sale. The unique index makes
+    a resent sale resolve to the order it already created.
+    """
+    key        = models.CharField(max_length=64, unique=True)
+    order      = models.OneToOneField(Order, on_delete=models.CASCADE, null=True, related_name='checkout_key')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.key
+
+
+class DailySalesSummary(models.Model):
+    """
+    Order totals rolled up per day, source, payment method, order status
+    and payment status. Kept in step with Order and OrderItem writes by
+    sales.signals (see SalesSummaryManager); rebuild from history with
+    `manage.py rebuild_sales_summary`.
+    """
+    day            = models.DateField()
+    source         = models.CharField(max_length=32)
+    payment_method = models.CharField(max_length=10)
+    status         = models.CharField(max_length=10)
+    payment_status = models.CharField(max_length=10)
+    order_count    = models.IntegerField(default=0)
+    gross_sales    = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    paid_amount    = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    due_amount     = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    tax            = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    discount       = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+
+    class Meta:
+        unique_together = ('day', 'source', 'payment_method', 'status', 'payment_status')
+
+    def __str__(self):
+        return f"{self.day} {self.source}/{self.payment_method} {self.status}: {self.gross_sales}"
+
+
+class Payment(models.Model):
+    """
+    One payment taken against an order.
+
+    The ledger is append-only: rows are never changed or deleted, and a
+    mistake is corrected by posting another payment. Order.paid_amount and
+    the order's invoice amount_paid are running sums PaymentManager keeps
+    in step with it, except for change handed back at checkout, which is
+    not recorded as takings.
+    """
+    order            = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='payments')
+    method           = models.CharField(max_length=16, choices=Order.PaymentMethod.choices)
+    amount           = models.DecimalField(max_digits=12, decimal_places=2)
+    reference        = models.CharField(max_length=64, blank=True, default='', help_text="e.g. M-Pesa receipt number")
+    received_by      = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='payments_received'
+    )
+    register_session = models.ForeignKey(
+        'RegisterSession',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='payments'
+    )
+    created_at       = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['created_at', 'id']
+        indexes = [models.Index(fields=['created_at', 'method'])]
+
+    def __str__(self):
+        return f"{self.method} {self.amount} on {self.order_id}"
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("Payments are append-only; post a correcting payment instead.")
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise ValueError("Payments are append-only; post a correcting payment instead.")
+
+
+class RegisterSession(models.Model):
+    """
+    A cashier's shift on the till, from opening float to Z-report.
+
+    The running totals are added to with F() increments as sales, payments
+    and expenses post (see RegisterManager), so reading the register is a
+    primary-key lookup. Closing freezes them together with the counted and
+    expected cash and the takings per payment method: a closed session is
+    its Z-report.
+    """
+    class Status(models.TextChoices):
+        OPEN   = 'open',   'Open'
+        CLOSED = 'closed', 'Closed'
+
+    cashier        = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.PROTECT,
+        related_name='register_sessions'
+    )
+    status         = models.CharField(max_length=10, choices=Status.choices, default=Status.OPEN)
+    opened_at      = models.DateTimeField(default=timezone.now)
+    closed_at      = models.DateTimeField(null=True, blank=True)
+    opening_float  = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'))
+    order_count    = models.IntegerField(default=0)
+    sales_total    = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    cost_total     = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    discount_total = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    paid_total     = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    cash_total     = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    mpesa_total    = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    expense_total  = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    expected_cash  = models.DecimalField(max_digits=14, decimal_places=2, null=True, blank=True)
+    counted_cash   = models.DecimalField(max_digits=14, decimal_places=2, null=True, blank=True)
+    # {method: amount} from the Payment ledger, stored on close
+    payment_totals = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+
+    class Meta:
+        ordering = ['-opened_at']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['cashier'],
+                condition=models.Q(status='open'),
+                name='one_open_register_per_cashier',
+            ),
+        ]
+
+    def __str__(self):
+        return f"Register {self.pk} {self.cashier} ({self.status})"
+
+    @property
+    def cash_in_drawer(self):
+        return self.opening_float + self.cash_total - self.expense_total
+
+    @property
+    def variance(self):
+        if self.counted_cash is None or self.expected_cash is None:
+            return None
+        return self.counted_cash - self.expected_cash
+
+
+class ProductDailySales(models.Model):
+    """
+    Completed-order lines rolled up per product and day. Kept in step with
+    Order and OrderItem writes by sales.signals (see ProductSalesManager);
+    rebuild from history with `manage.py rebuild_sales_summary`.
+    """
+    day      = models.DateField()
+    product  = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='daily_sales')
+    quantity = models.IntegerField(default=0)
+    revenue  = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    tax      = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    discount = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    cost     = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+
+    class Meta:
+        unique_together = ('day', 'product')
+        indexes = [models.Index(fields=['product', 'day'])]
+
+    def __str__(self):
+        return f"{self.day} {self.product_id}: {self.quantity}"
@@ -8,7 +8,8 @@ from decimal import Decimal
 from .models import MpesaTransaction
 from .ngrok_service import get_ngrok_callback_url, ensure_ngrok_tunnel
 import logging
-from .models import Invoice
+from .models import Invoice, Order
+from .services.payment_service import PaymentManager
 
 logger = logging.getLogger(__name__)
 
@@ -282,24 +283,33 @@ class MpesaService:
                     if paid_amount is None:
                         paid_amount = transaction_obj.amount
                     
-                    # Apply to order
-                    order.paid_amount = (order.paid_amount or Decimal('0.00')) + (paid_amount or Decimal('0.00'))
-                    order.update_totals()  # also updates payment_status and due
+                    # Ledger row, order, order-linked invoice and register in
+                    # one step; the money has already been taken, so an
+                    # overpayment is recorded rather than refused
+                    paid_amount = paid_amount or Decimal('0.00')
+                    if paid_amount > 0:
+                        PaymentManager.post(
+                            order.pk, paid_amount, Order.PaymentMethod.MPESA,
+                            reference=receipt or '',
+                            register_session_id=order.register_session_id,
+                            allow_overpayment=True,
+                        )
+                        order.refresh_from_db(fields=['paid_amount', 'due_amount', 'payment_status'])
                     
-                    # Update existing invoice amounts (no duplicate invoice creation)
+                    # Invoices not linked to the order (no duplicate invoice creation)
                     try:
-                        from .services.order_service import InvoiceManager
-                        invoice_no = f"INV-{order.reference}"
-                        invoice = Invoice.objects.filter(invoice_no=invoice_no).first()
-                        if not invoice:
-                            # If invoice somehow missing (unexpected), create safely via get_or_create pattern
-                            invoice = Invoice.objects.filter(customer=order.customer, invoice_no=invoice_no).first()
+                        from .services.sequence_service import SequenceManager
+                        if not Invoice.objects.filter(order=order).exists():
+                            # Invoices issued before the order link existed are numbered INV-<reference>
+                            invoice = Invoice.objects.filter(invoice_no=f"INV-{order.reference}").first()
                             if not invoice:
+                                # If invoice somehow missing (unexpected), create it.
                                 # Use a savepoint to avoid breaking the outer atomic in rare race
                                 try:
                                     with transaction.atomic():
                                         invoice = Invoice.objects.create(
-                                            invoice_no=invoice_no,
+                                            invoice_no=SequenceManager.next_invoice_number(),
+                                            order=order,
                                             customer=order.customer,
                                             due_date=timezone.now().date(),
                                             amount=order.grand_total,
@@ -309,17 +319,17 @@ class MpesaService:
                                         )
                                 except IntegrityError:
                                     # Another process created it; fetch existing
-                                    invoice = Invoice.objects.filter(invoice_no=invoice_no).first()
-                        if invoice:
-                            # Align invoice with order and recompute using model utility
-                            invoice.amount_paid = order.paid_amount
-                            invoice.update_amounts()
-                            logger.info(f"Applied payment to Invoice {invoice.invoice_no}: paid={invoice.amount_paid}, due={invoice.amount_due}")
+                                    invoice = Invoice.objects.filter(order=order).first()
+                            if invoice:
+                                # Align invoice with order and recompute using model utility
+                                invoice.amount_paid = order.paid_amount
+                                invoice.update_amounts()
+                                logger.info(f"Applied payment to Invoice {invoice.invoice_no}: paid={invoice.amount_paid}, due={invoice.amount_due}")
                     except Exception as inv_err:
                         logger.warning(f"Invoice update warning: {inv_err}")
                     
                     transaction_obj.applied_to_invoice = True
-                    transaction_obj.applied_amount = paid_amount or Decimal('0.00')
+                    transaction_obj.applied_amount = paid_amount
                 
                 transaction_obj.response_code = str(result_code)
                 transaction_obj.response_description = result_desc
@@ -0,0 +1,307 @@
+from decimal import Decimal, InvalidOperation
+
+from datetime import date
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from sales.models import CheckoutKey, Order, OrderItem
+from inventory.models import CostConsumption, Product
+from inventory.services.stock_service import StockManager, OutOfStockError
+from inventory.services.valuation_service import ValuationManager
+from sales.services.payment_service import PaymentManager
+from sales.services.register_service import RegisterManager
+from sales.services.sequence_service import SequenceManager
+from sales.services.summary_service import ProductSalesManager, SalesSummaryManager
+from people.models import Customer
+
+
+class CheckoutError(Exception):
+    """
+    Raised when a checkout payload cannot be turned into an order.
+    Carries the HTTP status the view should answer with and, for stock
+    shortages, the failing lines.
+    """
+    def __init__(self, message, status=400, out_of_stock=None):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+        self.out_of_stock = out_of_stock or []
+
+
+class DuplicateCheckout(CheckoutError):
+    """
+    Raised when a payload's idempotency key already produced an order.
+    `order` is that order; callers report it instead of creating another.
+    """
+    def __init__(self, order):
+        super().__init__("Order already recorded.", status=409)
+        self.order = order
+
+
+class CheckoutService:
+    """
+    Single-transaction checkout path used by the POS.
+
+    All products are resolved in one query, the lines are bulk-inserted and
+    the order totals are computed once, so the cost of a sale no longer grows
+    with the square of the basket size. Any failure rolls the whole sale back.
+    """
+
+    @staticmethod
+    def parse_lines(items):
+        """
+        Validate the raw `items` payload and return a list of dicts with
+        typed values. No database access happens here.
+        """
+        if not isinstance(items, list) or not items:
+            raise CheckoutError("Order must include at least one item.")
+
+        lines = []
+        seen = set()
+        for idx, item_data in enumerate(items):
+            if not isinstance(item_data, dict):
+                raise CheckoutError(f"Item #{idx+1} missing required fields.")
+
+            product_id     = item_data.get("product_id")
+            purchase_price = item_data.get("purchase_price")
+            discount       = item_data.get("discount", "0.00")
+            tax            = item_data.get("tax", "0.00")
+            quantity       = item_data.get("quantity")
+
+            if product_id is None or purchase_price is None or quantity is None:
+                raise CheckoutError(f"Item #{idx+1} missing required fields.")
+
+            try:
+                product_id     = int(product_id)
+                purchase_price = Decimal(str(purchase_price))
+                discount       = Decimal(str(discount))
+                tax            = Decimal(str(tax))
+                quantity       = int(quantity)
+            except (ValueError, TypeError, InvalidOperation):
+                raise CheckoutError(f"Invalid numeric value on item #{idx+1}.")
+
+            if quantity <= 0:
+                raise CheckoutError(f"Invalid numeric value on item #{idx+1}.")
+            if product_id in seen:
+                raise CheckoutError(f"Product with ID {product_id} appears more than once.")
+            seen.add(product_id)
+
+            lines.append({
+                "product_id": product_id,
+                "purchase_price": purchase_price,
+                "discount": discount,
+                "tax": tax,
+                "quantity": quantity,
+            })
+        return lines
+
+    @staticmethod
+    def resolve_customer(customer_id):
+        if customer_id is None:
+            return None
+        try:
+            # Accept numeric strings or ints
+            if isinstance(customer_id, str) and customer_id.strip() == '':
+                return None
+            if isinstance(customer_id, str) and customer_id.isdigit():
+                return Customer.objects.get(id=int(customer_id))
+            if isinstance(customer_id, int):
+                return Customer.objects.get(id=customer_id)
+            # Treat any non-numeric string as a customer name fallback
+            name_value = str(customer_id).strip()
+            if not name_value:
+                return None
+            customer, _ = Customer.objects.get_or_create(name=name_value)
+            return customer
+        except Customer.DoesNotExist:
+            raise CheckoutError("Customer not found.", status=404)
+
+    @staticmethod
+    def parse_idempotency_key(value):
+        key = str(value or "").strip()
+        if len(key) > 64:
+            raise CheckoutError("Idempotency key must be at most 64 characters.")
+        return key or None
+
+    @staticmethod
+    def parse_sale_date(value):
+        """
+        Date a queued offline sale happened on; defaults to today.
+        """
+        today = timezone.localdate()
+        if not value:
+            return today
+        try:
+            sale_date = date.fromisoformat(str(value)[:10])
+        except ValueError:
+            raise CheckoutError("Invalid sale date.")
+        if sale_date > today:
+            raise CheckoutError("Sale date cannot be in the future.")
+        return sale_date
+
+    @staticmethod
+    def order_for_key(key):
+        return CheckoutKey.objects.select_related('order').filter(key=key, order__isnull=False).first()
+
+    @classmethod
+    def checkout(cls, data, biller=None):
+        """
+        Create a completed Order, its lines, the stock movements and the
+        invoice from a decoded POS payload. Returns (order, invoice).
+        Raises CheckoutError on invalid input; nothing is written in that case.
+        With an `idempotency_key` in the payload, a resent sale raises
+        DuplicateCheckout carrying the order the first attempt created.
+        """
+        from sales.services.order_service import InvoiceManager
+
+        reference      = (data.get("reference") or "").strip()
+        source         = (data.get("source") or "").strip()
+        payment_method = (data.get("payment_method") or "cash").strip()
+
+        if not source:
+            raise CheckoutError("Source is required.")
+
+        lines = cls.parse_lines(data.get("items", []))
+        sale_date = cls.parse_sale_date(data.get("date"))
+        key = cls.parse_idempotency_key(data.get("idempotency_key"))
+
+        # Cheap replay check before a reference number is spent on a retry
+        if key:
+            existing = cls.order_for_key(key)
+            if existing:
+                raise DuplicateCheckout(existing.order)
+
+        # Gap-tolerant numbering: allocated before the sale's transaction so
+        # the counter row is only locked for one statement
+        if not reference:
+            reference = SequenceManager.next_order_reference()
+
+        paid_amount = data.get("paid_amount")
+        if paid_amount is not None:
+            try:
+                paid_amount = Decimal(str(paid_amount))
+            except (ValueError, TypeError, InvalidOperation):
+                paid_amount = None  # ignore invalid paid_amount
+
+        with transaction.atomic():
+            checkout_key = None
+            if key:
+                # Claim the key first: a concurrent resend blocks on the
+                # unique index until this sale commits, then sees it
+                try:
+                    with transaction.atomic():
+                        checkout_key = CheckoutKey.objects.create(key=key)
+                except IntegrityError:
+                    existing = cls.order_for_key(key)
+                    if existing is None:
+                        raise CheckoutError("Sale is already being processed.", status=409)
+                    raise DuplicateCheckout(existing.order)
+
+            customer = cls.resolve_customer(data.get("customer_id"))
+
+            products = Product.objects.in_bulk([line["product_id"] for line in lines])
+            order_items = []
+            for line in lines:
+                product = products.get(line["product_id"])
+                if product is None:
+                    raise CheckoutError(
+                        f"Product with ID {line['product_id']} not found.", status=404
+                    )
+                item = OrderItem(
+                    product=product,
+                    purchase_price=line["purchase_price"],
+                    discount=line["discount"],
+                    tax=line["tax"],
+                    unit_cost=line["purchase_price"],
+                    cost_price=product.purchase_price,
+                    quantity=line["quantity"],
+                )
+                item.calculate_totals()
+                order_items.append(item)
+
+            # Conditional decrements; concurrent tills cannot oversell or lose updates
+            try:
+                StockManager.take(
+                    [(line["product_id"], line["quantity"]) for line in lines],
+                    products,
+                    day=sale_date,
+                    reference=reference,
+                )
+            except OutOfStockError as e:
+                raise CheckoutError(
+                    f"Insufficient stock: {e}", status=409, out_of_stock=e.lines
+                )
+
+            order = Order(
+                register_session=RegisterManager.current(biller),
+                customer=customer,
+                reference=reference,
+                date=sale_date,
+                status=Order.Status.COMPLETED,
+                paid_amount=paid_amount if paid_amount is not None else Decimal('0.00'),
+                payment_method=payment_method,
+                biller=biller,
+                source=source,
+            )
+            order.grand_total = sum((item.total_cost for item in order_items), Decimal('0.00'))
+            order.set_payment_fields()
+            order.save()
+
+            # FIFO draw sets each line's cost_price before the rollups read it
+            consumptions = ValuationManager.consume(order_items)
+            for item in order_items:
+                item.order = order
+            OrderItem.objects.bulk_create(order_items)
+            CostConsumption.objects.bulk_create(consumptions)
+            SalesSummaryManager.lines_added(order, order_items)
+            ProductSalesManager.lines_added(order, order_items)
+            RegisterManager.order_posted(order, order_items)
+            PaymentManager.opening(order)
+
+            if checkout_key:
+                checkout_key.order = order
+                checkout_key.save(update_fields=['order'])
+
+            invoice = InvoiceManager.create_invoice(order)
+
+        return order, invoice
+
+    @classmethod
+    def ingest(cls, orders, biller=None):
+        """
+        Check out a batch of queued sales, one transaction per sale, so a
+        sale that fails (e.g. out of stock) does not hold back the others.
+        Every entry needs an idempotency key; resent entries resolve to the
+        order they already created. Returns one result dict per entry, in
+        order, with status 'created', 'duplicate' or 'error'.
+        """
+        results = []
+        for data in orders:
+            key = data.get("idempotency_key") if isinstance(data, dict) else None
+            result = {"idempotency_key": key}
+            try:
+                if not key:
+                    raise CheckoutError("Idempotency key is required.")
+                order, invoice = cls.checkout(data, biller=biller)
+                result.update(status="created", **cls.describe(order, invoice))
+            except DuplicateCheckout as e:
+                result.update(status="duplicate", **cls.describe(e.order))
+            except CheckoutError as e:
+                result.update(status="error", error=e.message)
+                if e.out_of_stock:
+                    result["out_of_stock"] = e.out_of_stock
+            results.append(result)
+        return results
+
+    @staticmethod
+    def describe(order, invoice=None):
+        if invoice is None:
+            # Reverse one-to-one; missing invoices raise AttributeError subclasses
+            invoice = getattr(order, "invoice", None)
+        return {
+            "order_id": order.id,
+            "reference": order.reference,
+            "invoice_id": invoice.id if invoice else None,
+            "invoice_no": invoice.invoice_no if invoice else None,
+        }
@@ -0,0 +1,112 @@
+from bisect import bisect_right
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import DecimalField, F, Sum, Value
+from django.db.models.functions import Coalesce
+
+from purchases.models import PurchaseItem
+from sales.models import Order, OrderItem
+
+
+ZERO = Decimal('0.00')
+
+
+class CostManager:
+    """
+    Cost basis of sold lines. Each OrderItem carries cost_price, the
+    product's cost per unit when it was sold; lines recorded before the
+    snapshot existed fall back to the product's current purchase price
+    until `manage.py backfill_order_costs` fills them in.
+    """
+    BATCH_SIZE = 1000
+
+    @staticmethod
+    def unit_cost():
+        return Coalesce('cost_price', 'product__purchase_price')
+
+    @classmethod
+    def gross_profit(cls, lines):
+        """
+        Sum of (selling price - cost) * quantity over an OrderItem queryset,
+        in one aggregate query.
+        """
+        return lines.aggregate(
+            profit=Coalesce(
+                Sum((F('unit_cost') - cls.unit_cost()) * F('quantity'), output_field=DecimalField()),
+                Value(ZERO, output_field=DecimalField()),
+            )
+        )['profit']
+
+    @classmethod
+    def cost_of_sales(cls, lines):
+        """
+        Sum of cost * quantity over an OrderItem queryset.
+        """
+        return lines.aggregate(
+            cost=Coalesce(
+                Sum(cls.unit_cost() * F('quantity'), output_field=DecimalField()),
+                Value(ZERO, output_field=DecimalField()),
+            )
+        )['cost']
+
+    @staticmethod
+    def completed_lines(start=None, end=None):
+        lines = OrderItem.objects.filter(order__status=Order.Status.COMPLETED)
+        if start:
+            lines = lines.filter(order__date__gte=start)
+        if end:
+            lines = lines.filter(order__date__lte=end)
+        return lines
+
+    @staticmethod
+    def purchase_history(product_ids):
+        """
+        {product_id: ([order_date, ...], [unit_cost, ...])} ascending by
+        date, from purchase lines of non-cancelled purchases.
+        """
+        history = defaultdict(lambda: ([], []))
+        rows = (
+            PurchaseItem.objects.filter(product_id__in=product_ids)
+                                .exclude(purchase__status='canceled')
+                                .order_by('product_id', 'purchase__order_date', 'id')
+                                .values_list('product_id', 'purchase__order_date', 'unit_cost')
+        )
+        for product_id, day, cost in rows.iterator(chunk_size=2000):
+            dates, costs = history[product_id]
+            dates.append(day)
+            costs.append(cost)
+        return history
+
+    @classmethod
+    def backfill(cls, start=None, end=None):
+        """
+        Fill cost_price on lines sold in [start, end] that lack one. The
+        cost is that of the latest purchase of the product on or before the
+        sale day, else its current purchase price. Lines that have a cost
+        keep it: those are FIFO costs from the valuation layers, and
+        recosting them goes through ValuationManager.rebuild.
+        Returns (lines updated, first day, last day).
+        """
+        lines = OrderItem.objects.filter(cost_price__isnull=True)
+        if start:
+            lines = lines.filter(order__date__gte=start)
+        if end:
+            lines = lines.filter(order__date__lte=end)
+
+        rows = list(lines.order_by('id').values_list('id', 'product_id', 'order__date', 'product__purchase_price'))
+        if not rows:
+            return 0, None, None
+
+        history = cls.purchase_history({row[1] for row in rows})
+        updates = []
+        for item_id, product_id, day, current in rows:
+            dates, costs = history.get(product_id, ((), ()))
+            index = bisect_right(dates, day)
+            updates.append(OrderItem(pk=item_id, cost_price=costs[index - 1] if index else current))
+
+        with transaction.atomic():
+            OrderItem.objects.bulk_update(updates, ['cost_price'], batch_size=cls.BATCH_SIZE)
+        days = [row[2] for row in rows]
+        return len(updates), min(days), max(days)
@@ -0,0 +1,157 @@
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, Sum, Value, When
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from sales.models import Invoice, Order, Payment, RegisterSession
+from sales.services.register_service import RegisterManager
+from sales.services.summary_service import SalesSummaryManager
+
+
+ZERO = Decimal('0.00')
+
+
+class PaymentError(Exception):
+    """
+    Raised when a payment cannot be posted; nothing is written.
+    """
+
+
+class PaymentManager:
+    """
+    Posts payments to the append-only Payment ledger.
+
+    Posting inserts the ledger row and adds the amount to the order's
+    paid_amount with an F() increment, due amount and payment status being
+    derived in the same UPDATE, so concurrent partial payments cannot
+    overwrite each other and the order's lines are never re-summed. The
+    order's invoice, the daily sales rollup and the cashier's register get
+    the same delta.
+    """
+
+    @staticmethod
+    def order_increments(amount):
+        paid = F('paid_amount') + amount
+        return {
+            'paid_amount': paid,
+            'due_amount': Greatest(F('grand_total') - paid, Value(ZERO), output_field=DecimalField()),
+            'payment_status': Case(
+                When(grand_total__lte=paid, then=Value(Order.PaymentStatus.PAID)),
+                # Only ever called with a positive amount
+                default=Value(Order.PaymentStatus.PARTIAL),
+            ),
+        }
+
+    @staticmethod
+    def invoice_increments(amount):
+        paid = F('amount_paid') + amount
+        return {
+            'amount_paid': paid,
+            'amount_due': Greatest(F('amount') - paid, Value(ZERO), output_field=DecimalField()),
+            'status': Case(
+                When(amount__lte=paid, then=Value(Invoice.Status.PAID)),
+                When(due_date__lt=timezone.localdate(), then=Value(Invoice.Status.OVERDUE)),
+                default=Value(Invoice.Status.OPEN),
+            ),
+            'updated_at': timezone.now(),
+        }
+
+    @classmethod
+    def apply_to_invoices(cls, invoices, amount):
+        """
+        Add `amount` to the paid amount of an Invoice queryset. Returns the
+        number of invoices updated.
+        """
+        return invoices.update(**cls.invoice_increments(amount))
+
+    @classmethod
+    def post(cls, order_id, amount, method, reference='', received_by=None,
+             register_session_id=None, allow_overpayment=False):
+        """
+        Record a payment of `amount` against an order and return the order
+        as it stands afterwards (not re-read from the database).
+        Overpayments raise PaymentError unless `allow_overpayment`, for
+        money that was already taken (an M-Pesa confirmation). A payment is
+        only counted in `register_session_id` while that session is open;
+        one arriving after the shift closed belongs to no session.
+        """
+        if amount <= 0:
+            raise PaymentError("Amount must be greater than zero")
+        if method not in Order.PaymentMethod.values:
+            raise PaymentError(f"Unknown payment method: {method}")
+
+        with transaction.atomic():
+            # The row lock orders concurrent payments; the increments below
+            # keep the totals right on backends without one
+            before = (
+                Order.objects.select_for_update()
+                .filter(pk=order_id)
+                .values('pk', 'register_session_id', *SalesSummaryManager.ORDER_FIELDS)
+                .first()
+            )
+            if before is None:
+                raise Order.DoesNotExist(f"Order {order_id} does not exist.")
+            remaining_due = before['grand_total'] - before['paid_amount']
+            if amount > remaining_due and not allow_overpayment:
+                raise PaymentError(f"Amount exceeds due amount. Maximum allowed: KES {remaining_due}")
+            if register_session_id:
+                # Locked so a close cannot total the ledger in between
+                register_session_id = (
+                    RegisterSession.objects.select_for_update()
+                    .filter(pk=register_session_id, status=RegisterSession.Status.OPEN)
+                    .values_list('pk', flat=True)
+                    .first()
+                )
+
+            Payment.objects.create(
+                order_id=order_id,
+                method=method,
+                amount=amount,
+                reference=reference or '',
+                received_by=received_by,
+                register_session_id=register_session_id,
+            )
+            Order.objects.filter(pk=order_id).update(**cls.order_increments(amount))
+
+            order = Order(**before)
+            order.paid_amount += amount
+            order.set_payment_fields()
+            SalesSummaryManager.order_saved(
+                {field: before[field] for field in SalesSummaryManager.ORDER_FIELDS}, order,
+            )
+            cls.apply_to_invoices(Invoice.objects.filter(order_id=order_id), amount)
+            RegisterManager.payment_posted(register_session_id, method, amount)
+        return order
+
+    @staticmethod
+    def opening(order):
+        """
+        Record the amount paid at checkout, already on the order, in the
+        ledger. Change handed back is not takings, so as in the register
+        the amount is capped at the order total.
+        """
+        amount = min(order.paid_amount, order.grand_total)
+        if amount > 0:
+            Payment.objects.create(
+                order=order,
+                method=order.payment_method,
+                amount=amount,
+                received_by_id=order.biller_id,
+                register_session_id=order.register_session_id,
+            )
+
+    @staticmethod
+    def by_method(**filters):
+        """
+        {method: total paid} over the payments matching `filters` (e.g.
+        register_session=session, created_at__date=day).
+        """
+        rows = (
+            Payment.objects.filter(**filters)
+            .order_by()
+            .values('method')
+            .annotate(total=Sum('amount'))
+        )
+        return {row['method']: row['total'].quantize(ZERO) for row in rows}
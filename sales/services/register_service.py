@@ -0,0 +1,167 @@
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from sales.models import Order, RegisterSession
+
+
+ZERO = Decimal('0.00')
+
+
+class RegisterError(Exception):
+    """
+    Raised when a register session cannot be opened or closed.
+    """
+
+
+class RegisterManager:
+    """
+    Opens and closes cashier shifts and keeps their running totals.
+
+    Totals are only ever added to, with F() increments on the open session,
+    so concurrent sales on the same till cannot overwrite each other and
+    the register never re-aggregates orders. Once a session is closed no
+    increment matches it any more, which keeps its Z-report fixed.
+    """
+    METHOD_TOTALS = {
+        Order.PaymentMethod.CASH: 'cash_total',
+        Order.PaymentMethod.MPESA: 'mpesa_total',
+    }
+
+    @staticmethod
+    def current(cashier):
+        """
+        The cashier's open session, or None.
+        """
+        if cashier is None or not cashier.is_authenticated:
+            return None
+        return RegisterSession.objects.filter(cashier=cashier, status=RegisterSession.Status.OPEN).first()
+
+    @staticmethod
+    def open(cashier, opening_float=ZERO):
+        if opening_float < 0:
+            raise RegisterError("Opening float cannot be negative.")
+        try:
+            with transaction.atomic():
+                return RegisterSession.objects.create(cashier=cashier, opening_float=opening_float)
+        except IntegrityError:
+            raise RegisterError("You already have an open register.")
+
+    @staticmethod
+    def close(session_id, counted_cash):
+        """
+        Close a session, storing the cash counted in the drawer next to the
+        cash expected from the running totals, and its takings per payment
+        method. Returns the closed session.
+        """
+        from sales.services.payment_service import PaymentManager
+
+        if counted_cash < 0:
+            raise RegisterError("Counted cash cannot be negative.")
+        with transaction.atomic():
+            session = RegisterSession.objects.select_for_update().get(pk=session_id)
+            if session.status != RegisterSession.Status.OPEN:
+                raise RegisterError("This register is already closed.")
+            session.status = RegisterSession.Status.CLOSED
+            session.closed_at = timezone.now()
+            session.expected_cash = session.cash_in_drawer
+            session.counted_cash = counted_cash
+            session.payment_totals = PaymentManager.by_method(register_session=session)
+            session.save()
+        return session
+
+    @staticmethod
+    def add(session_id, **deltas):
+        """
+        Add `deltas` to the totals of an open session. Returns whether a
+        session was updated.
+        """
+        deltas = {name: value for name, value in deltas.items() if value}
+        if not session_id or not deltas:
+            return False
+        return bool(
+            RegisterSession.objects
+            .filter(pk=session_id, status=RegisterSession.Status.OPEN)
+            .update(**{name: F(name) + value for name, value in deltas.items()})
+        )
+
+    @classmethod
+    def payment_deltas(cls, method, amount):
+        deltas = {'paid_total': amount}
+        total = cls.METHOD_TOTALS.get(method)
+        if total:
+            deltas[total] = amount
+        return deltas
+
+    @classmethod
+    def order_posted(cls, order, lines):
+        """
+        Count a checked-out order and its lines (with their cost snapshot)
+        in the order's session.
+        """
+        # Change handed back is not takings
+        paid = min(order.paid_amount, order.grand_total)
+        cls.add(
+            order.register_session_id,
+            order_count=1,
+            sales_total=order.grand_total,
+            cost_total=sum(((line.cost_price or ZERO) * line.quantity for line in lines), ZERO),
+            discount_total=sum((line.discount for line in lines), ZERO),
+            **cls.payment_deltas(order.payment_method, paid),
+        )
+
+    @classmethod
+    def payment_posted(cls, session_id, method, amount):
+        """
+        Count a payment taken after checkout (a partial payment settled at
+        the till, an M-Pesa confirmation) in a session, if it is still open.
+        """
+        cls.add(session_id, **cls.payment_deltas(method, amount))
+
+    @classmethod
+    def expense_changed(cls, expense, delta):
+        """
+        Expenses recorded by a cashier during their shift are paid out of
+        the drawer.
+        """
+        session = cls.current(expense.created_by)
+        if session is not None and expense.date_created >= session.opened_at:
+            cls.add(session.pk, expense_total=delta)
+
+    @staticmethod
+    def z_report(session):
+        """
+        The figures of a session, as stored: for a closed session, its
+        Z-report. `payments` breaks the takings down by method, from the
+        Payment ledger while the session is open.
+        """
+        from sales.services.payment_service import PaymentManager
+
+        if session.payment_totals is None:
+            payments = PaymentManager.by_method(register_session=session)
+        else:
+            payments = {method: Decimal(amount) for method, amount in session.payment_totals.items()}
+        return {
+            'id': session.pk,
+            'cashier': str(session.cashier),
+            'status': session.status,
+            'opened_at': session.opened_at.isoformat(),
+            'closed_at': session.closed_at.isoformat() if session.closed_at else None,
+            'opening_float': session.opening_float,
+            'order_count': session.order_count,
+            'sales_total': session.sales_total,
+            'cost_total': session.cost_total,
+            'discount_total': session.discount_total,
+            'gross_profit': session.sales_total - session.cost_total,
+            'paid_total': session.paid_total,
+            'cash_total': session.cash_total,
+            'mpesa_total': session.mpesa_total,
+            'expense_total': session.expense_total,
+            'payments': payments,
+            'cash_in_drawer': session.cash_in_drawer,
+            'expected_cash': session.expected_cash,
+            'counted_cash': session.counted_cash,
+            'variance': session.variance,
+        }
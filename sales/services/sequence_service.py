@@ -0,0 +1,80 @@
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from sales.models import DocumentSequence
+
+
+class SequenceManager:
+    """
+    Allocates document numbers from DocumentSequence counter rows.
+
+    Every allocation is one UPDATE ... SET last_value = last_value + 1 and one
+    primary-key read, no matter how many documents already exist that day.
+
+    Two modes:
+    - gap-tolerant: call outside any transaction (before opening the one that
+      writes the document). The increment commits immediately, so the row lock
+      is held for a single statement; a document that later fails to save
+      leaves a gap.
+    - gapless: call inside the transaction that writes the document. The
+      increment commits or rolls back with it, so numbers never skip, at the
+      cost of serialising writers of that prefix until commit.
+    """
+
+    @staticmethod
+    def allocate(key, day=None, gapless=False, seed=None):
+        """
+        Return the next value for (key, day).
+        `seed` is an optional callable returning the starting value; it runs
+        only when the day's counter row is first created.
+        """
+        if gapless and not connection.in_atomic_block:
+            raise transaction.TransactionManagementError(
+                f"Gapless sequence '{key}' must be allocated inside the document's transaction."
+            )
+        day = day or timezone.localdate()
+        counter = DocumentSequence.objects.filter(key=key, day=day)
+
+        with transaction.atomic():
+            if not counter.update(last_value=F('last_value') + 1):
+                try:
+                    with transaction.atomic():
+                        DocumentSequence.objects.create(
+                            key=key, day=day, last_value=seed() if seed else 0
+                        )
+                except IntegrityError:
+                    pass  # another writer created today's row first
+                counter.update(last_value=F('last_value') + 1)
+            return counter.values_list('last_value', flat=True).get()
+
+    @classmethod
+    def next_order_reference(cls):
+        day = timezone.localdate()
+        value = cls.allocate('ORD', day)
+        return f"ORD-{day:%Y%m%d}-{value:05d}"
+
+    @classmethod
+    def next_invoice_number(cls):
+        day = timezone.localdate()
+        value = cls.allocate('INV', day, gapless=True)
+        return f"INV-{day:%Y%m%d}-{value:05d}"
+
+    @classmethod
+    def next_purchase_reference(cls):
+        day = timezone.localdate()
+        prefix = f"PO{day:%Y%m%d}"
+
+        def seed():
+            # Carry on from references issued before the counter existed
+            from purchases.models import Purchase
+            max_num = 0
+            for ref in Purchase.objects.filter(reference__startswith=prefix).values_list('reference', flat=True):
+                try:
+                    max_num = max(max_num, int(ref.replace(prefix, '')))
+                except ValueError:
+                    continue
+            return max_num
+
+        value = cls.allocate('PO', day, seed=seed)
+        return f"{prefix}{value:03d}"
@@ -0,0 +1,411 @@
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, DecimalField, F, Sum, Value
+from django.db.models.functions import Coalesce
+
+from sales.models import DailySalesSummary, Order, OrderItem, ProductDailySales
+
+
+ZERO = Decimal('0.00')
+
+
+def increment(model, keys, deltas):
+    """
+    Add `deltas` to the rollup row of `model` identified by `keys` with F()
+    increments, creating the row on first use.
+    """
+    deltas = {name: value for name, value in deltas.items() if value}
+    if not deltas:
+        return
+    row = model.objects.filter(**keys)
+    increments = {name: F(name) + value for name, value in deltas.items()}
+
+    with transaction.atomic():
+        if row.update(**increments):
+            return
+        try:
+            with transaction.atomic():
+                model.objects.create(**keys, **deltas)
+                return
+        except IntegrityError:
+            pass  # another writer created the row first
+        row.update(**increments)
+
+
+class SalesSummaryManager:
+    """
+    Maintains DailySalesSummary, the per-day rollup dashboards read instead
+    of scanning Order.
+
+    Every order write applies the difference between the order's old and
+    new contribution to its bucket with F() increments, inside the caller's
+    transaction, so concurrent tills cannot overwrite each other's totals.
+    Tax and discount come from the order's lines; bulk-created lines
+    (which send no signals) are added with lines_added().
+    """
+    DIMENSIONS = ('day', 'source', 'payment_method', 'status', 'payment_status')
+    ORDER_FIELDS = ('date', 'source', 'payment_method', 'status', 'payment_status',
+                    'grand_total', 'paid_amount', 'due_amount')
+    VALUES = ('order_count', 'gross_sales', 'paid_amount', 'due_amount', 'tax', 'discount')
+
+    # --- maintenance -------------------------------------------------------
+
+    @classmethod
+    def order_state(cls, order):
+        return {field: getattr(order, field) for field in cls.ORDER_FIELDS}
+
+    @classmethod
+    def stored_state(cls, order_id):
+        return Order.objects.filter(pk=order_id).values(*cls.ORDER_FIELDS).first()
+
+    @staticmethod
+    def bucket(state):
+        return (state['date'], state['source'], state['payment_method'],
+                state['status'], state['payment_status'])
+
+    @staticmethod
+    def line_totals(order_id):
+        totals = OrderItem.objects.filter(order_id=order_id).aggregate(
+            tax=Coalesce(Sum('tax_amount'), Value(ZERO), output_field=DecimalField()),
+            discount=Coalesce(Sum('discount'), Value(ZERO), output_field=DecimalField()),
+        )
+        return totals['tax'], totals['discount']
+
+    @classmethod
+    def apply(cls, bucket, **deltas):
+        """
+        Add `deltas` (keyed by VALUES names) to one summary row.
+        """
+        increment(DailySalesSummary, dict(zip(cls.DIMENSIONS, bucket)), deltas)
+
+    @classmethod
+    def order_saved(cls, before, order):
+        """
+        `before` is the order's stored state prior to this save (None for a
+        new order).
+        """
+        after = cls.order_state(order)
+        if before is None:
+            cls.apply(
+                cls.bucket(after),
+                order_count=1,
+                gross_sales=after['grand_total'],
+                paid_amount=after['paid_amount'],
+                due_amount=after['due_amount'],
+            )
+        elif cls.bucket(before) == cls.bucket(after):
+            cls.apply(
+                cls.bucket(after),
+                gross_sales=after['grand_total'] - before['grand_total'],
+                paid_amount=after['paid_amount'] - before['paid_amount'],
+                due_amount=after['due_amount'] - before['due_amount'],
+            )
+        else:
+            # Completed, paid, failed, cancelled...: move the whole order
+            tax, discount = cls.line_totals(order.pk)
+            cls.apply(
+                cls.bucket(before),
+                order_count=-1,
+                gross_sales=-before['grand_total'],
+                paid_amount=-before['paid_amount'],
+                due_amount=-before['due_amount'],
+                tax=-tax,
+                discount=-discount,
+            )
+            cls.apply(
+                cls.bucket(after),
+                order_count=1,
+                gross_sales=after['grand_total'],
+                paid_amount=after['paid_amount'],
+                due_amount=after['due_amount'],
+                tax=tax,
+                discount=discount,
+            )
+
+    @classmethod
+    def order_deleted(cls, order):
+        # Cascaded lines were already taken out by line_changed()
+        state = cls.order_state(order)
+        cls.apply(
+            cls.bucket(state),
+            order_count=-1,
+            gross_sales=-state['grand_total'],
+            paid_amount=-state['paid_amount'],
+            due_amount=-state['due_amount'],
+        )
+
+    @classmethod
+    def line_changed(cls, state, tax, discount):
+        """
+        Add a line's tax and discount change to its order's current bucket;
+        `state` is the order's stored state.
+        """
+        if state is not None:
+            cls.apply(cls.bucket(state), tax=tax, discount=discount)
+
+    @classmethod
+    def lines_added(cls, order, items):
+        """
+        Account for lines inserted with bulk_create.
+        """
+        cls.apply(
+            cls.bucket(cls.order_state(order)),
+            tax=sum((item.tax_amount for item in items), ZERO),
+            discount=sum((item.discount for item in items), ZERO),
+        )
+
+    @classmethod
+    def rebuild(cls, start=None, end=None):
+        """
+        Recompute summary rows from Order and OrderItem for days in
+        [start, end] (all history when omitted). Returns the number of rows.
+        """
+        orders = Order.objects.all()
+        lines = OrderItem.objects.all()
+        summaries = DailySalesSummary.objects.all()
+        if start:
+            orders, lines, summaries = (
+                orders.filter(date__gte=start), lines.filter(order__date__gte=start), summaries.filter(day__gte=start)
+            )
+        if end:
+            orders, lines, summaries = (
+                orders.filter(date__lte=end), lines.filter(order__date__lte=end), summaries.filter(day__lte=end)
+            )
+
+        dims = ['date', 'source', 'payment_method', 'status', 'payment_status']
+        rows = {}
+        for row in (
+            orders.order_by()
+                  .values(*dims)
+                  .annotate(
+                      order_count=Count('id'),
+                      gross_sales=Sum('grand_total'),
+                      paid=Sum('paid_amount'),
+                      due=Sum('due_amount'),
+                  )
+        ):
+            rows[cls.bucket(row)] = DailySalesSummary(
+                **dict(zip(cls.DIMENSIONS, cls.bucket(row))),
+                order_count=row['order_count'],
+                gross_sales=row['gross_sales'] or ZERO,
+                paid_amount=row['paid'] or ZERO,
+                due_amount=row['due'] or ZERO,
+            )
+
+        for row in (
+            lines.order_by()
+                 .values(*[f'order__{dim}' for dim in dims])
+                 .annotate(tax=Sum('tax_amount'), discount=Sum('discount'))
+        ):
+            key = cls.bucket({dim: row[f'order__{dim}'] for dim in dims})
+            if key in rows:
+                rows[key].tax = row['tax'] or ZERO
+                rows[key].discount = row['discount'] or ZERO
+
+        with transaction.atomic():
+            summaries.delete()
+            DailySalesSummary.objects.bulk_create(rows.values(), batch_size=500)
+        return len(rows)
+
+    # --- reading -----------------------------------------------------------
+
+    @staticmethod
+    def rows(start=None, end=None, **filters):
+        qs = DailySalesSummary.objects.filter(**filters)
+        if start:
+            qs = qs.filter(day__gte=start)
+        if end:
+            qs = qs.filter(day__lte=end)
+        return qs
+
+    @staticmethod
+    def sums():
+        sums = {'order_count': Coalesce(Sum('order_count'), 0)}
+        for name in ('gross_sales', 'paid_amount', 'due_amount', 'tax', 'discount'):
+            sums[name] = Coalesce(Sum(name), Value(ZERO), output_field=DecimalField())
+        return sums
+
+    @classmethod
+    def totals(cls, start=None, end=None, **filters):
+        """
+        Summed VALUES over days in [start, end] matching `filters`
+        (e.g. status=Order.Status.COMPLETED).
+        """
+        return cls.rows(start, end, **filters).aggregate(**cls.sums())
+
+    @classmethod
+    def by_day(cls, start=None, end=None, **filters):
+        """
+        {day: summed VALUES} for days that have rows.
+        """
+        return {
+            row.pop('day'): row
+            for row in cls.rows(start, end, **filters).order_by('day').values('day').annotate(**cls.sums())
+        }
+
+
+class ProductSalesManager:
+    """
+    Maintains ProductDailySales: lines of completed orders per product and
+    day. A line counts while its order is completed; cost is the line
+    quantity at the cost snapshotted on the line (the product's purchase
+    price for lines that predate the snapshot).
+    """
+    LINE_FIELDS = ('product_id', 'quantity', 'total_cost', 'tax_amount', 'discount', 'cost_price', 'product__purchase_price')
+
+    @staticmethod
+    def fact(row):
+        return {
+            'product_id': row['product_id'],
+            'quantity': row['quantity'],
+            'revenue': row['total_cost'],
+            'tax': row['tax_amount'],
+            'discount': row['discount'],
+            'cost': row['quantity'] * (
+                row['cost_price'] if row['cost_price'] is not None else row['product__purchase_price'] or ZERO
+            ),
+        }
+
+    @classmethod
+    def item_fact(cls, item):
+        return cls.fact({
+            'product_id': item.product_id,
+            'quantity': item.quantity,
+            'total_cost': item.total_cost,
+            'tax_amount': item.tax_amount,
+            'discount': item.discount,
+            'cost_price': item.cost_price,
+            'product__purchase_price': item.product.purchase_price,
+        })
+
+    @classmethod
+    def stored_fact(cls, item_id):
+        row = OrderItem.objects.filter(pk=item_id).values(*cls.LINE_FIELDS).first()
+        return cls.fact(row) if row else None
+
+    @classmethod
+    def stored_facts(cls, order_id):
+        return [cls.fact(row) for row in OrderItem.objects.filter(order_id=order_id).values(*cls.LINE_FIELDS)]
+
+    @staticmethod
+    def apply(day, facts, sign=1):
+        for fact in facts:
+            increment(
+                ProductDailySales,
+                {'day': day, 'product_id': fact['product_id']},
+                {name: sign * fact[name] for name in ('quantity', 'revenue', 'tax', 'discount', 'cost')},
+            )
+
+    @classmethod
+    def order_saved(cls, before, order):
+        """
+        Count or uncount the order's lines when it enters or leaves the
+        completed status, or moves to another day while completed.
+        """
+        if before is None:
+            return  # a new order has no lines yet
+        was = before['status'] == Order.Status.COMPLETED
+        now = order.status == Order.Status.COMPLETED
+        if not (was or now) or (was and now and before['date'] == order.date):
+            return
+        facts = cls.stored_facts(order.pk)
+        if was:
+            cls.apply(before['date'], facts, -1)
+        if now:
+            cls.apply(order.date, facts)
+
+    @classmethod
+    def line_changed(cls, state, before, after):
+        """
+        `state` is the order's stored state; `before`/`after` are the line's
+        facts before and after the write (None when created / deleted).
+        """
+        if state is None or state['status'] != Order.Status.COMPLETED:
+            return
+        if before and after and before['product_id'] == after['product_id']:
+            cls.apply(state['date'], [{
+                name: after[name] - before[name] if name != 'product_id' else after[name]
+                for name in after
+            }])
+            return
+        if before:
+            cls.apply(state['date'], [before], -1)
+        if after:
+            cls.apply(state['date'], [after])
+
+    @classmethod
+    def lines_added(cls, order, items):
+        """
+        Account for lines inserted with bulk_create.
+        """
+        if order.status == Order.Status.COMPLETED:
+            cls.apply(order.date, [cls.item_fact(item) for item in items])
+
+    @staticmethod
+    def rebuild(start=None, end=None):
+        """
+        Recompute rows from completed order lines for days in [start, end]
+        (all history when omitted). Returns the number of rows.
+        """
+        lines = OrderItem.objects.filter(order__status=Order.Status.COMPLETED)
+        facts = ProductDailySales.objects.all()
+        if start:
+            lines, facts = lines.filter(order__date__gte=start), facts.filter(day__gte=start)
+        if end:
+            lines, facts = lines.filter(order__date__lte=end), facts.filter(day__lte=end)
+
+        rows = [
+            ProductDailySales(
+                day=row['order__date'],
+                product_id=row['product_id'],
+                quantity=row['qty'] or 0,
+                revenue=row['revenue'] or ZERO,
+                tax=row['tax'] or ZERO,
+                discount=row['disc'] or ZERO,
+                cost=row['cost'] or ZERO,
+            )
+            for row in (
+                lines.order_by()
+                     .values('order__date', 'product_id')
+                     .annotate(
+                         qty=Sum('quantity'),
+                         revenue=Sum('total_cost'),
+                         tax=Sum('tax_amount'),
+                         disc=Sum('discount'),
+                         cost=Sum(
+                             F('quantity') * Coalesce('cost_price', 'product__purchase_price'),
+                             output_field=DecimalField(),
+                         ),
+                     )
+            )
+        ]
+        with transaction.atomic():
+            facts.delete()
+            ProductDailySales.objects.bulk_create(rows, batch_size=500)
+        return len(rows)
+
+    @staticmethod
+    def by_product(start=None, end=None, **fields):
+        """
+        Values queryset of per-product totals over days in [start, end]:
+        product_id, sold_qty, sold_amount, sold_tax, sold_discount, sold_cost.
+        `fields` are extra per-product values (e.g. name=F('product__name'))
+        grouped alongside product_id.
+        """
+        qs = ProductDailySales.objects.all()
+        if start:
+            qs = qs.filter(day__gte=start)
+        if end:
+            qs = qs.filter(day__lte=end)
+        return (
+            qs.order_by()
+              .values('product_id', **fields)
+              .annotate(
+                  sold_qty=Sum('quantity'),
+                  sold_amount=Sum('revenue'),
+                  sold_tax=Sum('tax'),
+                  sold_discount=Sum('discount'),
+                  sold_cost=Sum('cost'),
+              )
+        )
@@ -0,0 +1,76 @@
+from decimal import Decimal
+
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from finance.models import Expense
+from sales.models import Order, OrderItem
+from sales.services.register_service import RegisterManager
+from sales.services.summary_service import ProductSalesManager, SalesSummaryManager
+
+
+@receiver(pre_save, sender=Order)
+def remember_order_state(sender, instance, raw=False, **kwargs):
+    instance._summary_before = None if raw or instance.pk is None else SalesSummaryManager.stored_state(instance.pk)
+
+
+@receiver(post_save, sender=Order)
+def order_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    before = None if created else instance._summary_before
+    SalesSummaryManager.order_saved(before, instance)
+    ProductSalesManager.order_saved(before, instance)
+
+
+@receiver(post_delete, sender=Order)
+def order_deleted(sender, instance, **kwargs):
+    # Cascaded lines were already taken out by line_deleted()
+    SalesSummaryManager.order_deleted(instance)
+
+
+@receiver(pre_save, sender=OrderItem)
+def remember_line(sender, instance, raw=False, **kwargs):
+    instance._summary_before = None if raw or instance.pk is None else ProductSalesManager.stored_fact(instance.pk)
+
+
+@receiver(post_save, sender=OrderItem)
+def line_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    before = instance._summary_before
+    after = ProductSalesManager.item_fact(instance)
+    state = SalesSummaryManager.stored_state(instance.order_id)
+    SalesSummaryManager.line_changed(
+        state,
+        tax=after['tax'] - (before['tax'] if before else 0),
+        discount=after['discount'] - (before['discount'] if before else 0),
+    )
+    ProductSalesManager.line_changed(state, before, after)
+
+
+@receiver(post_delete, sender=OrderItem)
+def line_deleted(sender, instance, **kwargs):
+    before = ProductSalesManager.item_fact(instance)
+    state = SalesSummaryManager.stored_state(instance.order_id)
+    SalesSummaryManager.line_changed(state, tax=-before['tax'], discount=-before['discount'])
+    ProductSalesManager.line_changed(state, before, None)
+
+
+@receiver(pre_save, sender=Expense)
+def remember_expense_amount(sender, instance, raw=False, **kwargs):
+    instance._register_before = None if raw or instance.pk is None else (
+        Expense.objects.filter(pk=instance.pk).values_list('amount', flat=True).first()
+    )
+
+
+@receiver(post_save, sender=Expense)
+def expense_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    RegisterManager.expense_changed(instance, Decimal(str(instance.amount)) - (instance._register_before or 0))
+
+
+@receiver(post_delete, sender=Expense)
+def expense_deleted(sender, instance, **kwargs):
+    RegisterManager.expense_changed(instance, -Decimal(str(instance.amount)))
@@ -7,12 +7,18 @@ urlpatterns = [
     path('pos-orders/',views.pos_orders,name='pos-orders'),
     path('sales-returns/',views.sales_return,name='sales-returns'),
     path('pos/',views.pos,name='pos'),
+    path('pos/catalog/',views.pos_catalog,name='pos-catalog'),
+    path('pos/catalog/changes/',views.pos_catalog_changes,name='pos-catalog-changes'),
     path('create-order/',views.create_order,name='create-order'),
+    path('sync-orders/',views.sync_orders,name='sync-orders'),
     path('orders/<int:pk>/json/', views.order_detail_json, name='order-detail-json'),
     path('orders/<int:order_id>/update-payment/', views.update_payment, name='update-payment'),
     path('customers/ajax/', views.get_customers_ajax, name='customers-ajax'),
     path('cash-register-data/', views.cash_register_data, name='cash-register-data'),
     path('today-profit-data/', views.today_profit_data, name='today-profit-data'),
+    path('register/open/', views.open_register, name='open-register'),
+    path('register/close/', views.close_register, name='close-register'),
+    path('register/<int:pk>/z-report/', views.register_z_report, name='register-z-report'),
     
     # M-Pesa endpoints
     path('initiate-mpesa-payment/', views.initiate_mpesa_payment, name='initiate-mpesa-payment'),
@@ -1,8 +1,5 @@
-import io
-from django.http import FileResponse, HttpResponse
 from django.db.models import Q
-from openpyxl import Workbook
-from decimal import Decimal
+from reports.services.export_service import Column, ExportManager, iso_date, text
 from .models import Order
 
 def get_orders_queryset(search=None, source=None, customer=None, status=None, payment_status=None, sort_by=None, include_failed=False):
@@ -54,22 +51,30 @@ def get_orders_queryset(search=None, source=None, customer=None, status=None, pa
     
     return qs.distinct()
 
+ORDER_EXPORT_COLUMNS = [
+    Column('Reference', 'reference'),
+    Column('Date', 'date', iso_date),
+    Column('Customer', 'customer__name', text),
+    Column('Source', 'source'),
+    Column('Status', 'status'),
+    Column('Payment Status', 'payment_status'),
+    Column('Total', 'grand_total'),
+    Column('Paid', 'paid_amount'),
+    Column('Due', 'due_amount'),
+]
+
+def orders_export_source(params):
+    """
+    Export source for background jobs; `params` are get_orders_queryset
+    keyword arguments.
+    """
+    return get_orders_queryset(**params), ORDER_EXPORT_COLUMNS
+
 def export_orders_excel(qs, basename='orders'):
-    wb = Workbook()
-    ws = wb.active
-    ws.append(['Reference', 'Date', 'Customer', 'Status', 'Total'])
-    for order in qs:
-        ws.append([
-            order.reference,
-            order.date.strftime('%Y-%m-%d'),
-            order.customer.name,
-            order.status,
-            float(order.total),
-        ])
-    buffer = io.BytesIO()
-    wb.save(buffer)
-    buffer.seek(0)
-    return FileResponse(buffer, as_attachment=True, filename=f'{basename}.xlsx')
+    return ExportManager.excel(qs, ORDER_EXPORT_COLUMNS, basename)
+
+def export_orders_csv(qs, basename='orders'):
+    return ExportManager.csv(qs, ORDER_EXPORT_COLUMNS, basename)
 
 def export_orders_pdf(qs, basename='orders'):
-    return HttpResponse('PDF export temporarily disabled', status=503)
+    return ExportManager.pdf(qs, ORDER_EXPORT_COLUMNS, basename)
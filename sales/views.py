@@ -2,8 +2,15 @@ from django.shortcuts import render,get_object_or_404
 from inventory.models import Category,Product
 from people.models import Customer
 from sales.services.order_service import OrderManager
+from sales.services.summary_service import SalesSummaryManager
+from sales.services.cost_service import CostManager
+from inventory.services.valuation_service import ValuationManager
+from inventory.services.catalog_service import CatalogManager
+from reports.services.job_service import ExportJobManager
 from django.db.models import Prefetch
-from .models import Order, OrderItem
+from .models import Order, OrderItem, RegisterSession
+from sales.services.register_service import RegisterError, RegisterManager
+from sales.services.payment_service import PaymentError, PaymentManager
 from django.db.models import F
 from django.http import JsonResponse
 from decimal import Decimal
@@ -18,7 +25,8 @@ from django.contrib import messages
 import json
 from django.contrib.auth.decorators import login_required
 from django.utils.decorators import method_decorator
-from django.views.decorators.http import require_http_methods
+from django.views.decorators.http import require_http_methods, condition
+from django.views.decorators.cache import cache_control
 from django.views.decorators.csrf import csrf_exempt
 from datetime import timedelta
 
@@ -29,11 +37,12 @@ def online_orders(request):
     search = request.GET.get('search', '').strip()
     export = request.GET.get('export', '').lower()
 
+    if export in ('excel', 'csv', 'pdf'):
+        return ExportJobManager.respond(
+            request, 'orders', export, {'search': search, 'source': 'online'}, 'online-orders'
+        )
+
     qs = get_orders_queryset(search=search, source='online')
-    if export == 'excel':
-        return export_orders_excel(qs, basename='online-orders')
-    if export == 'pdf':
-        return export_orders_pdf(qs, basename='online-orders')
 
     return render(request, 'sales/online-orders.html', {
         'orders': qs,
@@ -54,19 +63,18 @@ def pos_orders(request):
     payment_status = request.GET.get('payment_status', '').strip()  # Single selection
     sort_by = request.GET.get('sort_by', '').strip()
 
-    qs = get_orders_queryset(
-        search=search, 
-        source='pos',
-        customer=customer,
-        status=status,
-        payment_status=payment_status,
-        sort_by=sort_by
-    )
-    
-    if export == 'excel':
-        return export_orders_excel(qs, basename='pos-orders')
-    if export == 'pdf':
-        return export_orders_pdf(qs, basename='pos-orders')
+    filters = {
+        'search': search,
+        'source': 'pos',
+        'customer': customer,
+        'status': status,
+        'payment_status': payment_status,
+        'sort_by': sort_by,
+    }
+    if export in ('excel', 'csv', 'pdf'):
+        return ExportJobManager.respond(request, 'orders', export, filters, 'pos-orders')
+
+    qs = get_orders_queryset(**filters)
 
     # Get filter options for dropdowns
     customers = Customer.objects.all().order_by('name')
@@ -98,31 +106,22 @@ def update_payment(request, order_id):
         return JsonResponse({'success': False, 'error': 'Method not allowed'}, status=405)
     
     try:
-        order = get_object_or_404(Order, pk=order_id)
-        
         # Parse request data
         data = json.loads(request.body)
         additional_amount = Decimal(str(data.get('amount', '0')))
         payment_type = data.get('payment_type', 'cash')
         
-        # Validate amount
-        if additional_amount <= 0:
-            return JsonResponse({
-                'success': False, 
-                'error': 'Amount must be greater than zero'
-            })
-        
-        # Check for overpayment
-        remaining_due = order.grand_total - order.paid_amount
-        if additional_amount > remaining_due:
-            return JsonResponse({
-                'success': False, 
-                'error': f'Amount exceeds due amount. Maximum allowed: KES {remaining_due}'
-            })
-        
-        # Update payment
-        order.paid_amount += additional_amount
-        order.update_totals()  # This will recalculate payment_status
+        # Append to the ledger; validates the amount against what is due
+        session = _register_session(request)
+        try:
+            order = PaymentManager.post(
+                order_id, additional_amount, payment_type,
+                reference=data.get('reference', ''),
+                received_by=request.user,
+                register_session_id=session.pk if session else None,
+            )
+        except PaymentError as e:
+            return JsonResponse({'success': False, 'error': str(e)})
         
         # Return updated order data
         return JsonResponse({
@@ -181,25 +180,57 @@ def sales_return(request):
 @login_required
 
 def pos(request):
-    categories = Category.objects.prefetch_related(
-        'products__stock_entries',  
-        'products__images'          
+    # Products and customers are fetched by the page from the catalog and
+    # customers endpoints; only the category tabs are rendered here.
+    return render(request,'sales/pos.html',{
+        'categories': CatalogManager.snapshot('categories', CatalogManager.categories),
+        'catalog': CatalogManager.snapshot('overview', CatalogManager.overview),
+    })
+
+
+def _catalog_page_etag(request):
+    return CatalogManager.etag(
+        'page',
+        request.GET.get('category', ''),
+        request.GET.get('cursor', ''),
+        CatalogManager.page_size(request.GET.get('limit')),
     )
+@login_required
 
-    all_products = Product.objects.select_related(
-        'category',
-        'sub_category',
-        'units'
-    ).prefetch_related(
-        'stock_entries', 
-        'images'          
+@require_http_methods(["GET"])
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=_catalog_page_etag)
+def pos_catalog(request):
+    """
+    Compact, cursor-paginated product catalog for the POS screen.
+    Query params: category (id), cursor (last product id seen), limit.
+    """
+    try:
+        category_id = int(request.GET['category']) if request.GET.get('category') else None
+        cursor = int(request.GET['cursor']) if request.GET.get('cursor') else None
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'Invalid category or cursor.'}, status=400)
+
+    data = CatalogManager.cached_page(
+        category_id=category_id,
+        cursor=cursor,
+        limit=request.GET.get('limit'),
     )
-    return render(request,'sales/pos.html',{
-        'categories':categories,
-        'customers':Customer.objects.all(),
-        'all_products':  all_products
+    return JsonResponse(data)
+@login_required
 
-    })
+@require_http_methods(["GET"])
+def pos_catalog_changes(request):
+    """
+    Delta sync for open POS terminals.
+    Query params: since (last change id applied), limit.
+    """
+    try:
+        since = int(request.GET.get('since') or 0)
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'Invalid change id.'}, status=400)
+
+    return JsonResponse(CatalogManager.changes_since(since, request.GET.get('limit')))
 @login_required
 
 def create_order(request):
@@ -209,6 +240,11 @@ def create_order(request):
         return JsonResponse({"success": False, "error": "Method not allowed"}, status=405)
 @login_required
 
+@require_http_methods(["POST"])
+def sync_orders(request):
+    return OrderManager.sync_orders(request)
+@login_required
+
 def order_detail_json(request, pk):
     order = get_object_or_404(
         Order.objects
@@ -266,134 +302,136 @@ def order_detail_json(request, pk):
         }
     }
     return JsonResponse(data)
+
+
+def _register_session(request):
+    """
+    The user's open register session: a primary-key read of the session
+    remembered when it was opened, falling back to a lookup by cashier.
+    """
+    session_id = request.session.get('register_session_id')
+    if session_id:
+        session = RegisterSession.objects.filter(
+            pk=session_id, cashier=request.user, status=RegisterSession.Status.OPEN
+        ).first()
+        if session:
+            return session
+    session = RegisterManager.current(request.user)
+    if session:
+        request.session['register_session_id'] = session.pk
+    else:
+        request.session.pop('register_session_id', None)
+    return session
+
+
+def format_kes(amount):
+    return f"KES {amount:,.2f}"
 @login_required
 
 def cash_register_data(request):
     """
-    Endpoint to fetch cash register metrics
+    Endpoint to fetch cash register metrics of the user's open shift
     """
-    try:
-        today = timezone.now().date()
-        
-        # Get today's completed orders
-        today_orders = Order.objects.filter(
-            date=today,
-            status=Order.Status.COMPLETED
-        )
-        
-        # Calculate cash in hand (assuming this is the total cash payments received)
-        cash_payments = today_orders.filter(
-            payment_status__in=[Order.PaymentStatus.PAID, Order.PaymentStatus.OVERPAID]
-        ).aggregate(total=Sum('paid_amount'))['total'] or Decimal('0.00')
-        
-        # Total sale amount (all completed orders today)
-        total_sale = today_orders.aggregate(total=Sum('grand_total'))['total'] or Decimal('0.00')
-        
-        # Total payment (all payments received today)
-        total_payment = today_orders.aggregate(total=Sum('paid_amount'))['total'] or Decimal('0.00')
-        
-        # Cash payment (orders paid with cash - assuming we track this in source or payment details)
-        cash_payment = today_orders.filter(
-            payment_status__in=[Order.PaymentStatus.PAID, Order.PaymentStatus.OVERPAID]
-        ).aggregate(total=Sum('paid_amount'))['total'] or Decimal('0.00')
-        
-        # Total sale returns (assuming negative grand_total or separate return tracking)
-        # For now, we'll calculate this as orders with negative amounts or a separate return system
-        total_returns = Decimal('0.00')  # Placeholder - implement based on your return system
-        
-        # Total expenses for today
-        total_expenses = Expense.objects.filter(
-            date=today.strftime('%Y-%m-%d')  # Expense model uses TextField for date
-        ).aggregate(
-            total=Sum('amount')  # Convert text to decimal if needed
-        )['total'] or Decimal('0.00')
-        
-        # Handle text field conversion for expenses
-        if isinstance(total_expenses, str):
-            try:
-                total_expenses = Decimal(total_expenses)
-            except:
-                total_expenses = Decimal('0.00')
-        
-        # Total cash calculation
-        total_cash = cash_payments - total_returns - total_expenses
-        
-        # Format currency for KES
-        def format_kes(amount):
-            return f"KES {amount:,.2f}"
-        
-        data = {
-            'success': True,
-            'data': {
-                'cash_in_hand': format_kes(cash_payments),
-                'total_sale_amount': format_kes(total_sale),
-                'total_payment': format_kes(total_payment),
-                'cash_payment': format_kes(cash_payment),
-                'total_sale_return': format_kes(total_returns),
-                'total_expense': format_kes(total_expenses),
-                'total_cash': format_kes(total_cash)
-            }
+    session = _register_session(request)
+    if session is None:
+        return JsonResponse({'success': True, 'open': False})
+
+    return JsonResponse({
+        'success': True,
+        'open': True,
+        'data': {
+            'session_id': session.pk,
+            'opened_at': timezone.localtime(session.opened_at).strftime('%Y-%m-%d %H:%M'),
+            'opening_float': format_kes(session.opening_float),
+            'cash_in_hand': format_kes(session.opening_float + session.cash_total),
+            'total_sale_amount': format_kes(session.sales_total),
+            'total_payment': format_kes(session.paid_total),
+            'cash_payment': format_kes(session.cash_total),
+            'mpesa_payment': format_kes(session.mpesa_total),
+            # Sale returns are not recorded yet
+            'total_sale_return': format_kes(Decimal('0.00')),
+            'total_expense': format_kes(session.expense_total),
+            'total_cash': format_kes(session.cash_in_drawer),
         }
-        
-        return JsonResponse(data)
-        
-    except Exception as e:
-        return JsonResponse({
-            'success': False,
-            'error': str(e)
-        }, status=500)
+    })
+@login_required
+
+
+@require_http_methods(["POST"])
+def open_register(request):
+    try:
+        data = json.loads(request.body or '{}')
+        opening_float = Decimal(str(data.get('opening_float') or '0'))
+        if not opening_float.is_finite():
+            raise ValueError(opening_float)
+    except (ValueError, ArithmeticError):
+        return JsonResponse({'success': False, 'error': 'Invalid opening float'}, status=400)
+
+    try:
+        session = RegisterManager.open(request.user, opening_float)
+    except RegisterError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=409)
+    request.session['register_session_id'] = session.pk
+    return JsonResponse({'success': True, 'session_id': session.pk})
+@login_required
+
+
+@require_http_methods(["POST"])
+def close_register(request):
+    session = _register_session(request)
+    if session is None:
+        return JsonResponse({'success': False, 'error': 'No open register'}, status=404)
+    try:
+        data = json.loads(request.body or '{}')
+        counted_cash = Decimal(str(data.get('counted_cash')))
+        if not counted_cash.is_finite():
+            raise ValueError(counted_cash)
+    except (ValueError, ArithmeticError):
+        return JsonResponse({'success': False, 'error': 'Enter the cash counted in the drawer'}, status=400)
+
+    try:
+        session = RegisterManager.close(session.pk, counted_cash)
+    except RegisterError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=409)
+    request.session.pop('register_session_id', None)
+    return JsonResponse({'success': True, 'z_report': RegisterManager.z_report(session)})
+@login_required
+
+
+def register_z_report(request, pk):
+    """
+    Stored figures of a register session; cashiers see their own only.
+    """
+    sessions = RegisterSession.objects.select_related('cashier')
+    if not request.user.is_superuser:
+        sessions = sessions.filter(cashier=request.user)
+    session = get_object_or_404(sessions, pk=pk)
+    return JsonResponse({'success': True, 'z_report': RegisterManager.z_report(session)})
 @login_required
 
 def today_profit_data(request):
     """
-    Endpoint to fetch today's profit data
+    Endpoint to fetch profit data: the user's open shift when there is
+    one, otherwise today's completed orders
     """
     try:
-        today = timezone.now().date()
-        
-        # Get today's completed orders
-        today_orders = Order.objects.filter(
-            date=today,
-            status=Order.Status.COMPLETED
-        )
-        
-        # Calculate total sales (revenue)
-        total_sales = today_orders.aggregate(total=Sum('grand_total'))['total'] or Decimal('0.00')
-        
-        # Calculate total cost of goods sold
-        total_cost = Decimal('0.00')
-        for order in today_orders.prefetch_related('items__product'):
-            for item in order.items.all():
-                # Get the cost price from purchase data or use a default cost calculation
-                try:
-                    # Try to get the latest purchase cost for this product
-                    latest_purchase = PurchaseItem.objects.filter(
-                        product=item.product
-                    ).order_by('-purchase__order_date').first()
-                    
-                    if latest_purchase:
-                        cost_per_unit = latest_purchase.unit_cost
-                    else:
-                        # Fallback to 70% of selling price as cost (adjust as needed)
-                        cost_per_unit = item.unit_cost * Decimal('0.7')
-                    
-                    total_cost += cost_per_unit * item.quantity
-                except:
-                    # Fallback calculation
-                    total_cost += item.unit_cost * item.quantity * Decimal('0.7')
-        
-        # Get today's expenses
-        today_expenses = Expense.objects.filter(
-            date=today.strftime('%Y-%m-%d')
-        )
-        
-        total_expenses = Decimal('0.00')
-        for expense in today_expenses:
-            try:
-                expense_amount = Decimal(expense.amount)
-                total_expenses += expense_amount
-            except:
-                continue
+        session = _register_session(request)
+        if session is not None:
+            # Running totals of the shift, no re-aggregation
+            total_sales = session.sales_total
+            total_cost = session.cost_total
+            total_expenses = session.expense_total
+            sell_discount = session.discount_total
+        else:
+            today = timezone.localdate()
+            today_totals = SalesSummaryManager.totals(today, today, status=Order.Status.COMPLETED)
+            total_sales = today_totals['gross_sales']
+            sell_discount = today_totals['discount']
+            # Cost of goods sold from the cost snapshotted on each line
+            total_cost = CostManager.cost_of_sales(CostManager.completed_lines(today, today))
+            total_expenses = Expense.objects.filter(date=today).aggregate(
+                total=Sum('amount')
+            )['total'] or Decimal('0.00')
         
         # Calculate profit
         gross_profit = total_sales - total_cost
@@ -406,18 +444,14 @@ def today_profit_data(request):
             else:
                 return f"KES {amount:.2f}"
         
-        def format_kes(amount):
-            return f"KES {amount:,.2f}"
-        
         # Additional metrics for the detailed table
         product_revenue = total_sales
         product_cost = total_cost
         stock_adjustment = Decimal('0.00')  # Placeholder
         deposit_payment = Decimal('0.00')  # Placeholder
         purchase_shipping = Decimal('0.00')  # Placeholder
-        sell_discount = Decimal('0.00')  # Placeholder
         sell_return = Decimal('0.00')  # Placeholder
-        closing_stock = Decimal('0.00')  # Placeholder - calculate from inventory
+        closing_stock = ValuationManager.total_stock_value()
         
         data = {
             'success': True,
@@ -461,31 +495,25 @@ def cashier_weekly_summary(request):
     week_start = today - timedelta(days=today.weekday())
     week_end = week_start + timedelta(days=6)
     
-    # Weekly metrics
-    weekly_orders = Order.objects.filter(
-        date__range=[week_start, week_end]
-    )
+    # Weekly metrics, from the daily rollup
+    weekly_all = SalesSummaryManager.by_day(week_start, week_end)
+    weekly_completed = SalesSummaryManager.by_day(week_start, week_end, status=Order.Status.COMPLETED)
     
-    total_sales = weekly_orders.filter(status=Order.Status.COMPLETED).aggregate(
-        total=Sum('grand_total')
-    )['total'] or Decimal('0.00')
+    total_sales = sum((day['gross_sales'] for day in weekly_completed.values()), Decimal('0.00'))
     
-    total_orders = weekly_orders.count()
+    total_orders = sum(day['order_count'] for day in weekly_all.values())
     
     # Generate daily breakdown
     daily_data = []
     current_date = week_start
     while current_date <= week_end:
-        day_orders = weekly_orders.filter(date=current_date)
-        day_sales = day_orders.filter(status=Order.Status.COMPLETED).aggregate(
-            total=Sum('grand_total')
-        )['total'] or Decimal('0.00')
+        day_sales = weekly_completed.get(current_date, {}).get('gross_sales', Decimal('0.00'))
         
         daily_data.append({
             'date': current_date.strftime('%Y-%m-%d'),
             'day': current_date.strftime('%A'),
             'sales': format_kes(day_sales),
-            'orders': day_orders.count(),
+            'orders': weekly_all.get(current_date, {}).get('order_count', 0),
         })
         current_date += timedelta(days=1)
     
@@ -37,6 +37,7 @@ logger = logging.getLogger(__name__)
 class POSServer:
     def __init__(self):
         self.django_process = None
+        self.export_worker = None
         self.ngrok_tunnel = None
         self.running = False
         
@@ -185,6 +186,10 @@ class POSServer:
             
             if self.django_process.poll() is None:
                 logger.info(f"✅ Django server started successfully")
+                # Background exports (Excel/CSV downloads) are generated here
+                self.export_worker = subprocess.Popen([
+                    sys.executable, 'manage.py', 'run_export_jobs'
+                ])
                 return True
             else:
                 logger.error("❌ Django server failed to start")
@@ -210,6 +215,10 @@ class POSServer:
                 logger.warning("Django server didn't stop gracefully, killing...")
                 self.django_process.kill()
         
+        if self.export_worker:
+            logger.info("Stopping export worker...")
+            self.export_worker.terminate()
+        
         # Stop ngrok tunnel
         logger.info("Stopping ngrok tunnel...")
         ngrok_service.stop_tunnel()
@@ -0,0 +1,276 @@
+/**
+ * POS Catalog Loader
+ * Fills the POS product grids page by page from the catalog endpoint.
+ * Each grid ([data-catalog-grid]) loads its first page when it becomes
+ * visible and fetches the next page as the cashier scrolls to its end.
+ * Once loaded, it polls the change feed and patches price and stock on
+ * the cards in place, so a till open all day stays current without
+ * reloading the catalog.
+ * Also switches the customer picker to a searchable AJAX lookup.
+ */
+class POSCatalog {
+    constructor() {
+        this.grids = [];
+        this.observer = null;
+        this.changesUrl = null;
+        this.since = null;
+        this.pollInterval = 5000;
+        this.pollTimer = null;
+        this.init();
+    }
+
+    init() {
+        if (document.readyState === 'loading') {
+            document.addEventListener('DOMContentLoaded', () => this.setup());
+        } else {
+            this.setup();
+        }
+    }
+
+    setup() {
+        const elements = document.querySelectorAll('[data-catalog-grid]');
+        if (!elements.length) return;
+
+        const container = document.querySelector('[data-catalog-changes-url]');
+        this.changesUrl = container ? container.dataset.catalogChangesUrl : null;
+
+        this.observer = new IntersectionObserver(entries => {
+            entries.forEach(entry => {
+                if (entry.isIntersecting) {
+                    this.loadNext(entry.target.__catalogGrid);
+                }
+            });
+        }, { rootMargin: '400px 0px' });
+
+        elements.forEach(el => {
+            const sentinel = document.createElement('div');
+            sentinel.className = 'col-12 catalog-sentinel';
+            el.appendChild(sentinel);
+
+            const grid = {
+                el,
+                sentinel,
+                url: el.dataset.catalogUrl,
+                category: el.dataset.category || '',
+                cursor: null,
+                done: false,
+                loading: false,
+            };
+            sentinel.__catalogGrid = grid;
+            this.grids.push(grid);
+            this.observer.observe(sentinel);
+        });
+    }
+
+    async loadNext(grid) {
+        if (grid.loading || grid.done) return;
+        grid.loading = true;
+
+        const params = new URLSearchParams();
+        if (grid.category) params.set('category', grid.category);
+        if (grid.cursor) params.set('cursor', grid.cursor);
+
+        try {
+            const resp = await fetch(`${grid.url}?${params.toString()}`, {
+                headers: { 'Accept': 'application/json' }
+            });
+            if (!resp.ok) throw new Error(`HTTP ${resp.status}`);
+            const data = await resp.json();
+
+            const fragment = document.createDocumentFragment();
+            data.products.forEach(product => fragment.appendChild(this.renderCard(product)));
+            grid.el.insertBefore(fragment, grid.sentinel);
+
+            // Replay changes from the oldest snapshot any page came from
+            if (this.since === null || data.change_id < this.since) {
+                this.since = data.change_id;
+            }
+            this.startPolling();
+
+            grid.cursor = data.next_cursor;
+            grid.done = !data.next_cursor;
+            if (grid.done) {
+                this.observer.unobserve(grid.sentinel);
+            }
+
+            if (window.feather) feather.replace();
+            document.dispatchEvent(new CustomEvent('pos:products-rendered'));
+        } catch (error) {
+            console.error('POS Catalog: failed to load products', error);
+        } finally {
+            grid.loading = false;
+        }
+
+        // Short pages may leave the sentinel on screen; keep filling
+        if (!grid.done && this.isVisible(grid.sentinel)) {
+            this.loadNext(grid);
+        }
+    }
+
+    startPolling() {
+        if (this.pollTimer || !this.changesUrl) return;
+        this.pollTimer = setTimeout(() => this.poll(), this.pollInterval);
+    }
+
+    async poll() {
+        let more = false;
+        try {
+            if (!document.hidden && this.since !== null) {
+                const params = new URLSearchParams({ since: this.since });
+                const resp = await fetch(`${this.changesUrl}?${params.toString()}`, {
+                    headers: { 'Accept': 'application/json' }
+                });
+                if (!resp.ok) throw new Error(`HTTP ${resp.status}`);
+                const data = await resp.json();
+
+                if (data.reset) {
+                    this.reload();
+                } else {
+                    this.applyChanges(data);
+                    this.since = data.last_id;
+                    more = data.has_more;
+                }
+            }
+        } catch (error) {
+            console.error('POS Catalog: failed to fetch changes', error);
+        }
+        this.pollTimer = setTimeout(() => this.poll(), more ? 0 : this.pollInterval);
+    }
+
+    applyChanges(data) {
+        if (!data.products.length && !data.deleted.length) return;
+
+        data.deleted.forEach(id => {
+            this.cardsFor(id).forEach(card => card.parentElement.remove());
+        });
+
+        data.products.forEach(product => {
+            this.grids.forEach(grid => {
+                const belongs = !grid.category || Number(grid.category) === product.category_id;
+                const card = grid.el.querySelector(`.product-item[data-id="${product.id}"]`);
+                if (card && belongs) {
+                    card.parentElement.replaceWith(this.renderCard(product));
+                } else if (card) {
+                    card.parentElement.remove();
+                } else if (belongs && grid.done) {
+                    // Pages still to come will bring it; a finished grid needs it appended
+                    grid.el.insertBefore(this.renderCard(product), grid.sentinel);
+                }
+            });
+        });
+
+        if (window.feather) feather.replace();
+        document.dispatchEvent(new CustomEvent('pos:products-rendered'));
+    }
+
+    cardsFor(id) {
+        return document.querySelectorAll(`[data-catalog-grid] .product-item[data-id="${id}"]`);
+    }
+
+    reload() {
+        // The change log no longer reaches back to our cursor; start over
+        this.since = null;
+        this.grids.forEach(grid => {
+            grid.el.querySelectorAll('.product-item').forEach(card => card.parentElement.remove());
+            grid.cursor = null;
+            grid.done = false;
+            this.observer.observe(grid.sentinel);
+        });
+    }
+
+    isVisible(el) {
+        if (!el.offsetParent) return false;
+        const rect = el.getBoundingClientRect();
+        return rect.top < window.innerHeight + 400;
+    }
+
+    renderCard(product) {
+        const col = document.createElement('div');
+        col.className = 'col-sm-6 col-md-6 col-lg-4 col-xl-3';
+
+        const card = document.createElement('div');
+        card.className = 'product-info card product-item';
+        card.dataset.id = product.id;
+        card.dataset.name = product.name;
+        card.dataset.sku = product.sku;
+        card.dataset.price = product.price;
+        card.dataset.discount = product.discount;
+        card.dataset.discountType = product.discount_type;
+        card.dataset.tax = product.tax;
+        card.dataset.taxType = product.tax_type;
+
+        const imgLink = document.createElement('a');
+        imgLink.href = 'javascript:void(0);';
+        imgLink.className = 'pro-img';
+        const img = document.createElement('img');
+        img.src = product.thumbnail;
+        img.alt = product.name;
+        img.loading = 'lazy';
+        const check = document.createElement('span');
+        check.innerHTML = '<i data-feather="check" class="feather-16"></i>';
+        imgLink.append(img, check);
+
+        const category = document.createElement('h6');
+        category.className = 'cat-name';
+        category.appendChild(this.textLink(product.category));
+
+        const name = document.createElement('h6');
+        name.className = 'product-name';
+        name.appendChild(this.textLink(product.name));
+
+        const price = document.createElement('div');
+        price.className = 'd-flex align-items-center justify-content-between price';
+        const qty = document.createElement('span');
+        qty.textContent = `${product.stock} Pcs`;
+        const amount = document.createElement('p');
+        amount.textContent = `ksh ${product.price}`;
+        price.append(qty, amount);
+
+        card.append(imgLink, category, name, price);
+        col.appendChild(card);
+        return col;
+    }
+
+    textLink(text) {
+        const link = document.createElement('a');
+        link.href = 'javascript:void(0);';
+        link.textContent = text;
+        return link;
+    }
+}
+
+/**
+ * Customer picker: search customers server-side instead of rendering
+ * every customer into the page.
+ */
+function setupCustomerLookup() {
+    if (typeof $ === 'undefined' || !$.fn.select2) return;
+    const $select = $('#customer-select');
+    const url = $select.data('customers-url');
+    if (!$select.length || !url) return;
+
+    if ($select.hasClass('select2-hidden-accessible')) {
+        $select.select2('destroy');
+    }
+    $select.select2({
+        width: '100%',
+        ajax: {
+            url,
+            delay: 250,
+            data: params => ({ q: params.term || '' }),
+            processResults: data => ({
+                results: [{ id: '', text: 'Walk in Customer' }].concat(
+                    data.customers.map(c => ({ id: c.id, text: c.name }))
+                )
+            })
+        }
+    });
+}
+
+(function() {
+    'use strict';
+    window.POSCatalog = new POSCatalog();
+    if (typeof $ !== 'undefined') {
+        $(setupCustomerLookup);
+    }
+})();
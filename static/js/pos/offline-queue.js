@@ -0,0 +1,100 @@
+/**
+ * POS Offline Queue
+ * Keeps sales that could not reach the server in localStorage and flushes
+ * them in batches to the sync endpoint once the connection returns.
+ * Every sale carries a client-generated idempotency key, so a batch that
+ * is resent after a dropped response never creates an order twice.
+ */
+class POSOfflineQueue {
+    constructor(syncUrl, csrfToken) {
+        this.syncUrl = syncUrl;
+        this.csrfToken = csrfToken;
+        this.storageKey = 'pos.offlineOrders';
+        this.failedKey = 'pos.failedOrders';
+        this.batchSize = 50;
+        this.retryInterval = 30000;
+        this.flushing = false;
+
+        window.addEventListener('online', () => this.flush());
+        setInterval(() => this.flush(), this.retryInterval);
+        this.flush();
+    }
+
+    static newKey() {
+        if (window.crypto && crypto.randomUUID) return crypto.randomUUID();
+        return `${Date.now().toString(36)}-${Math.random().toString(36).slice(2, 12)}`;
+    }
+
+    read(key) {
+        try {
+            return JSON.parse(localStorage.getItem(key)) || [];
+        } catch (e) {
+            return [];
+        }
+    }
+
+    write(key, orders) {
+        localStorage.setItem(key, JSON.stringify(orders));
+    }
+
+    get pending() {
+        return this.read(this.storageKey);
+    }
+
+    enqueue(payload) {
+        const orders = this.pending;
+        orders.push(Object.assign({ date: new Date().toISOString().slice(0, 10) }, payload));
+        this.write(this.storageKey, orders);
+        this.notify();
+    }
+
+    async flush() {
+        if (this.flushing || !navigator.onLine) return;
+        let orders = this.pending;
+        if (!orders.length) return;
+
+        this.flushing = true;
+        try {
+            while (orders.length) {
+                const batch = orders.slice(0, this.batchSize);
+                const resp = await fetch(this.syncUrl, {
+                    method: 'POST',
+                    headers: {
+                        'Content-Type': 'application/json',
+                        'X-CSRFToken': this.csrfToken
+                    },
+                    body: JSON.stringify({ orders: batch })
+                });
+                if (!resp.ok) throw new Error(`HTTP ${resp.status}`);
+                const data = await resp.json();
+
+                // Rejected sales need a person; park them instead of retrying forever
+                const failed = data.results.filter(r => r.status === 'error');
+                if (failed.length) {
+                    const rejected = batch.filter(o => failed.some(r => r.idempotency_key === o.idempotency_key));
+                    this.write(this.failedKey, this.read(this.failedKey).concat(
+                        rejected.map(o => Object.assign({}, o, {
+                            error: failed.find(r => r.idempotency_key === o.idempotency_key).error
+                        }))
+                    ));
+                    console.warn('POS Offline Queue: sales rejected by server', failed);
+                }
+
+                const done = new Set(data.results.map(r => r.idempotency_key));
+                orders = this.pending.filter(o => !done.has(o.idempotency_key));
+                this.write(this.storageKey, orders);
+                this.notify();
+            }
+        } catch (error) {
+            console.error('POS Offline Queue: sync failed, will retry', error);
+        } finally {
+            this.flushing = false;
+        }
+    }
+
+    notify() {
+        document.dispatchEvent(new CustomEvent('pos:offline-queue', {
+            detail: { pending: this.pending.length, failed: this.read(this.failedKey).length }
+        }));
+    }
+}
@@ -0,0 +1,66 @@
+from datetime import date
+from decimal import Decimal
+
+from django.db.models import DateField
+from django.db.models.functions import Cast
+from django.test import TestCase
+
+from finance.models import Expense
+from people.models import Supplier
+from purchases.models import Purchase
+from reports.services.aggregation import AggregationManager
+
+
+class TimeSeriesTests(TestCase):
+    def setUp(self):
+        supplier = Supplier.objects.create(code='S1', name='Supplier', email='s@example.com', phone='1', country='KE')
+        for day, total in [(date(2026, 1, 5), '10.00'), (date(2026, 1, 5), '5.00'), (date(2026, 1, 7), '2.50'),
+                           (date(2026, 3, 1), '100.00')]:
+            purchase = Purchase.objects.create(supplier=supplier, grand_total=Decimal(total))
+            Purchase.objects.filter(pk=purchase.pk).update(order_date=day)
+
+    def test_daily_series_is_zero_filled(self):
+        series = AggregationManager.time_series(
+            Purchase.objects.all(), 'order_date', 'grand_total', 'day', date(2026, 1, 4), date(2026, 1, 7)
+        )
+        self.assertEqual(series, [
+            (date(2026, 1, 4), Decimal('0.00')),
+            (date(2026, 1, 5), Decimal('15.00')),
+            (date(2026, 1, 6), Decimal('0.00')),
+            (date(2026, 1, 7), Decimal('2.50')),
+        ])
+
+    def test_weekly_and_monthly_buckets(self):
+        weekly = AggregationManager.time_series(
+            Purchase.objects.all(), 'order_date', 'grand_total', 'week', date(2026, 1, 1), date(2026, 1, 14)
+        )
+        self.assertEqual(weekly, [
+            (date(2025, 12, 29), Decimal('0.00')),
+            (date(2026, 1, 5), Decimal('17.50')),
+            (date(2026, 1, 12), Decimal('0.00')),
+        ])
+
+        monthly = AggregationManager.time_series(Purchase.objects.all(), 'order_date', 'grand_total', 'month')
+        self.assertEqual(monthly, [
+            (date(2026, 1, 1), Decimal('17.50')),
+            (date(2026, 2, 1), Decimal('0.00')),
+            (date(2026, 3, 1), Decimal('100.00')),
+        ])
+
+    def test_single_query_for_any_range(self):
+        with self.assertNumQueries(1):
+            series = AggregationManager.time_series(
+                Purchase.objects.all(), 'order_date', 'grand_total', 'day', date(2025, 1, 1), date(2026, 12, 31)
+            )
+        self.assertEqual(len(series), 730)
+
+    def test_datetime_and_annotated_fields(self):
+        Expense.objects.create(name='Rent', description='', date='2026-02-03', amount=Decimal('40.00'), status='paid')
+        by_created = AggregationManager.time_series(Expense.objects.all(), 'date_created', 'amount', 'month')
+        self.assertEqual(sum(total for _, total in by_created), Decimal('40.00'))
+
+        expenses = Expense.objects.annotate(date_dt=Cast('date', DateField()))
+        self.assertEqual(
+            AggregationManager.time_series(expenses, 'date_dt', 'amount', 'month'),
+            [(date(2026, 2, 1), Decimal('40.00'))],
+        )
@@ -0,0 +1,175 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from inventory.models import Category, Product, Stock
+from inventory.services.catalog_service import CatalogManager
+from inventory.services.stock_service import StockManager
+
+
+class CatalogManagerTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.drinks = Category.objects.create(name='Drinks')
+        self.snacks = Category.objects.create(name='Snacks')
+        for i in range(5):
+            category = self.drinks if i % 2 == 0 else self.snacks
+            product = Product.objects.create(name=f'Product {i}', sku=f'SKU{i}', category=category)
+            Stock.objects.create(product=product, quantity=10 + i, price=Decimal('20.00'), tax=0, discount=0)
+
+    def test_pages_follow_cursor_until_exhausted(self):
+        first = CatalogManager.page(limit=2)
+        second = CatalogManager.page(cursor=first['next_cursor'], limit=2)
+        third = CatalogManager.page(cursor=second['next_cursor'], limit=2)
+
+        names = [p['name'] for p in first['products'] + second['products'] + third['products']]
+        self.assertEqual(names, [f'Product {i}' for i in range(5)])
+        self.assertIsNone(third['next_cursor'])
+        self.assertEqual(
+            set(first['products'][0]),
+            {'id', 'name', 'sku', 'category', 'category_id', 'price', 'stock', 'tax', 'tax_type',
+             'discount', 'discount_type', 'thumbnail'},
+        )
+
+    def test_category_filter(self):
+        page = CatalogManager.page(category_id=self.snacks.id)
+        self.assertEqual([p['name'] for p in page['products']], ['Product 1', 'Product 3'])
+
+    def test_page_query_count_is_constant(self):
+        with CaptureQueriesContext(connection) as ctx:
+            CatalogManager.page(limit=5)
+        # change feed head, products, stock rows, images
+        self.assertEqual(len(ctx.captured_queries), 4)
+
+    def test_endpoint_rejects_bad_cursor(self):
+        user = User.objects.create_user(username='cashier', password='pass')
+        self.client.force_login(user)
+        response = self.client.get(reverse('sales:pos-catalog'), {'cursor': 'abc'})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get(reverse('sales:pos-catalog'), {'category': self.drinks.id})
+        self.assertEqual(len(response.json()['products']), 3)
+
+
+# An in-process cache, so a hit is visibly free of queries (the database
+# cache backend would answer it with one)
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'catalog-tests'}})
+class CatalogSnapshotTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.product = Product.objects.create(name='Soda', sku='SODA')
+        self.stock = Stock.objects.create(product=self.product, quantity=10, price=Decimal('20.00'), tax=0, discount=0)
+        self.user = User.objects.create_user(username='cashier', password='pass')
+
+    def test_snapshot_is_served_without_queries(self):
+        CatalogManager.cached_page()
+        with self.assertNumQueries(0):
+            page = CatalogManager.cached_page()
+        self.assertEqual(page['products'][0]['stock'], 10)
+
+    def test_writes_bump_version_after_commit(self):
+        before = CatalogManager.version()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.name = 'Cola'
+            self.product.save()
+        self.assertNotEqual(CatalogManager.version(), before)
+        self.assertEqual(CatalogManager.cached_page()['products'][0]['name'], 'Cola')
+
+    def test_sales_keep_snapshot_and_append_to_feed(self):
+        page = CatalogManager.cached_page()
+        before = CatalogManager.version()
+        with self.captureOnCommitCallbacks(execute=True):
+            StockManager.take([(self.product.id, 3)], {self.product.id: self.product})
+
+        self.assertEqual(CatalogManager.version(), before)
+        with self.assertNumQueries(0):
+            self.assertEqual(CatalogManager.cached_page()['products'][0]['stock'], 10)
+        feed = CatalogManager.changes_since(page['change_id'])
+        self.assertEqual([p['stock'] for p in feed['products']], [7])
+
+    def test_stock_edits_invalidate_snapshot(self):
+        CatalogManager.cached_page()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.stock.price = Decimal('25.00')
+            self.stock.save()
+        self.assertEqual(CatalogManager.cached_page()['products'][0]['price'], '25.00')
+
+    def test_matching_etag_returns_not_modified(self):
+        self.client.force_login(self.user)
+        url = reverse('sales:pos-catalog')
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        etag = first['ETag']
+
+        second = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(second.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Stock.objects.filter(pk=self.stock.pk).first().save()
+        third = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(third.status_code, 200)
+
+
+class CatalogChangeFeedTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.product = Product.objects.create(name='Soda', sku='SODA')
+        self.stock = Stock.objects.create(product=self.product, quantity=10, price=Decimal('20.00'), tax=0, discount=0)
+        self.head = CatalogManager.last_change_id()
+
+    def test_sale_appears_in_feed_with_current_stock(self):
+        StockManager.take([(self.product.id, 4)], {self.product.id: self.product})
+
+        feed = CatalogManager.changes_since(self.head)
+        self.assertEqual([p['stock'] for p in feed['products']], [6])
+        self.assertEqual(feed['deleted'], [])
+        self.assertGreater(feed['last_id'], self.head)
+        self.assertEqual(CatalogManager.changes_since(feed['last_id'])['products'], [])
+
+    def test_deleted_product_leaves_tombstone(self):
+        product_id = self.product.id
+        self.product.delete()
+
+        feed = CatalogManager.changes_since(self.head)
+        self.assertEqual(feed['products'], [])
+        self.assertEqual(feed['deleted'], [product_id])
+
+    def test_batches_follow_last_id(self):
+        for i in range(3):
+            Product.objects.create(name=f'Extra {i}', sku=f'EXTRA{i}')
+
+        first = CatalogManager.changes_since(self.head, limit=2)
+        self.assertTrue(first['has_more'])
+        second = CatalogManager.changes_since(first['last_id'], limit=2)
+        self.assertFalse(second['has_more'])
+        names = [p['name'] for p in first['products'] + second['products']]
+        self.assertEqual(names, ['Extra 0', 'Extra 1', 'Extra 2'])
+
+    def test_pruned_cursor_requests_reset(self):
+        self.product.save()
+        self.product.save()
+        CatalogManager.prune_changes(timezone.now() + timedelta(seconds=1))
+
+        self.assertTrue(CatalogManager.changes_since(self.head)['reset'])
+        self.assertFalse(CatalogManager.changes_since(CatalogManager.last_change_id())['reset'])
+
+    def test_category_changes_reach_its_products(self):
+        category = Category.objects.create(name='Drinks')
+        self.product.category = category
+        self.product.save()
+        head = CatalogManager.last_change_id()
+
+        category.name = 'Beverages'
+        category.save()
+        feed = CatalogManager.changes_since(head)
+        self.assertEqual([p['category'] for p in feed['products']], ['Beverages'])
+
+        category.delete()
+        feed = CatalogManager.changes_since(feed['last_id'])
+        self.assertEqual([(p['category'], p['category_id']) for p in feed['products']], [('', None)])
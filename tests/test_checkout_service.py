@@ -0,0 +1,150 @@
+import json
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from inventory.models import Product, Stock
+from sales.models import Order, OrderItem, Invoice, InvoiceItem
+from sales.services.checkout_service import CheckoutService, CheckoutError, DuplicateCheckout
+
+
+class CheckoutServiceTests(TestCase):
+    def setUp(self):
+        self.products = []
+        for i in range(5):
+            product = Product.objects.create(name=f'Product {i}', purchase_price=Decimal('50.00'))
+            Stock.objects.create(product=product, quantity=100, price=Decimal('100.00'), tax=0, discount=0)
+            self.products.append(product)
+
+    def _payload(self, products, **extra):
+        payload = {
+            'source': 'pos',
+            'items': [
+                {'product_id': p.id, 'purchase_price': '100.00', 'tax': '0.00', 'quantity': 2}
+                for p in products
+            ],
+        }
+        payload.update(extra)
+        return payload
+
+    def test_creates_order_with_totals_stock_and_invoice(self):
+        order, invoice = CheckoutService.checkout(self._payload(self.products[:3], paid_amount='250.00'))
+
+        order.refresh_from_db()
+        self.assertEqual(order.items.count(), 3)
+        self.assertEqual(order.grand_total, Decimal('600.00'))
+        self.assertEqual(order.paid_amount, Decimal('250.00'))
+        self.assertEqual(order.due_amount, Decimal('350.00'))
+        self.assertEqual(order.payment_status, Order.PaymentStatus.PARTIAL)
+        self.assertRegex(order.reference, r'^ORD-\d{8}-\d{5}$')
+        self.assertRegex(invoice.invoice_no, r'^INV-\d{8}-\d{5}$')
+        for product in self.products[:3]:
+            self.assertEqual(product.stock().quantity, 98)
+
+    def test_products_and_lines_use_single_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            CheckoutService.checkout(self._payload(self.products))
+        sql = [q['sql'] for q in ctx.captured_queries]
+        product_reads = [q for q in sql if q.startswith('SELECT') and 'FROM "inventory_product"' in q]
+        line_inserts = [q for q in sql if q.startswith('INSERT INTO "sales_orderitem"')]
+        order_writes = [q for q in sql if q.startswith(('INSERT INTO "sales_order"', 'UPDATE "sales_order"'))]
+        self.assertEqual(len(product_reads), 1)
+        self.assertEqual(len(line_inserts), 1)
+        self.assertEqual(len(order_writes), 1)
+
+    def test_invoice_references_order_lines(self):
+        order, invoice = CheckoutService.checkout(self._payload(self.products[:3]))
+
+        self.assertEqual(invoice.order, order)
+        self.assertFalse(InvoiceItem.objects.exists())
+        self.assertEqual(invoice.amount, Decimal('600.00'))
+        self.assertEqual(invoice.status, Invoice.Status.OPEN)
+
+        # Payment reconciliation recomputes from the order's lines
+        invoice.amount_paid = Decimal('600.00')
+        invoice.update_amounts()
+        invoice.refresh_from_db()
+        self.assertEqual(invoice.amount, Decimal('600.00'))
+        self.assertEqual(invoice.amount_due, Decimal('0.00'))
+        self.assertEqual(invoice.status, Invoice.Status.PAID)
+
+    def test_missing_product_rolls_back(self):
+        payload = self._payload(self.products[:2])
+        payload['items'].append({'product_id': 999999, 'purchase_price': '10.00', 'quantity': 1})
+
+        with self.assertRaises(CheckoutError) as ctx:
+            CheckoutService.checkout(payload)
+
+        self.assertEqual(ctx.exception.status, 404)
+        self.assertFalse(Order.objects.exists())
+        self.assertFalse(OrderItem.objects.exists())
+        self.assertEqual(self.products[0].stock().quantity, 100)
+
+    def test_rejects_invalid_line(self):
+        payload = self._payload(self.products[:1])
+        payload['items'][0]['quantity'] = 'two'
+        with self.assertRaises(CheckoutError):
+            CheckoutService.checkout(payload)
+        self.assertFalse(Order.objects.exists())
+
+
+class OfflineSyncTests(TestCase):
+    def setUp(self):
+        self.product = Product.objects.create(name='Bread', purchase_price=Decimal('30.00'))
+        Stock.objects.create(product=self.product, quantity=5, price=Decimal('50.00'), tax=0, discount=0)
+
+    def _sale(self, key, quantity=1, **extra):
+        sale = {
+            'idempotency_key': key,
+            'source': 'pos',
+            'items': [{'product_id': self.product.id, 'purchase_price': '50.00', 'quantity': quantity}],
+        }
+        sale.update(extra)
+        return sale
+
+    def test_resent_sale_resolves_to_first_order(self):
+        order, _ = CheckoutService.checkout(self._sale('till-1-0001'))
+
+        with self.assertRaises(DuplicateCheckout) as ctx:
+            CheckoutService.checkout(self._sale('till-1-0001'))
+
+        self.assertEqual(ctx.exception.order, order)
+        self.assertEqual(Order.objects.count(), 1)
+        self.assertEqual(self.product.stock().quantity, 4)
+
+    def test_batch_reports_each_sale(self):
+        yesterday = timezone.localdate() - timedelta(days=1)
+        CheckoutService.checkout(self._sale('a'))
+
+        results = CheckoutService.ingest([
+            self._sale('a'),
+            self._sale('b', date=yesterday.isoformat()),
+            self._sale('c', quantity=50),
+            self._sale(''),
+        ])
+
+        self.assertEqual([r['status'] for r in results], ['duplicate', 'created', 'error', 'error'])
+        self.assertEqual(results[2]['out_of_stock'][0]['available'], 3)
+        self.assertEqual(Order.objects.get(pk=results[1]['order_id']).date, yesterday)
+        self.assertEqual(Order.objects.count(), 2)
+
+    def test_sync_endpoint(self):
+        self.client.force_login(User.objects.create_user(username='cashier', password='pass'))
+        body = json.dumps({'orders': [self._sale('k1'), self._sale('k2')]})
+
+        first = self.client.post(reverse('sales:sync-orders'), body, content_type='application/json')
+        again = self.client.post(reverse('sales:sync-orders'), body, content_type='application/json')
+
+        self.assertEqual([r['status'] for r in first.json()['results']], ['created', 'created'])
+        self.assertEqual([r['status'] for r in again.json()['results']], ['duplicate', 'duplicate'])
+        self.assertEqual(
+            [r['invoice_no'] for r in first.json()['results']],
+            [r['invoice_no'] for r in again.json()['results']],
+        )
+        self.assertEqual(Order.objects.count(), 2)
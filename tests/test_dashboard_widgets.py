@@ -0,0 +1,103 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from inventory.models import Product, Stock
+from landing.services.dashboard_service import (
+    CountsWidget, DashboardManager, RecentSalesWidget, WIDGETS,
+)
+from people.models import Supplier
+from sales.services.checkout_service import CheckoutService
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'dashboard-tests'}})
+class DashboardWidgetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.product = Product.objects.create(name='Soda', purchase_price=Decimal('1.00'))
+        self.stock = Stock.objects.create(product=self.product, quantity=50, price=Decimal('2.00'), tax=0, discount=0)
+
+    def _sell(self, quantity=1):
+        with self.captureOnCommitCallbacks(execute=True):
+            CheckoutService.checkout({
+                'source': 'pos',
+                'items': [{'product_id': self.product.id, 'purchase_price': '2.00', 'quantity': quantity}],
+            })
+
+    def test_widgets_are_cached_until_a_dependency_changes(self):
+        DashboardManager.render(CountsWidget())
+
+        with self.assertNumQueries(0):
+            DashboardManager.render(CountsWidget())
+
+        # Stock is not read by the counts widget
+        with self.captureOnCommitCallbacks(execute=True):
+            self.stock.quantity = 10
+            self.stock.save()
+        with self.assertNumQueries(0):
+            DashboardManager.render(CountsWidget())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Supplier.objects.create(code='S1', name='Acme', email='a@example.com', phone='1', country='KE')
+        with mock.patch.object(CountsWidget, 'context', return_value={'suppliers': 1}) as context:
+            DashboardManager.render(CountsWidget())
+        context.assert_called_once()
+
+    def test_recompute_is_single_flight(self):
+        self._sell()
+        stale = DashboardManager.render(RecentSalesWidget())
+        self._sell()
+        lock = f'{DashboardManager._base(RecentSalesWidget())}:lock'
+
+        # Another request is already recomputing: its last result is served
+        cache.add(lock, 1)
+        with mock.patch.object(RecentSalesWidget, 'render') as render:
+            for _ in range(20):
+                self.assertEqual(DashboardManager.render(RecentSalesWidget()), stale)
+        render.assert_not_called()
+
+        cache.delete(lock)
+        with mock.patch.object(RecentSalesWidget, 'render', return_value='fresh') as render:
+            for _ in range(20):
+                self.assertEqual(DashboardManager.render(RecentSalesWidget()), 'fresh')
+        render.assert_called_once()
+
+    def test_first_render_waits_for_the_lock_holder(self):
+        widget = RecentSalesWidget()
+        cache.add(f'{DashboardManager._base(widget)}:lock', 1)
+
+        with mock.patch.object(DashboardManager, 'WAIT', 0.1), \
+                mock.patch.object(RecentSalesWidget, 'render', return_value='built') as render:
+            self.assertEqual(DashboardManager.render(widget), 'built')
+        render.assert_called_once()
+
+    def test_recent_sales_render_in_one_query(self):
+        for _ in range(5):
+            self._sell()
+
+        with CaptureQueriesContext(connection) as queries:
+            html = RecentSalesWidget().render()
+
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(html.count('Soda'), 5)
+
+    def test_homepage_inlines_cached_widgets_and_defers_the_rest(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'a@example.com', 'pass'))
+
+        response = self.client.get(reverse('landing:homepage'))
+        self.assertContains(response, 'data-widget-url="', count=len(WIDGETS))
+
+        response = self.client.get(reverse('landing:widget', args=['counts']))
+        self.assertContains(response, 'Overall Information')
+
+        response = self.client.get(reverse('landing:homepage'))
+        self.assertContains(response, 'data-widget-url="', count=len(WIDGETS) - 1)
+        self.assertContains(response, 'Overall Information')
+
+        self.assertEqual(self.client.get(reverse('landing:widget', args=['nope'])).status_code, 404)
@@ -0,0 +1,63 @@
+from datetime import date
+from decimal import Decimal
+from importlib import import_module
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from finance.models import Expense, ExpenseCategory
+from reports.services.dataset_service import ExpenseReport, ProfitLossReport
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}})
+class ExpenseDateTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'a@example.com', 'pass'))
+        self.category = ExpenseCategory.objects.create(name='Rent', description='')
+
+    def _expense(self, day, amount='10.00', name='Rent'):
+        return Expense.objects.create(
+            name=name, description='', category=self.category, date=day, amount=Decimal(amount), status='paid',
+        )
+
+    def test_form_dates_are_parsed(self):
+        self.client.post(reverse('finance:create-expense'), {
+            'name': 'Rent', 'description': '', 'category': self.category.pk,
+            'date': '03-02-2026', 'status': 'paid', 'amount': '40.00',
+        })
+        expense = Expense.objects.get()
+        self.assertEqual(expense.date, date(2026, 2, 3))
+
+        self.client.post(reverse('finance:edit-expense', args=[expense.pk]), {
+            'name': 'Rent', 'description': '', 'category': self.category.pk,
+            'date': 'soon', 'status': 'paid', 'amount': '40.00',
+        })
+        expense.refresh_from_db()
+        self.assertEqual(expense.date, date(2026, 2, 3))
+
+    def test_reports_filter_on_the_date_column(self):
+        self._expense(date(2026, 1, 31), name='January')
+        self._expense(date(2026, 2, 1), '5.00', name='February')
+        self._expense(date(2026, 2, 28), '7.00', name='Late February')
+
+        report = ExpenseReport(date(2026, 2, 1), date(2026, 2, 28))
+        with CaptureQueriesContext(connection) as queries:
+            names = [row.name for row in report.page(1)]
+
+        self.assertEqual(names, ['Late February', 'February'])
+        self.assertNotIn('CAST', ' '.join(q['sql'] for q in queries))
+
+        totals = ProfitLossReport.live_totals(date(2026, 1, 1), date(2026, 2, 28))['expenses']
+        self.assertEqual(totals, {date(2026, 1, 1): Decimal('10.00'), date(2026, 2, 1): Decimal('12.00')})
+
+    def test_migration_parses_the_old_text_formats(self):
+        parse = import_module('finance.migrations.0006_expense_date_field').parse
+
+        self.assertEqual(parse('17-10-2026'), date(2026, 10, 17))
+        self.assertEqual(parse('2026-10-17'), date(2026, 10, 17))
+        self.assertEqual(parse(' 17/10/2026 '), date(2026, 10, 17))
+        self.assertIsNone(parse('yesterday'))
+        self.assertIsNone(parse(''))
@@ -0,0 +1,126 @@
+import io
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from openpyxl import load_workbook
+
+from inventory.models import Product, Stock
+from reports.models import ExportJob
+from reports.services.export_service import ExportManager
+from reports.services.job_service import ExportJobManager
+
+
+class ExportJobTests(TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.settings = override_settings(EXPORT_ROOT=self.root)
+        self.settings.enable()
+        self.addCleanup(self.settings.disable)
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+
+        for n in range(5):
+            product = Product.objects.create(name=f'Soda {n}', sku=f'SKU-{n}')
+            Stock.objects.create(product=product, quantity=n, price=Decimal('2.50'), tax=0, discount=0, quantity_alert=2)
+        self.client.force_login(User.objects.create_superuser('admin', 'a@example.com', 'pass'))
+
+    def test_view_enqueues_and_worker_builds_the_file(self):
+        response = self.client.get(reverse('inventory:product-list'), {'export': 'excel'})
+
+        job = ExportJob.objects.get()
+        self.assertRedirects(response, reverse('reports:export-job', args=[job.pk]))
+        self.assertEqual((job.kind, job.status, job.params), ('products', ExportJob.Status.QUEUED, {}))
+
+        call_command('run_export_jobs', once=True, stdout=io.StringIO())
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.total, job.progress), (ExportJob.Status.DONE, 5, 5))
+        status = self.client.get(
+            reverse('reports:export-job', args=[job.pk]), HTTP_X_REQUESTED_WITH='XMLHttpRequest'
+        ).json()
+        self.assertEqual(status['download_url'], reverse('reports:export-download', args=[job.pk]))
+
+        download = self.client.get(status['download_url'])
+        self.assertEqual(download['Content-Disposition'], 'attachment; filename="products.xlsx"')
+        rows = list(load_workbook(io.BytesIO(b''.join(download.streaming_content))).active.values)
+        self.assertEqual(rows[1], ('Soda 0', 'SKU-0', None, 0, 2.5))
+        self.assertEqual(len(rows), 6)
+
+    def test_identical_exports_share_a_job(self):
+        first = ExportJobManager.enqueue('products', 'csv', {'search': 'Soda', 'low_stock': True}, 'low_stocks')
+        ExportJobManager.run(ExportJobManager.claim())
+
+        again = ExportJobManager.enqueue('products', 'csv', {'low_stock': True, 'search': 'Soda'}, 'low_stocks')
+        other = ExportJobManager.enqueue('products', 'csv', {'search': 'Soda'}, 'products')
+
+        self.assertEqual(again.pk, first.pk)
+        self.assertNotEqual(other.pk, first.pk)
+        with open(ExportJobManager.path(again)) as output:
+            self.assertEqual(output.read().splitlines()[1:], ['Soda 0,SKU-0,,0,2.5', 'Soda 1,SKU-1,,1,2.5', 'Soda 2,SKU-2,,2,2.5'])
+
+    def test_pdf_exports_run_as_jobs(self):
+        response = self.client.get(reverse('sales:pos-orders'), {'export': 'pdf', 'status': 'completed'})
+
+        job = ExportJob.objects.get()
+        self.assertRedirects(response, reverse('reports:export-job', args=[job.pk]))
+        self.assertEqual(job.params, {'source': 'pos', 'status': 'completed'})
+        job = ExportJobManager.run(ExportJobManager.claim())
+        with open(ExportJobManager.path(job), 'rb') as output:
+            self.assertEqual(output.read(4), b'%PDF')
+
+    def test_progress_is_reported_per_chunk(self):
+        seen = []
+        with mock.patch.object(ExportManager, 'CHUNK_SIZE', 2):
+            list(ExportManager.rows(Product.objects.all(), [], progress=seen.append))
+        self.assertEqual(seen, [2, 4, 5])
+
+    def test_empty_export_completes(self):
+        ExportJobManager.enqueue('orders', 'csv', {'source': 'pos'}, 'pos-orders')
+        job = ExportJobManager.run(ExportJobManager.claim())
+        self.assertEqual((job.status, job.total), (ExportJob.Status.DONE, 0))
+
+    def test_expired_artifacts_are_removed(self):
+        ExportJobManager.enqueue('products', 'csv', {}, 'products')
+        job = ExportJobManager.run(ExportJobManager.claim())
+        path = ExportJobManager.path(job)
+        self.assertTrue(os.path.exists(path))
+
+        ExportJob.objects.filter(pk=job.pk).update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(ExportJobManager.purge_expired(), 1)
+
+        self.assertFalse(os.path.exists(path))
+        fresh = ExportJobManager.enqueue('products', 'csv', {}, 'products')
+        self.assertNotEqual(fresh.pk, job.pk)
+
+    def test_downloads_are_private_and_expire(self):
+        self.client.get(reverse('inventory:product-list'), {'export': 'csv'})
+        job = ExportJobManager.run(ExportJobManager.claim())
+        download_url = reverse('reports:export-download', args=[job.pk])
+        self.assertEqual(self.client.get(download_url).status_code, 200)
+
+        self.client.force_login(User.objects.create_superuser('other', 'o@example.com', 'pass'))
+        self.assertEqual(self.client.get(download_url).status_code, 404)
+        self.assertEqual(self.client.get(reverse('reports:export-job', args=[job.pk])).status_code, 404)
+        # Asking for the same export gives this user a job of their own
+        self.client.get(reverse('inventory:product-list'), {'export': 'csv'})
+        self.assertEqual(ExportJob.objects.count(), 2)
+
+        self.client.force_login(job.requested_by)
+        ExportJob.objects.filter(pk=job.pk).update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(self.client.get(download_url).status_code, 404)
+
+    def test_failed_source_marks_the_job(self):
+        job = ExportJobManager.enqueue('orders', 'csv', {'bogus': 1}, 'orders')
+        with self.assertLogs('reports.services.job_service', 'ERROR'):
+            job = ExportJobManager.run(ExportJobManager.claim())
+
+        self.assertEqual(job.status, ExportJob.Status.FAILED)
+        self.assertEqual(os.listdir(self.root), [])
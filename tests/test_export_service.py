@@ -0,0 +1,91 @@
+import csv
+import io
+import re
+import zlib
+from decimal import Decimal
+
+from django.test import TestCase
+from openpyxl import load_workbook
+
+from inventory.models import Category, Product, Stock
+from inventory.utils import export_to_csv, export_to_excel, export_to_pdf, get_products_queryset
+from people.models import Supplier
+from purchases.models import Purchase, PurchaseItem
+from purchases.utils import _export_purchases_csv
+from reports.services.export_service import ExportManager
+
+
+def read_xlsx(response):
+    workbook = load_workbook(io.BytesIO(b''.join(response.streaming_content)), read_only=True)
+    return [list(row) for row in workbook.active.iter_rows(values_only=True)]
+
+
+def read_csv(response):
+    content = b''.join(
+        chunk if isinstance(chunk, bytes) else chunk.encode() for chunk in response.streaming_content
+    )
+    return list(csv.reader(io.StringIO(content.decode())))
+
+
+class ExportServiceTests(TestCase):
+    def setUp(self):
+        category = Category.objects.create(name='Drinks', slug='drinks')
+        for n in range(5):
+            product = Product.objects.create(name=f'Soda {n}', sku=f'SKU-{n}', category=category)
+            Stock.objects.create(product=product, quantity=n, price=Decimal('2.50'), tax=0, discount=0)
+        Product.objects.create(name='No stock', sku='SKU-X')
+
+    def test_excel_export_round_trips(self):
+        response = export_to_excel(get_products_queryset().order_by('sku'))
+
+        rows = read_xlsx(response)
+        self.assertEqual(rows[0], ['Name', 'SKU', 'Category', 'Stock Qty', 'Price'])
+        self.assertEqual(rows[1], ['Soda 0', 'SKU-0', 'Drinks', 0, 2.5])
+        self.assertEqual(rows[-1], ['No stock', 'SKU-X', None, 0, 0])
+        self.assertEqual(len(rows), 7)
+
+    def test_product_export_does_not_query_per_row(self):
+        qs = get_products_queryset().order_by('sku')
+        with self.assertNumQueries(1):
+            rows = read_csv(export_to_csv(qs))
+        self.assertEqual(rows[5][:4], ['Soda 4', 'SKU-4', 'Drinks', '4'])
+        self.assertEqual(Decimal(rows[5][4]), Decimal('2.50'))
+
+    def test_purchase_export_has_one_row_per_line(self):
+        supplier = Supplier.objects.create(code='S1', name='Acme', email='a@example.com', phone='1', country='KE')
+        purchase = Purchase.objects.create(supplier=supplier)
+        products = list(Product.objects.order_by('sku')[:2])
+        for product in products:
+            PurchaseItem.objects.create(purchase=purchase, product=product, quantity=3, unit_cost=Decimal('1.00'))
+
+        rows = read_csv(_export_purchases_csv(Purchase.objects.all()))
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[1][0], purchase.reference)
+        self.assertEqual([row[3] for row in rows[1:]], [product.name for product in products])
+        self.assertEqual(rows[1][-1], '3.00')
+
+
+class PdfExportTests(TestCase):
+    def test_products_render_as_pdf(self):
+        Product.objects.create(name='Soda', sku='SKU-1')
+
+        response = export_to_pdf(get_products_queryset(), 'products')
+
+        content = b''.join(response.streaming_content)
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="products.pdf"')
+        self.assertTrue(content.startswith(b'%PDF'))
+        self.assertEqual(len(re.findall(rb'/Type /Page\b', content)), 1)
+
+    def test_rows_flow_onto_page_sized_tables(self):
+        rows = ([n, f'Row {n}', 'x' * 200] for n in range(250))
+        output = io.BytesIO()
+
+        ExportManager.render_pdf(['No', 'Name', 'Notes'], rows, output, title='Rows')
+
+        # 62 rows fit an A4 portrait page at the default row height
+        content = output.getvalue()
+        self.assertEqual(len(re.findall(rb'/Type /Page\b', content)), 5)
+        streams = [zlib.decompress(match) for match in re.findall(rb'stream\r?\n(.*?)endstream', content, re.S)]
+        text = b''.join(streams)
+        self.assertIn(b'Row 249', text)
+        self.assertNotIn(b'x' * 100, text)
@@ -0,0 +1,66 @@
+from datetime import timedelta
+from io import StringIO
+from decimal import Decimal
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from inventory.models import Product, Stock
+from people.models import Supplier
+from purchases.models import Purchase, PurchaseItem
+from sales.models import OrderItem, ProductDailySales
+from sales.services.checkout_service import CheckoutService
+from sales.services.cost_service import CostManager
+
+
+class OrderCostTests(TestCase):
+    def setUp(self):
+        self.product = Product.objects.create(name='Widget', purchase_price=Decimal('60.00'))
+        Stock.objects.create(product=self.product, quantity=100, price=Decimal('100.00'), tax=0, discount=0)
+
+    def _checkout(self, quantity=2):
+        payload = {
+            'source': 'pos',
+            'items': [{'product_id': self.product.id, 'purchase_price': '100.00', 'quantity': quantity}],
+        }
+        return CheckoutService.checkout(payload)[0]
+
+    def test_checkout_snapshots_cost(self):
+        order = self._checkout()
+        self.assertEqual(order.items.get().cost_price, Decimal('60.00'))
+
+    def test_profit_ignores_later_price_edits(self):
+        self._checkout()
+        self.product.purchase_price = Decimal('90.00')
+        self.product.save()
+
+        with self.assertNumQueries(1):
+            profit = CostManager.gross_profit(CostManager.completed_lines())
+        self.assertEqual(profit, Decimal('80.00'))
+        self.assertEqual(CostManager.cost_of_sales(CostManager.completed_lines()), Decimal('120.00'))
+        self.assertEqual(ProductDailySales.objects.get().cost, Decimal('120.00'))
+
+    def test_backfill_uses_purchase_history(self):
+        order = self._checkout()
+        supplier = Supplier.objects.create(code='S1', name='Supplier', email='s@example.com', phone='1', country='KE')
+        before = Purchase.objects.create(supplier=supplier, status=Purchase.Status.RECEIVED)
+        PurchaseItem.objects.create(purchase=before, product=self.product, quantity=5, unit_cost=Decimal('55.00'))
+        later = Purchase.objects.create(supplier=supplier, status=Purchase.Status.RECEIVED)
+        PurchaseItem.objects.create(purchase=later, product=self.product, quantity=5, unit_cost=Decimal('70.00'))
+        Purchase.objects.filter(pk=before.pk).update(order_date=order.date - timedelta(days=3))
+        Purchase.objects.filter(pk=later.pk).update(order_date=order.date + timedelta(days=1))
+        OrderItem.objects.update(cost_price=None)
+
+        call_command('backfill_order_costs', stdout=StringIO())
+
+        self.assertEqual(order.items.get().cost_price, Decimal('55.00'))
+        self.assertEqual(ProductDailySales.objects.get(day=order.date).cost, Decimal('110.00'))
+
+    def test_backfill_falls_back_to_purchase_price_and_skips_snapshotted_lines(self):
+        self._checkout()
+        OrderItem.objects.update(cost_price=None)
+        self.assertEqual(CostManager.backfill()[0], 1)
+        self.assertEqual(OrderItem.objects.get().cost_price, Decimal('60.00'))
+        self.assertEqual(CostManager.backfill(), (0, None, None))
+        self.assertEqual(CostManager.backfill(end=timezone.localdate()), (0, None, None))
@@ -0,0 +1,137 @@
+import json
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from inventory.models import Product, Stock
+from sales.models import Invoice, MpesaTransaction, Order
+from sales.mpesa_service import MpesaService
+from sales.services.checkout_service import CheckoutService
+from sales.services.payment_service import PaymentError, PaymentManager
+from sales.services.register_service import RegisterManager
+from sales.services.summary_service import SalesSummaryManager
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}})
+class PaymentLedgerTests(TestCase):
+    def setUp(self):
+        self.cashier = User.objects.create_superuser('cashier', 'c@example.com', 'pass')
+        self.client.force_login(self.cashier)
+        self.product = Product.objects.create(name='Soda', purchase_price=Decimal('1.00'))
+        Stock.objects.create(product=self.product, quantity=100, price=Decimal('2.00'), tax=0, discount=0)
+
+    def _sell(self, quantity, paid, **extra):
+        order, _ = CheckoutService.checkout({
+            'source': 'pos',
+            'paid_amount': paid,
+            'items': [{'product_id': self.product.id, 'purchase_price': '2.00', 'quantity': quantity}],
+            **extra,
+        }, biller=self.cashier)
+        return order
+
+    def _pay(self, order, amount):
+        return self.client.post(
+            reverse('sales:update-payment', args=[order.pk]), json.dumps({'amount': amount}),
+            content_type='application/json',
+        ).json()
+
+    def test_partial_payments_are_appended_and_accumulated(self):
+        order = self._sell(5, '2.00')
+
+        self.assertTrue(self._pay(order, '3.00')['success'])
+        response = self._pay(order, '5.00')
+
+        self.assertEqual(response['order']['paid_amount'], '10.00')
+        self.assertEqual(response['order']['payment_status'], Order.PaymentStatus.PAID)
+        order.refresh_from_db()
+        self.assertEqual((order.paid_amount, order.due_amount, order.payment_status),
+                         (Decimal('10.00'), Decimal('0.00'), Order.PaymentStatus.PAID))
+        self.assertEqual(list(order.payments.values_list('amount', flat=True)),
+                         [Decimal('2.00'), Decimal('3.00'), Decimal('5.00')])
+        self.assertEqual(order.payments.get(amount=Decimal('3.00')).received_by, self.cashier)
+
+        invoice = Invoice.objects.get(order=order)
+        self.assertEqual((invoice.amount_paid, invoice.amount_due, invoice.status),
+                         (Decimal('10.00'), Decimal('0.00'), Invoice.Status.PAID))
+
+        totals = SalesSummaryManager.totals(order.date, order.date)
+        self.assertEqual((totals['paid_amount'], totals['due_amount']), (Decimal('10.00'), Decimal('0.00')))
+        self.assertEqual(
+            SalesSummaryManager.totals(payment_status=Order.PaymentStatus.PAID)['order_count'], 1,
+        )
+
+    def test_posting_does_not_read_the_order_lines(self):
+        order = self._sell(5, '2.00')
+
+        # Still partly paid, so the order stays in its rollup bucket
+        with CaptureQueriesContext(connection) as queries:
+            PaymentManager.post(order.pk, Decimal('4.00'), Order.PaymentMethod.CASH)
+
+        self.assertFalse([q['sql'] for q in queries if 'sales_orderitem' in q['sql']])
+
+    def test_overpayments_are_refused(self):
+        order = self._sell(1, '0.00')
+
+        response = self._pay(order, '5.00')
+
+        self.assertEqual(response, {'success': False, 'error': 'Amount exceeds due amount. Maximum allowed: KES 2.00'})
+        with self.assertRaises(PaymentError):
+            PaymentManager.post(order.pk, Decimal('-1.00'), Order.PaymentMethod.CASH)
+        self.assertFalse(order.payments.exists())
+
+    def test_ledger_is_append_only(self):
+        payment = self._sell(1, '2.00').payments.get()
+
+        payment.amount = Decimal('1.00')
+        with self.assertRaises(ValueError):
+            payment.save()
+        with self.assertRaises(ValueError):
+            payment.delete()
+
+    def test_mpesa_confirmation_posts_to_the_ledger(self):
+        session = RegisterManager.open(self.cashier)
+        order = self._sell(3, '0.00', payment_method='mpesa')
+        MpesaTransaction.objects.create(
+            order=order, phone_number='254700000000', amount=Decimal('6.00'),
+            merchant_request_id='m-1', checkout_request_id='c-1',
+        )
+        callback = {'Body': {'stkCallback': {
+            'MerchantRequestID': 'm-1', 'CheckoutRequestID': 'c-1', 'ResultCode': 0, 'ResultDesc': 'OK',
+            'CallbackMetadata': {'Item': [
+                {'Name': 'Amount', 'Value': 6}, {'Name': 'MpesaReceiptNumber', 'Value': 'QX12'},
+            ]},
+        }}}
+
+        self.assertTrue(MpesaService().handle_callback(callback))
+        self.assertTrue(MpesaService().handle_callback(callback))
+
+        payment = order.payments.get()
+        self.assertEqual((payment.method, payment.amount, payment.reference),
+                         (Order.PaymentMethod.MPESA, Decimal('6.00'), 'QX12'))
+        order.refresh_from_db()
+        self.assertEqual(order.payment_status, Order.PaymentStatus.PAID)
+        self.assertEqual(Invoice.objects.get(order=order).amount_paid, Decimal('6.00'))
+        session.refresh_from_db()
+        self.assertEqual(session.mpesa_total, Decimal('6.00'))
+
+    def test_z_report_breaks_takings_down_by_method(self):
+        session = RegisterManager.open(self.cashier)
+        self._sell(2, '4.00')
+        order = self._sell(3, '1.00', payment_method='mpesa')
+        PaymentManager.post(order.pk, Decimal('5.00'), Order.PaymentMethod.MPESA, register_session_id=session.pk)
+
+        response = self.client.get(reverse('sales:register-z-report', args=[session.pk]))
+
+        self.assertEqual(response.json()['z_report']['payments'], {'cash': '4.00', 'mpesa': '6.00'})
+
+    def test_change_handed_back_is_not_takings(self):
+        session = RegisterManager.open(self.cashier)
+        order = self._sell(1, '5.00')
+
+        self.assertEqual(order.payments.get().amount, Decimal('2.00'))
+        session.refresh_from_db()
+        self.assertEqual(PaymentManager.by_method(register_session=session), {'cash': session.cash_total})
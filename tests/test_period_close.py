@@ -0,0 +1,92 @@
+import io
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from inventory.models import Product, Stock
+from reports.models import PeriodSnapshot
+from reports.services.dataset_service import ProfitLossReport
+from reports.services.period_service import PeriodCloseManager
+from sales.services.checkout_service import CheckoutService
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}})
+class PeriodCloseTests(TestCase):
+    def setUp(self):
+        self.this_month = timezone.localdate().replace(day=1)
+        self.last_month = (self.this_month - timedelta(days=1)).replace(day=1)
+        self.product = Product.objects.create(name='Soda', purchase_price=Decimal('1.00'))
+        Stock.objects.create(product=self.product, quantity=100, price=Decimal('2.00'), tax=0, discount=0)
+
+    def _sell(self, quantity, day):
+        CheckoutService.checkout({
+            'source': 'pos',
+            'date': day.isoformat(),
+            'items': [{'product_id': self.product.id, 'purchase_price': '2.00', 'quantity': quantity}],
+        })
+
+    def _sales(self, start, end):
+        series = ProfitLossReport(start, end).series()
+        return dict(zip(series['months'], series['sales']))
+
+    def test_closed_month_is_frozen_until_reopened(self):
+        month_end = PeriodCloseManager.month_end(self.last_month)
+        self._sell(2, self.last_month)
+
+        snapshot = PeriodCloseManager.close(self.last_month)
+        self.assertEqual(snapshot.sales, Decimal('4.00'))
+
+        # A late sale does not change the closed month
+        self._sell(5, self.last_month + timedelta(days=1))
+        self.assertEqual(self._sales(self.last_month, month_end)[self.last_month], Decimal('4.00'))
+
+        PeriodCloseManager.reopen(self.last_month)
+        self.assertEqual(self._sales(self.last_month, month_end)[self.last_month], Decimal('14.00'))
+
+    def test_only_open_months_are_computed_live(self):
+        self._sell(2, self.last_month)
+        self._sell(1, timezone.localdate())
+        PeriodCloseManager.close_all()
+        self.assertEqual(list(PeriodSnapshot.objects.values_list('month', flat=True)), [self.last_month])
+
+        with mock.patch.object(ProfitLossReport, 'live_totals', wraps=ProfitLossReport.live_totals) as live:
+            sales = self._sales(None, None)
+
+        live.assert_called_once_with(self.this_month, timezone.localdate())
+        self.assertEqual(sales, {self.last_month: Decimal('4.00'), self.this_month: Decimal('2.00')})
+
+    def test_partly_covered_months_ignore_the_snapshot(self):
+        self._sell(2, self.last_month)
+        self._sell(3, self.last_month + timedelta(days=1))
+        PeriodCloseManager.close(self.last_month)
+
+        sales = self._sales(self.last_month + timedelta(days=1), self.last_month + timedelta(days=1))
+
+        self.assertEqual(sales[self.last_month], Decimal('6.00'))
+
+    def test_open_months_cannot_be_closed_twice_or_early(self):
+        with self.assertRaisesMessage(ValueError, 'Only months that are over'):
+            PeriodCloseManager.close(self.this_month)
+        PeriodCloseManager.close(self.last_month)
+        with self.assertRaisesMessage(ValueError, 'already closed'):
+            PeriodCloseManager.close(self.last_month)
+
+    def test_command_and_button_close_months(self):
+        self._sell(2, self.last_month)
+        out = io.StringIO()
+
+        call_command('close_periods', stdout=out)
+        self.assertIn('1 months closed', out.getvalue())
+        call_command('close_periods', reopen=self.last_month, stdout=io.StringIO())
+
+        self.client.force_login(User.objects.create_superuser('admin', 'a@example.com', 'pass'))
+        response = self.client.post(reverse('reports:close-period'), {'month': self.last_month.strftime('%Y-%m')})
+        self.assertRedirects(response, reverse('reports:profit-loss-report'))
+        snapshot = PeriodSnapshot.objects.get()
+        self.assertEqual((snapshot.month, snapshot.net_profit), (self.last_month, snapshot.sales + snapshot.services))
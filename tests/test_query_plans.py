@@ -0,0 +1,62 @@
+import re
+import unittest
+from datetime import date
+
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+
+from landing.services.dashboard_service import LowStockWidget
+from purchases.models import Purchase
+from sales.models import MpesaTransaction, Order, OrderItem
+from sales.services.cost_service import CostManager
+from sales.utils import get_orders_queryset
+
+
+# A table read from end to end: SQLite's bare "SCAN <table>" (walking a
+# whole index, e.g. to return rows in date order, is fine) and PostgreSQL's
+# "Seq Scan on <table>"
+FULL_SCAN = {
+    'sqlite': re.compile(r'^\d+ \d+ \d+ SCAN (\w+)$', re.M),
+    'postgresql': re.compile(r'Seq Scan on (\w+)'),
+}
+
+
+@unittest.skipUnless(connection.vendor in FULL_SCAN, 'EXPLAIN checks cover SQLite and PostgreSQL')
+class QueryPlanTests(TestCase):
+    """
+    The hot dashboard, report and POS query shapes must be served by an
+    index. Tables are near empty here, so PostgreSQL is told to avoid
+    sequential scans whenever an index can serve the query.
+    """
+    DAY = date(2026, 1, 1)
+
+    def queries(self):
+        day = self.DAY
+        return {
+            'completed orders by day': Order.objects.filter(status=Order.Status.COMPLETED, date__range=(day, day)),
+            'completed lines by day': CostManager.completed_lines(day, day),
+            'online orders list': get_orders_queryset(source='online'),
+            'orders list': get_orders_queryset(),
+            'orders since a day': Order.objects.filter(date__gte=day),
+            'product lines on completed orders': OrderItem.objects.filter(
+                product_id=1, order__status=Order.Status.COMPLETED,
+            ),
+            'received purchases by day': Purchase.objects.filter(
+                status=Purchase.Status.RECEIVED, order_date__range=(day, day),
+            ),
+            'low stock': LowStockWidget().context()['low_stocks'],
+            'timed out M-Pesa transactions': MpesaTransaction.objects.filter(
+                status=MpesaTransaction.Status.PENDING, created_at__lt=timezone.now(),
+            ),
+        }
+
+    def test_hot_queries_use_an_index(self):
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+
+        for label, queryset in self.queries().items():
+            with self.subTest(label):
+                plan = queryset.explain()
+                self.assertEqual(FULL_SCAN[connection.vendor].findall(plan), [], plan)
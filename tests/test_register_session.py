@@ -0,0 +1,152 @@
+import json
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from finance.models import Expense
+from inventory.models import Product, Stock
+from sales.models import MpesaTransaction, RegisterSession
+from sales.mpesa_service import MpesaService
+from sales.services.checkout_service import CheckoutService
+from sales.services.register_service import RegisterError, RegisterManager
+
+
+class RegisterSessionTests(TestCase):
+    def setUp(self):
+        self.cashier = User.objects.create_superuser('cashier', 'c@example.com', 'pass')
+        self.client.force_login(self.cashier)
+        self.product = Product.objects.create(name='Soda', purchase_price=Decimal('1.00'))
+        Stock.objects.create(product=self.product, quantity=100, price=Decimal('2.00'), tax=0, discount=0)
+
+    def _sell(self, quantity, paid, biller=None, **extra):
+        order, _ = CheckoutService.checkout({
+            'source': 'pos',
+            'paid_amount': paid,
+            'items': [{'product_id': self.product.id, 'purchase_price': '2.00', 'quantity': quantity}],
+            **extra,
+        }, biller=biller or self.cashier)
+        return order
+
+    def _open(self, opening_float='50.00'):
+        response = self.client.post(
+            reverse('sales:open-register'), json.dumps({'opening_float': opening_float}),
+            content_type='application/json',
+        )
+        return RegisterSession.objects.get(pk=response.json()['session_id'])
+
+    def test_sales_payments_and_expenses_update_the_running_totals(self):
+        session = self._open()
+        order = self._sell(3, '6.00')
+        partial = self._sell(2, '1.00')
+        self._sell(1, '2.00', payment_method='mpesa')
+        self._sell(1, '2.00', biller=User.objects.create_user('other'))
+
+        self.client.post(
+            reverse('sales:update-payment', args=[partial.pk]), json.dumps({'amount': '3.00'}),
+            content_type='application/json',
+        )
+        Expense.objects.create(
+            name='Ice', description='', date=timezone.localdate(), amount=Decimal('4.00'), status='paid', created_by=self.cashier,
+        )
+
+        session.refresh_from_db()
+        self.assertEqual(order.register_session, session)
+        self.assertEqual(session.order_count, 3)
+        self.assertEqual(session.sales_total, Decimal('12.00'))
+        self.assertEqual(session.cost_total, Decimal('6.00'))
+        self.assertEqual((session.cash_total, session.mpesa_total, session.paid_total),
+                         (Decimal('10.00'), Decimal('2.00'), Decimal('12.00')))
+        self.assertEqual(session.expense_total, Decimal('4.00'))
+        self.assertEqual(session.cash_in_drawer, Decimal('56.00'))
+
+    def test_polling_reads_the_session_by_primary_key(self):
+        session = self._open()
+        self._sell(1, '2.00')
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('sales:cash-register-data'))
+
+        register_queries = [q['sql'] for q in queries if 'sales_' in q['sql']]
+        self.assertEqual(len(register_queries), 1)
+        self.assertIn('"sales_registersession"."id" = %d' % session.pk, register_queries[0])
+        self.assertEqual(response.json()['data']['total_cash'], 'KES 52.00')
+
+    def test_closing_stores_the_z_report(self):
+        session = self._open('10.00')
+        self._sell(2, '4.00')
+
+        response = self.client.post(
+            reverse('sales:close-register'), json.dumps({'counted_cash': '13.00'}),
+            content_type='application/json',
+        )
+        z_report = response.json()['z_report']
+        self.assertEqual(
+            (z_report['expected_cash'], z_report['counted_cash'], z_report['variance']),
+            ('14.00', '13.00', '-1.00'),
+        )
+
+        # Sales after closing belong to no session and leave the report alone
+        self.assertIsNone(self._sell(1, '2.00').register_session)
+        response = self.client.get(reverse('sales:register-z-report', args=[session.pk]))
+        self.assertEqual(response.json()['z_report']['sales_total'], '4.00')
+        self.assertEqual(self.client.get(reverse('sales:cash-register-data')).json(), {'success': True, 'open': False})
+
+        with self.assertRaises(RegisterError):
+            RegisterManager.close(session.pk, Decimal('0'))
+
+    def test_one_open_register_per_cashier(self):
+        RegisterManager.open(self.cashier)
+        with self.assertRaisesMessage(RegisterError, 'already have an open register'):
+            RegisterManager.open(self.cashier)
+
+    def test_late_mpesa_confirmation_leaves_the_z_report_alone(self):
+        session = self._open('10.00')
+        self._sell(1, '2.00')
+        order = self._sell(3, '0.00', payment_method='mpesa')
+        MpesaTransaction.objects.create(
+            order=order, phone_number='254700000000', amount=Decimal('6.00'),
+            merchant_request_id='m-1', checkout_request_id='c-1',
+        )
+        closed = RegisterManager.close(session.pk, Decimal('12.00'))
+        before = RegisterManager.z_report(closed)
+
+        self.assertTrue(MpesaService().handle_callback({'Body': {'stkCallback': {
+            'MerchantRequestID': 'm-1', 'CheckoutRequestID': 'c-1', 'ResultCode': 0, 'ResultDesc': 'OK',
+            'CallbackMetadata': {'Item': [
+                {'Name': 'Amount', 'Value': 6}, {'Name': 'MpesaReceiptNumber', 'Value': 'QX12'},
+            ]},
+        }}}))
+
+        self.assertIsNone(order.payments.get().register_session)
+        session.refresh_from_db()
+        self.assertEqual(RegisterManager.z_report(session), before)
+        self.assertEqual(before['payments'], {'cash': Decimal('2.00')})
+        response = self.client.get(reverse('sales:register-z-report', args=[session.pk]))
+        self.assertEqual(response.json()['z_report']['payments'], {'cash': '2.00'})
+
+    def test_amounts_must_be_finite(self):
+        for value in ('NaN', 'sNaN', 'Infinity', '-Infinity'):
+            with self.subTest(value):
+                response = self.client.post(
+                    reverse('sales:open-register'), json.dumps({'opening_float': value}),
+                    content_type='application/json',
+                )
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json()['error'], 'Invalid opening float')
+        self.assertFalse(RegisterSession.objects.exists())
+
+        self._open()
+        for value in ('NaN', 'sNaN', 'Infinity'):
+            with self.subTest(value):
+                response = self.client.post(
+                    reverse('sales:close-register'), json.dumps({'counted_cash': value}),
+                    content_type='application/json',
+                )
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json()['error'], 'Enter the cash counted in the drawer')
+        self.assertEqual(RegisterSession.objects.get().status, RegisterSession.Status.OPEN)
@@ -0,0 +1,78 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from finance.models import Expense
+from inventory.models import Product, Stock
+from reports.services.cache_service import ReportCacheManager
+from reports.services.dataset_service import BestSellersReport, ExpenseReport, SalesReport
+from sales.services.checkout_service import CheckoutService
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'report-cache-tests'}},
+    REPORT_CACHE_TTL=3600,
+    REPORT_CACHE_TTL_TODAY=60,
+)
+class ReportCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.today = timezone.localdate()
+        self.product = Product.objects.create(name='Soda', sku='SKU-1', purchase_price=Decimal('1.00'))
+        Stock.objects.create(product=self.product, quantity=50, price=Decimal('2.00'), tax=0, discount=0)
+
+    def _sell(self, quantity):
+        with self.captureOnCommitCallbacks(execute=True):
+            CheckoutService.checkout({
+                'source': 'pos',
+                'items': [{'product_id': self.product.id, 'purchase_price': '2.00', 'quantity': quantity}],
+            })
+
+    def test_repeat_requests_are_served_from_cache(self):
+        self._sell(2)
+        SalesReport(self.today, self.today).page(1)
+        SalesReport(self.today, self.today).summary()
+
+        with self.assertNumQueries(0):
+            report = SalesReport(self.today, self.today)
+            rows = list(report.page(1))
+            summary = report.summary()
+
+        self.assertEqual([(row.sku, row.sold_qty) for row in rows], [('SKU-1', 2)])
+        self.assertEqual(summary['total_amount'], Decimal('4.00'))
+
+    def test_writes_invalidate_dependent_reports_only(self):
+        self._sell(2)
+        sales = SalesReport(self.today, self.today)
+        expenses = ExpenseReport(self.today, self.today)
+        sales.summary()
+        expenses.page(1)
+
+        self._sell(3)
+        with self.assertNumQueries(0):
+            ExpenseReport(self.today, self.today).page(1)
+        self.assertEqual(SalesReport(self.today, self.today).summary()['total_amount'], Decimal('10.00'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Expense.objects.create(name='Rent', description='', date=str(self.today), amount=Decimal('5.00'), status='paid')
+        self.assertEqual([row.name for row in ExpenseReport(self.today, self.today).page(1)], ['Rent'])
+
+    def test_closed_ranges_are_kept_longer(self):
+        yesterday = self.today - timedelta(days=1)
+
+        self.assertEqual(ReportCacheManager.ttl(SalesReport(yesterday - timedelta(days=6), yesterday)), 3600)
+        self.assertEqual(ReportCacheManager.ttl(SalesReport(yesterday, self.today)), 60)
+        self.assertEqual(ReportCacheManager.ttl(SalesReport()), 60)
+        # Shows stock on hand, which changes without a report write
+        self.assertEqual(ReportCacheManager.ttl(BestSellersReport(yesterday, yesterday)), 60)
+
+    def test_filters_are_normalised(self):
+        first = ReportCacheManager.key(SalesReport(self.today, self.today, product=''), 'summary')
+        second = ReportCacheManager.key(SalesReport(self.today, self.today), 'summary')
+        other = ReportCacheManager.key(SalesReport(self.today, self.today, product='Soda'), 'summary')
+
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, other)
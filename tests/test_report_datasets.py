@@ -0,0 +1,146 @@
+import csv
+import io
+import shutil
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from inventory.models import Category, Product, ProductGallery, Stock, StockMovement
+from reports.models import ExportJob
+from reports.services.dataset_service import (
+    BestSellersReport, OpeningInventoryReport, ProfitLossReport, SalesReport,
+)
+from reports.services.job_service import ExportJobManager
+from sales.services.checkout_service import CheckoutService
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}})
+class ReportDatasetTests(TestCase):
+    def setUp(self):
+        self.today = timezone.localdate()
+        category = Category.objects.create(name='Drinks', slug='drinks')
+        self.products = []
+        for n in range(4):
+            product = Product.objects.create(
+                name=f'Soda {n}', sku=f'SKU-{n}', category=category, purchase_price=Decimal('1.00'),
+            )
+            Stock.objects.create(product=product, quantity=20, price=Decimal('2.00'), tax=0, discount=0)
+            StockMovement.objects.create(
+                product=product, kind=StockMovement.Kind.OPENING, quantity=20,
+                day=self.today - timedelta(days=30),
+            )
+            ProductGallery.objects.create(product=product, image=f'product-images/{n}.png')
+            self.products.append(product)
+        self.idle = Product.objects.create(name='Idle', sku='SKU-I')
+
+    def _sell(self, *lines):
+        return CheckoutService.checkout({
+            'source': 'pos',
+            'items': [
+                {'product_id': product.id, 'purchase_price': '2.00', 'quantity': quantity}
+                for product, quantity in lines
+            ],
+        })[0]
+
+    def test_sales_report_groups_lines_per_product(self):
+        self._sell((self.products[0], 1), (self.products[1], 3))
+        self._sell((self.products[1], 2))
+
+        report = SalesReport(self.today, self.today)
+        rows = list(report.rows())
+
+        self.assertEqual([(row.sku, row.sold_qty) for row in rows], [('SKU-1', 5), ('SKU-0', 1)])
+        self.assertEqual(rows[0].category_name, 'Drinks')
+        self.assertEqual(report.summary()['total_amount'], Decimal('12.00'))
+
+        only = SalesReport(self.today, self.today, product='Soda 0')
+        self.assertEqual([(row.sku, row.sold_qty) for row in only.rows()], [('SKU-1', 3), ('SKU-0', 1)])
+        self.assertEqual(only.summary()['total_amount'], Decimal('8.00'))
+
+    def test_page_is_fetched_in_sql(self):
+        for product in self.products:
+            self._sell((product, 1))
+
+        with CaptureQueriesContext(connection) as queries:
+            page = BestSellersReport().page(2, per_page=3)
+            rows = list(page)
+
+        # A count and one page of rows, with stock and image as subqueries
+        self.assertEqual(len(queries), 2)
+        self.assertIn('OFFSET 3', queries[-1]['sql'])
+        self.assertEqual(len(rows), 1)
+        self.assertEqual((rows[0].in_stock, rows[0].image), (19, 'product-images/3.png'))
+
+    def test_opening_inventory_filters_and_totals_in_sql(self):
+        self._sell((self.products[0], 5))
+
+        report = OpeningInventoryReport(self.today, self.today)
+        rows = list(report.page(1))
+
+        self.assertNotIn('Idle', [row.name for row in rows])
+        self.assertEqual(
+            (rows[0].name, rows[0].opening_qty, rows[0].sold_qty, rows[0].closing_qty),
+            ('Soda 0', 20, 5, 15),
+        )
+        self.assertEqual(report.totals(), {
+            'total_products': 4,
+            'total_opening_qty': 80,
+            'total_sold_qty': 5,
+            'total_closing_qty': 75,
+        })
+
+    def test_profit_loss_rows_are_lines_by_month(self):
+        self._sell((self.products[0], 2))
+        month = self.today.replace(day=1)
+
+        report = ProfitLossReport(month, self.today)
+
+        self.assertEqual([column.header for column in report.columns], ['', month.strftime('%b %Y')])
+        rows = dict((row[0], row[1:]) for row in report.rows())
+        self.assertEqual(rows['Sales'], (Decimal('4.00'),))
+        self.assertEqual(rows['Net Profit'], rows['Gross Profit'])
+
+
+class ReportExportTests(TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.settings = override_settings(EXPORT_ROOT=self.root)
+        self.settings.enable()
+        self.addCleanup(self.settings.disable)
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        self.client.force_login(User.objects.create_superuser('admin', 'a@example.com', 'pass'))
+
+    def test_report_exports_stream_the_page_rows(self):
+        for n in range(3):
+            product = Product.objects.create(name=f'Soda {n}', sku=f'SKU-{n}')
+            Stock.objects.create(product=product, quantity=n, price=Decimal('2.00'), tax=0, discount=0)
+
+        response = self.client.get(reverse('reports:inventory-report'), {
+            'export': 'csv', 'date_range': '01/01/2025 - 31/01/2025',
+        })
+
+        job = ExportJob.objects.get()
+        self.assertRedirects(response, reverse('reports:export-job', args=[job.pk]))
+        self.assertEqual(job.params, {'report': 'inventory_report', 'start': '2025-01-01', 'end': '2025-01-31'})
+        self.assertEqual(job.basename, 'inventory_report_01-01-2025_to_31-01-2025')
+
+        job = ExportJobManager.run(ExportJobManager.claim())
+        with open(ExportJobManager.path(job), newline='') as output:
+            rows = list(csv.reader(output))
+        self.assertEqual(rows[0], ['SKU', 'Product', 'Category', 'Unit', 'Qty'])
+        self.assertEqual(rows[1:], [['SKU-0', 'Soda 0', '', '', '0'], ['SKU-1', 'Soda 1', '', '', '1'], ['SKU-2', 'Soda 2', '', '', '2']])
+
+    def test_profit_loss_exports_directly(self):
+        response = self.client.get(reverse('reports:profit-loss-report'), {'export': 'csv'})
+
+        content = b''.join(response.streaming_content).decode()
+        rows = list(csv.reader(io.StringIO(content)))
+        self.assertEqual([row[0] for row in rows[1:]], [label for _, label in ProfitLossReport.LINES])
+        self.assertFalse(ExportJob.objects.exists())
@@ -0,0 +1,143 @@
+from datetime import date
+from decimal import Decimal
+
+from django.test import TestCase
+
+from inventory.models import Product, Stock
+from sales.models import DailySalesSummary, Order, OrderItem, ProductDailySales
+from sales.services.checkout_service import CheckoutService
+from sales.services.summary_service import ProductSalesManager, SalesSummaryManager
+
+
+class SalesSummaryTests(TestCase):
+    def setUp(self):
+        self.products = []
+        for i in range(2):
+            product = Product.objects.create(name=f'Product {i}', purchase_price=Decimal('50.00'))
+            Stock.objects.create(product=product, quantity=100, price=Decimal('100.00'), tax=0, discount=0)
+            self.products.append(product)
+
+    def _checkout(self, **extra):
+        payload = {
+            'source': 'pos',
+            'items': [
+                {'product_id': p.id, 'purchase_price': '100.00', 'tax': '10.00', 'discount': '5.00', 'quantity': 1}
+                for p in self.products
+            ],
+        }
+        payload.update(extra)
+        return CheckoutService.checkout(payload)[0]
+
+    def _snapshot(self):
+        return sorted(
+            DailySalesSummary.objects.exclude(order_count=0).values_list(
+                'day', 'source', 'payment_method', 'status', 'payment_status',
+                'order_count', 'gross_sales', 'paid_amount', 'due_amount', 'tax', 'discount',
+            )
+        )
+
+    def assertMatchesRebuild(self):
+        incremental = self._snapshot()
+        SalesSummaryManager.rebuild()
+        self.assertEqual(incremental, self._snapshot())
+
+    def test_checkout_updates_rollup(self):
+        order = self._checkout(paid_amount='100.00')
+
+        totals = SalesSummaryManager.totals(order.date, order.date, status=Order.Status.COMPLETED)
+        self.assertEqual(totals['order_count'], 1)
+        self.assertEqual(totals['gross_sales'], order.grand_total)
+        self.assertEqual(totals['paid_amount'], Decimal('100.00'))
+        self.assertEqual(totals['due_amount'], order.due_amount)
+        self.assertEqual(totals['tax'], Decimal('19.00'))
+        self.assertEqual(totals['discount'], Decimal('10.00'))
+
+    def test_status_and_payment_changes_move_the_order(self):
+        order = self._checkout()
+        order.paid_amount = order.grand_total
+        order.set_payment_fields()
+        order.save()
+        paid = SalesSummaryManager.totals(status=Order.Status.COMPLETED, payment_status=Order.PaymentStatus.PAID)
+        self.assertEqual(paid['order_count'], 1)
+        self.assertEqual(paid['tax'], Decimal('19.00'))
+
+        order.status = Order.Status.CANCELED
+        order.save()
+        self.assertEqual(SalesSummaryManager.totals(status=Order.Status.COMPLETED)['order_count'], 0)
+        self.assertEqual(SalesSummaryManager.totals(status=Order.Status.CANCELED)['gross_sales'], order.grand_total)
+
+    def test_line_edits_and_deletes_are_tracked(self):
+        order = self._checkout()
+        item = order.items.first()
+        item.discount = Decimal('0.00')
+        item.save()
+        OrderItem.objects.filter(pk=order.items.last().pk).first().delete()
+        self.assertMatchesRebuild()
+
+        order.delete()
+        self.assertEqual(self._snapshot(), [])
+
+    def test_rebuild_matches_incremental_rollup(self):
+        self._checkout(paid_amount='50.00')
+        self._checkout(paid_amount='500.00', payment_method='mpesa')
+        self._checkout(date=date(2026, 1, 2).isoformat(), source='online')
+
+        self.assertMatchesRebuild()
+
+    def test_by_day(self):
+        order = self._checkout()
+        self.assertEqual(SalesSummaryManager.by_day()[order.date]['order_count'], 1)
+        self.assertEqual(SalesSummaryManager.by_day()[order.date]['gross_sales'], order.grand_total)
+
+
+class ProductSalesTests(TestCase):
+    def setUp(self):
+        self.product = Product.objects.create(name='Tea', purchase_price=Decimal('40.00'))
+        Stock.objects.create(product=self.product, quantity=100, price=Decimal('100.00'), tax=0, discount=0)
+
+    def _checkout(self, quantity, **extra):
+        payload = {
+            'source': 'pos',
+            'items': [{'product_id': self.product.id, 'purchase_price': '100.00', 'tax': '10.00', 'quantity': quantity}],
+        }
+        payload.update(extra)
+        return CheckoutService.checkout(payload)[0]
+
+    def _facts(self):
+        return sorted(
+            ProductDailySales.objects.exclude(quantity=0).values_list(
+                'day', 'product_id', 'quantity', 'revenue', 'tax', 'discount', 'cost'
+            )
+        )
+
+    def test_completed_lines_are_rolled_up_per_day(self):
+        order = self._checkout(3)
+        self._checkout(2, date=date(2026, 1, 2).isoformat())
+
+        totals = ProductSalesManager.by_product(order.date, order.date).get()
+        self.assertEqual(totals['sold_qty'], 3)
+        self.assertEqual(totals['sold_amount'], Decimal('330.00'))
+        self.assertEqual(totals['sold_tax'], Decimal('30.00'))
+        self.assertEqual(totals['sold_cost'], Decimal('120.00'))
+        self.assertEqual(ProductSalesManager.by_product().get()['sold_qty'], 5)
+
+    def test_leaving_completed_status_uncounts_lines(self):
+        order = self._checkout(3)
+        order.status = Order.Status.CANCELED
+        order.save()
+        self.assertEqual(self._facts(), [])
+
+        order.status = Order.Status.COMPLETED
+        order.save()
+        self.assertEqual(ProductSalesManager.by_product().get()['sold_qty'], 3)
+
+    def test_rebuild_matches_incremental_rollup(self):
+        order = self._checkout(3)
+        item = order.items.get()
+        item.quantity = 4
+        item.save()
+        self._checkout(1, date=date(2026, 1, 2).isoformat())
+
+        incremental = self._facts()
+        ProductSalesManager.rebuild()
+        self.assertEqual(incremental, self._facts())
@@ -0,0 +1,47 @@
+from datetime import date
+
+from django.db import connection, transaction
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from people.models import Supplier
+from purchases.models import Purchase
+from sales.models import DocumentSequence
+from sales.services.sequence_service import SequenceManager
+
+
+class SequenceManagerTests(TestCase):
+    def test_values_increment_per_key_and_day(self):
+        day = date(2026, 1, 5)
+        self.assertEqual(SequenceManager.allocate('ORD', day), 1)
+        self.assertEqual(SequenceManager.allocate('ORD', day), 2)
+        self.assertEqual(SequenceManager.allocate('INV', day, gapless=True), 1)
+        self.assertEqual(SequenceManager.allocate('ORD', date(2026, 1, 6)), 1)
+
+    def test_allocation_cost_is_constant(self):
+        day = date(2026, 1, 5)
+        DocumentSequence.objects.create(key='ORD', day=day, last_value=50000)
+        with CaptureQueriesContext(connection) as ctx:
+            value = SequenceManager.allocate('ORD', day)
+        self.assertEqual(value, 50001)
+        statements = [q['sql'] for q in ctx.captured_queries if not q['sql'].startswith(('SAVEPOINT', 'RELEASE'))]
+        self.assertEqual(len(statements), 2)
+
+    def test_gapless_allocation_rolls_back_with_document(self):
+        day = date(2026, 1, 5)
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                SequenceManager.allocate('INV', day, gapless=True)
+                raise RuntimeError('document failed')
+        self.assertEqual(SequenceManager.allocate('INV', day, gapless=True), 1)
+
+    def test_purchase_reference_continues_existing_numbers(self):
+        supplier = Supplier.objects.create(code='S1', name='Supplier', email='s@example.com', phone='1', country='KE')
+        prefix = f"PO{timezone.localdate():%Y%m%d}"
+        Purchase.objects.create(supplier=supplier, reference=f"{prefix}007")
+
+        purchase = Purchase.objects.create(supplier=supplier)
+
+        self.assertEqual(purchase.reference, f"{prefix}008")
+        self.assertEqual(Purchase.objects.create(supplier=supplier).reference, f"{prefix}009")
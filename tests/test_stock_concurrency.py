@@ -0,0 +1,116 @@
+import threading
+import time
+from decimal import Decimal
+
+from django.db import connection, OperationalError
+from django.test import TestCase, TransactionTestCase
+
+from inventory.models import Product, Stock
+from inventory.services.stock_service import StockManager, OutOfStockError
+from sales.models import Order
+from sales.services.checkout_service import CheckoutService, CheckoutError
+
+
+def _payload(product, quantity=1):
+    return {
+        'source': 'pos',
+        'items': [{'product_id': product.id, 'purchase_price': '10.00', 'quantity': quantity}],
+    }
+
+
+class StockDecrementTests(TestCase):
+    def setUp(self):
+        self.product = Product.objects.create(name='Soda')
+        self.stock = Stock.objects.create(product=self.product, quantity=3, price=Decimal('10.00'), tax=0, discount=0)
+
+    def test_oversell_is_rejected_per_line(self):
+        other = Product.objects.create(name='Bread')
+        Stock.objects.create(product=other, quantity=10, price=Decimal('10.00'), tax=0, discount=0)
+        payload = _payload(self.product, quantity=5)
+        payload['items'].append({'product_id': other.id, 'purchase_price': '10.00', 'quantity': 2})
+
+        with self.assertRaises(CheckoutError) as ctx:
+            CheckoutService.checkout(payload)
+
+        self.assertEqual(ctx.exception.status, 409)
+        self.assertEqual(ctx.exception.out_of_stock, [
+            {'product_id': self.product.id, 'product': 'Soda', 'requested': 5, 'available': 3},
+        ])
+        # The successful line was rolled back with the rest of the sale
+        self.assertEqual(other.stock().quantity, 10)
+        self.assertEqual(self.product.stock().quantity, 3)
+        self.assertFalse(Order.objects.exists())
+
+    def test_allow_negative_policy(self):
+        self.product.allow_negative_stock = True
+        self.product.save()
+
+        CheckoutService.checkout(_payload(self.product, quantity=5))
+
+        self.stock.refresh_from_db()
+        self.assertEqual(self.stock.quantity, -2)
+
+    def test_product_without_stock_row(self):
+        bare = Product.objects.create(name='Service')
+        with self.assertRaises(OutOfStockError):
+            StockManager.take([(bare.id, 1)], {bare.id: bare})
+
+
+class ConcurrentCheckoutTests(TransactionTestCase):
+    """
+    Several terminals selling the same SKU at once must neither lose
+    decrements nor take the stock row below zero.
+    """
+    threads = 8
+    sales_per_thread = 5
+
+    def _run(self, initial):
+        product = Product.objects.create(name='Fast mover')
+        Stock.objects.create(product=product, quantity=initial, price=Decimal('10.00'), tax=0, discount=0)
+        results = {'sold': 0, 'rejected': 0}
+        lock = threading.Lock()
+        barrier = threading.Barrier(self.threads)
+
+        def terminal():
+            try:
+                barrier.wait()
+                for _ in range(self.sales_per_thread):
+                    while True:
+                        try:
+                            CheckoutService.checkout(_payload(product))
+                            outcome = 'sold'
+                        except CheckoutError:
+                            outcome = 'rejected'
+                        except OperationalError:
+                            # SQLite serialises writers; retry the whole sale
+                            time.sleep(0.01)
+                            continue
+                        break
+                    with lock:
+                        results[outcome] += 1
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=terminal) for _ in range(self.threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        return product.stock().quantity, results
+
+    def test_concurrent_checkouts_keep_exact_quantity(self):
+        attempts = self.threads * self.sales_per_thread
+        final, results = self._run(initial=attempts + 10)
+
+        self.assertEqual(results['sold'], attempts)
+        self.assertEqual(final, 10)
+        self.assertEqual(Order.objects.count(), attempts)
+
+    def test_concurrent_checkouts_never_oversell(self):
+        final, results = self._run(initial=15)
+
+        self.assertEqual(results['sold'], 15)
+        self.assertEqual(results['rejected'], self.threads * self.sales_per_thread - 15)
+        self.assertEqual(final, 0)
+        self.assertEqual(Order.objects.count(), 15)
@@ -0,0 +1,139 @@
+from datetime import timedelta
+from decimal import Decimal
+from importlib import import_module
+
+from django.apps import apps as django_apps
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from inventory.models import Product, Stock, StockMovement, StockSnapshot
+from inventory.services.ledger_service import StockLedgerManager
+from inventory.services.stock_service import StockManager
+from people.models import Supplier
+from purchases.models import Purchase, PurchaseItem
+from sales.services.checkout_service import CheckoutService
+
+
+class StockLedgerTests(TestCase):
+    def setUp(self):
+        self.today = timezone.localdate()
+        self.product = Product.objects.create(name='Widget', purchase_price=Decimal('10.00'))
+        self.stock = Stock.objects.create(product=self.product, quantity=20, price=Decimal('25.00'), tax=0, discount=0)
+        StockMovement.objects.create(
+            product=self.product, kind=StockMovement.Kind.OPENING, quantity=20,
+            day=self.today - timedelta(days=10),
+        )
+
+    def _sell(self, quantity, day=None):
+        payload = {
+            'source': 'pos',
+            'items': [{'product_id': self.product.id, 'purchase_price': '25.00', 'quantity': quantity}],
+        }
+        if day:
+            payload['date'] = day.isoformat()
+        return CheckoutService.checkout(payload)[0]
+
+    def on_hand(self, day):
+        return StockLedgerManager.as_of(day, [self.product.id])[self.product.id]
+
+    def test_sale_is_recorded_on_its_day(self):
+        order = self._sell(3, day=self.today - timedelta(days=2))
+
+        movement = StockMovement.objects.get(kind=StockMovement.Kind.SALE)
+        self.assertEqual((movement.quantity, movement.day, movement.reference), (-3, order.date, order.reference))
+        self.assertEqual(self.on_hand(self.today - timedelta(days=3)), 20)
+        self.assertEqual(self.on_hand(self.today), 17)
+
+    def test_adjust_and_restock(self):
+        StockManager.adjust(self.stock, 25)
+        StockManager.restock([(self.product.id, 2)])
+
+        self.stock.refresh_from_db()
+        self.assertEqual(self.stock.quantity, 27)
+        self.assertEqual(self.on_hand(self.today), 27)
+        self.assertEqual(
+            StockLedgerManager.movements(self.today, self.today)[self.product.id],
+            {'received': 0, 'sold': 0, 'returned': 2, 'adjusted': 5},
+        )
+
+    def test_snapshots_bound_the_replay(self):
+        self._sell(2, day=self.today - timedelta(days=5))
+        self._sell(1, day=self.today - timedelta(days=1))
+        expected = [self.on_hand(self.today - timedelta(days=n)) for n in range(12)]
+
+        written = StockLedgerManager.snapshot_range(self.today - timedelta(days=11), self.today - timedelta(days=1))
+        self.assertEqual(written, 3)  # only the days the product moved
+        with self.assertNumQueries(1):
+            StockLedgerManager.as_of(self.today - timedelta(days=3))
+        self.assertEqual([self.on_hand(self.today - timedelta(days=n)) for n in range(12)], expected)
+
+    def test_backdated_movement_drops_stale_snapshots(self):
+        StockLedgerManager.snapshot(self.today - timedelta(days=1))
+        self._sell(4, day=self.today - timedelta(days=3))
+
+        self.assertFalse(StockSnapshot.objects.exists())
+        self.assertEqual(self.on_hand(self.today - timedelta(days=1)), 16)
+        self.assertEqual(StockLedgerManager.snapshot(self.today - timedelta(days=1)), 1)
+        self.assertEqual(self.on_hand(self.today - timedelta(days=1)), 16)
+
+    def test_today_cannot_be_snapshotted(self):
+        with self.assertRaises(ValueError):
+            StockLedgerManager.snapshot(self.today)
+
+    def test_resaved_receipts_record_only_the_change(self):
+        supplier = Supplier.objects.create(code='S1', name='Acme', email='a@example.com', phone='1', country='KE')
+        purchase = Purchase.objects.create(supplier=supplier, receive_date=self.today)
+        item = PurchaseItem.objects.create(purchase=purchase, product=self.product, quantity=5, unit_cost=Decimal('8.00'))
+        item.save()
+        item.quantity = 3
+        item.save()
+
+        receipts = StockMovement.objects.filter(kind=StockMovement.Kind.RECEIPT)
+        self.assertEqual(list(receipts.order_by('id').values_list('quantity', flat=True)), [5, -2])
+        self.stock.refresh_from_db()
+        self.assertEqual((self.stock.quantity, self.on_hand(self.today)), (23, 23))
+
+    def test_negative_sale_without_a_stock_row_opens_one(self):
+        product = Product.objects.create(name='Gadget', purchase_price=Decimal('1.00'), allow_negative_stock=True)
+
+        CheckoutService.checkout({
+            'source': 'pos',
+            'items': [{'product_id': product.id, 'purchase_price': '2.00', 'quantity': 3}],
+        })
+
+        self.assertEqual(Stock.objects.get(product=product).quantity, -3)
+        self.assertEqual(StockLedgerManager.as_of(self.today, [product.id])[product.id], -3)
+
+    def test_migration_opens_the_ledger_before_the_history(self):
+        open_ledger = import_module('inventory.migrations.0012_stockmovement').open_ledger
+        supplier = Supplier.objects.create(code='S1', name='Acme', email='a@example.com', phone='1', country='KE')
+        purchase = Purchase.objects.create(supplier=supplier, receive_date=self.today - timedelta(days=4))
+        PurchaseItem.objects.create(purchase=purchase, product=self.product, quantity=6, unit_cost=Decimal('8.00'))
+        self._sell(5, day=self.today - timedelta(days=2))
+        StockMovement.objects.all().delete()
+
+        open_ledger(django_apps, None)
+
+        opening = StockMovement.objects.get(kind=StockMovement.Kind.OPENING)
+        self.assertEqual((opening.day, opening.quantity), (self.today - timedelta(days=5), 20))
+        self.assertEqual(
+            [self.on_hand(self.today - timedelta(days=n)) for n in (6, 5, 4, 2, 0)], [0, 20, 26, 21, 21],
+        )
+
+    def test_reports_read_the_ledger(self):
+        self._sell(5, day=self.today - timedelta(days=1))
+        self.client.force_login(User.objects.create_superuser('admin', 'a@example.com', 'pass'))
+        day = (self.today - timedelta(days=1)).strftime('%d/%m/%Y')
+
+        response = self.client.get(reverse('reports:stock-history'), {'date_range': f'{day} - {day}'})
+        product = response.context['page_obj'][0]
+        self.assertEqual((product.opening_qty, product.movement['sold'], product.closing_qty), (20, 5, 15))
+
+        response = self.client.get(reverse('reports:opening-inventory-report'), {'date_range': f'{day} - {day}'})
+        row = response.context['page_obj'][0]
+        self.assertEqual((row.opening_qty, row.sold_qty, row.closing_qty), (20, 5, 15))
+
+        response = self.client.get(reverse('reports:sold-stock'), {'date_range': f'{day} - {day}'})
+        self.assertEqual(response.context['page_obj'][0]['sold_qty'], 5)
@@ -0,0 +1,111 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.test import TestCase
+from django.utils import timezone
+
+from inventory.models import CostConsumption, CostLayer, Product, Stock
+from inventory.services.valuation_service import ValuationManager
+from people.models import Supplier
+from purchases.models import Purchase, PurchaseItem
+from sales.models import OrderItem, ProductDailySales
+from sales.services.checkout_service import CheckoutService
+
+
+class ValuationTests(TestCase):
+    def setUp(self):
+        self.product = Product.objects.create(name='Widget', purchase_price=Decimal('99.00'))
+        Stock.objects.create(product=self.product, quantity=0, price=Decimal('100.00'), tax=0, discount=0)
+        self.supplier = Supplier.objects.create(code='S1', name='Supplier', email='s@example.com', phone='1', country='KE')
+
+    def _receive(self, quantity, unit_cost, days_ago=0):
+        purchase = Purchase.objects.create(
+            supplier=self.supplier,
+            status=Purchase.Status.RECEIVED,
+            receive_date=timezone.localdate() - timedelta(days=days_ago),
+        )
+        return PurchaseItem.objects.create(
+            purchase=purchase, product=self.product, quantity=quantity, unit_cost=Decimal(unit_cost)
+        )
+
+    def _sell(self, quantity):
+        payload = {
+            'source': 'pos',
+            'items': [{'product_id': self.product.id, 'purchase_price': '100.00', 'quantity': quantity}],
+        }
+        return CheckoutService.checkout(payload)[0].items.get()
+
+    def test_sales_draw_oldest_layers_first(self):
+        self._receive(5, '10.00', days_ago=2)
+        self._receive(5, '20.00', days_ago=1)
+
+        line = self._sell(7)
+
+        self.assertEqual(line.cost_price, Decimal('12.86'))  # (5 * 10 + 2 * 20) / 7
+        self.assertEqual(
+            list(line.cost_consumptions.order_by('id').values_list('quantity', 'unit_cost')),
+            [(5, Decimal('10.00')), (2, Decimal('20.00'))],
+        )
+        self.assertEqual(ValuationManager.total_stock_value(), Decimal('60.00'))
+        self.assertEqual(ValuationManager.stock_value()[self.product.id]['quantity'], 3)
+        self.assertEqual(ValuationManager.cogs(), ProductDailySales.objects.get().cost)
+
+    def test_sale_beyond_layers_uses_purchase_price(self):
+        self.product.allow_negative_stock = True
+        self.product.save()
+        self._receive(1, '10.00')
+
+        line = self._sell(3)
+
+        self.assertEqual(line.cost_price, Decimal('69.33'))  # (10 + 2 * 99) / 3
+        self.assertTrue(line.cost_consumptions.filter(layer__isnull=True, quantity=2).exists())
+
+    def test_editing_a_receipt_resyncs_its_layer(self):
+        item = self._receive(5, '10.00')
+        self._sell(2)
+        item.quantity = 8
+        item.unit_cost = Decimal('12.00')
+        item.save()
+
+        layer = CostLayer.objects.get(purchase_item=item)
+        self.assertEqual((layer.quantity, layer.remaining, layer.unit_cost), (8, 6, Decimal('12.00')))
+        self.assertEqual(Stock.objects.get(product=self.product).quantity, 6)
+
+    def test_resaving_a_receipt_keeps_stock_on_the_layers(self):
+        item = self._receive(5, '10.00')
+        item.save()
+        item.save()
+
+        self.assertEqual(Stock.objects.get(product=self.product).quantity, 5)
+        self.assertEqual(CostLayer.objects.get(purchase_item=item).remaining, 5)
+
+    def test_margins(self):
+        self._receive(10, '40.00')
+        self._sell(2)
+        row = ValuationManager.margins().get()
+        self.assertEqual(row['margin'], Decimal('120.00'))
+
+    def test_rebuild_matches_incremental(self):
+        self._receive(5, '10.00', days_ago=2)
+        self._receive(5, '20.00', days_ago=1)
+        self._sell(3)
+        self._sell(4)
+
+        def state():
+            return (
+                sorted(CostLayer.objects.values_list('purchase_item_id', 'unit_cost', 'quantity', 'remaining')),
+                sorted(CostConsumption.objects.values_list('order_item_id', 'quantity', 'unit_cost')),
+                sorted(OrderItem.objects.values_list('id', 'cost_price')),
+            )
+
+        incremental = state()
+        counts = ValuationManager.rebuild()
+        self.assertEqual(counts['layers'], 2)
+        self.assertEqual(counts['repriced'], 0)
+        self.assertEqual(incremental, state())
+
+    def test_rebuild_opens_layer_for_unexplained_stock(self):
+        Stock.objects.filter(product=self.product).update(quantity=4)
+        counts = ValuationManager.rebuild()
+        self.assertEqual(counts['opening'], 1)
+        self.assertEqual(ValuationManager.total_stock_value(), Decimal('396.00'))